@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Operational statistics for the documentation's analytics section.
+
+Sales and visitor figures come from the rollups (see rollups.py), brought
+up to date first, so they cost one pass over the sales and visitors added
+since the last build plus a read of one row per day and ticket type. Cage
+and health figures are GROUP BY aggregates evaluated inside SQLite on a
+read-only connection. Only the aggregated series (one row per day, week,
+ticket type, cage or health status) reach Python.
+"""
+
+from collections import namedtuple
+import sys
+
+from db_introspect import DEFAULT_DB_PATH, connect_readonly
+from rollups import RollupStore
+
+Analytics = namedtuple('Analytics', 'daily weekly ticket_types cages health visitors totals')
+CageUsage = namedtuple('CageUsage', 'id name type capacity recorded animals ratio')
+
+
+def compute_analytics(db_path=DEFAULT_DB_PATH, store_path=None):
+    store = RollupStore(db_path, store_path)
+    try:
+        store.refresh()
+        # (day, revenue, tickets sold, sales)
+        daily = store.daily()
+        # (ISO-like year-week, revenue, tickets sold)
+        weekly = store.weekly()
+        # (ticket type, sales, tickets sold, revenue)
+        ticket_types = store.ticket_types()
+        # (year-week, visitors registered)
+        visitors = store.new_visitors(by_week=True)
+    finally:
+        store.close()
+
+    conn = connect_readonly(db_path)
+    try:
+        # Animals are counted per cage once, then joined to the (smaller) cages table
+        cages = [CageUsage(*row, ratio=(row[5] / row[3]) if row[3] else None) for row in conn.execute(
+            "SELECT c.id, c.name, c.type, c.capacity, c.occupancy, COALESCE(a.animals, 0) "
+            "FROM cages AS c LEFT JOIN (SELECT cage_id, COUNT(*) AS animals FROM animals GROUP BY cage_id) AS a "
+            "ON a.cage_id = c.id"
+        )]
+
+        health = conn.execute(
+            "SELECT COALESCE(health_status, 'Unknown'), COUNT(*) FROM animals GROUP BY 1 ORDER BY 2 DESC"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    capacity = sum(cage.capacity or 0 for cage in cages)
+    housed = sum(cage.animals for cage in cages)
+    totals = {
+        'revenue': sum(row[1] or 0 for row in daily),
+        'tickets': sum(row[2] or 0 for row in daily),
+        'sales': sum(row[3] for row in daily),
+        'days': len(daily),
+        'capacity': capacity,
+        'housed': housed,
+        'utilization': housed / capacity if capacity else None,
+        'over_capacity': sum(1 for cage in cages if cage.ratio is not None and cage.ratio > 1),
+        'animals': sum(count for _, count in health),
+        'visitors': sum(count for _, count in visitors),
+    }
+    return Analytics(daily, weekly, ticket_types, cages, health, visitors, totals)
+
+
+if __name__ == "__main__":
+    result = compute_analytics(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH)
+    for name, value in result.totals.items():
+        print(f"{name}: {value}")
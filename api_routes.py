@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Endpoint inventory for the Express server in backend/src/index.ts.
+
+Scans the app.get/post/put/delete(...) registrations and the SQL each
+handler passes to pool.query(). Parse results are cached on disk keyed by
+the server file's mtime and size, so repeated documentation builds only
+re-scan the file after it changes.
+"""
+
+from collections import namedtuple
+import hashlib
+import json
+import os
+import re
+import sys
+
+from section_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_SERVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'src', 'index.ts')
+
+Route = namedtuple('Route', 'method path sql line')
+
+_REGISTRATION = re.compile(r"\bapp\.(get|post|put|delete|patch)\(\s*(['\"`])(/[^'\"`]*)\2")
+_HANDLER_END = re.compile(r"\bapp\.(?:get|post|put|delete|patch|listen)\(")
+_QUERY = re.compile(r"\bpool\.query\(\s*(['\"`])(.*?)(?<!\\)\1", re.S)
+_PDF_ENDPOINT = re.compile(r"\b(GET|POST|PUT|DELETE|PATCH)\b[\s,]*(/api/[\w\-/:]*)")
+
+_memo = {}
+
+
+def parse_routes(source):
+    """Return the routes registered in `source`, in file order."""
+    routes = []
+    matches = list(_REGISTRATION.finditer(source))
+    for match in matches:
+        end = _HANDLER_END.search(source, match.end())
+        body = source[match.end():end.start() if end else len(source)]
+        sql = [' '.join(query.group(2).split()) for query in _QUERY.finditer(body)]
+        line = source.count('\n', 0, match.start()) + 1
+        routes.append(Route(match.group(1).upper(), match.group(3), sql, line))
+    return routes
+
+
+def source_signature(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def load_routes(path=DEFAULT_SERVER_PATH, cache_dir=DEFAULT_CACHE_DIR):
+    """parse_routes() for a file, memoized in-process and on disk by mtime and size."""
+    signature = source_signature(path)
+    if signature in _memo:
+        return _memo[signature]
+
+    cache_path = None
+    if cache_dir:
+        name = hashlib.sha256(signature[0].encode('utf-8')).hexdigest()[:16]
+        cache_path = os.path.join(cache_dir, 'routes-{}.json'.format(name))
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached['size'] == signature[1] and cached['mtime_ns'] == signature[2]:
+                routes = [Route(*route) for route in cached['routes']]
+                _memo[signature] = routes
+                return routes
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    with open(path, encoding='utf-8') as f:
+        routes = parse_routes(f.read())
+    _memo[signature] = routes
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = cache_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'size': signature[1], 'mtime_ns': signature[2],
+                           'routes': [list(route) for route in routes]}, f)
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass
+    return routes
+
+
+def group_routes(routes):
+    """Group routes by resource (the path segment after /api/), in file order."""
+    groups = {}
+    for route in routes:
+        parts = route.path.strip('/').split('/')
+        resource = parts[1] if len(parts) > 1 and parts[0] == 'api' else parts[0]
+        groups.setdefault(resource, []).append(route)
+    return groups
+
+
+def endpoints_in_pdf(pdf_path):
+    """The (method, path) pairs mentioned in a generated PDF's text."""
+    from pypdf import PdfReader
+
+    text = '\n'.join(page.extract_text() or '' for page in PdfReader(pdf_path).pages)
+    return {(method, path.rstrip('/')) for method, path in _PDF_ENDPOINT.findall(text)}
+
+
+def check_pdf(pdf_path, server_path=DEFAULT_SERVER_PATH):
+    """Return (missing, stale): endpoints in the code but not the PDF, and
+    endpoints in the PDF that the code no longer registers."""
+    code = {(route.method, route.path) for route in load_routes(server_path)}
+    documented = endpoints_in_pdf(pdf_path)
+    return sorted(code - documented), sorted(documented - code)
+
+
+if __name__ == "__main__":
+    for route in load_routes(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SERVER_PATH):
+        print(f"{route.method:6} {route.path:28} line {route.line}: {len(route.sql)} queries")
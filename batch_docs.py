@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Documentation builds for many zoos in one run.
+
+The manifest lists one site per row: its name, its SQLite database (a path
+or a sqlite:/// URL; empty for none) and the PDF to write. It is a CSV file
+with a site,db,output header, or a JSON list of objects with those keys;
+relative paths are relative to the manifest.
+
+    site,db,output
+    Lahore Zoo,lahore/zoo.db,out/lahore.pdf
+    Karachi Zoo,sqlite:///karachi/zoo.db,out/karachi.pdf
+
+    python batch_docs.py sites.csv [--jobs N] [--sections ...] [--include ...] [--cache DIR]
+
+All sites are rendered by one pool of worker processes, which keep styles,
+code fingerprints and the frontend scan warm from one site to the next.
+Page groups that come out the same for several sites (every group that does
+not depend on the site's name or database) are laid out once, before the
+sites themselves, and shared through the fragment cache; each site then only
+lays out its own groups. A site that fails is reported and skipped, and its
+output is left as it was.
+"""
+
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from create_docs import (DATE_FORMAT, SECTION_KEYS, _make_context, _render_fragment_job, _replace_atomically,
+                         build_documentation, fragment_key, page_groups, select_sections)
+from section_cache import DEFAULT_CACHE_BYTES, SectionCache
+
+DEFAULT_INCLUDE = ['analytics']
+
+Site = namedtuple('Site', 'name db output')
+# reused and rendered count page groups taken from the cache and laid out
+SiteResult = namedtuple('SiteResult', 'site pages seconds size reused rendered error')
+
+
+def load_manifest(path):
+    """Sites listed in the CSV or JSON manifest at `path`."""
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = json.load(f) if path.lower().endswith('.json') else list(csv.DictReader(f))
+    sites = []
+    for number, row in enumerate(rows, 1):
+        name = (row.get('site') or '').strip()
+        output = (row.get('output') or '').strip()
+        if not name or not output:
+            raise ValueError("{}: entry {} needs a site and an output".format(path, number))
+        db = (row.get('db') or '').strip()
+        try:
+            db = os.path.join(base, sqlite_path(db)) if db else ''
+        except ValueError:
+            # Reported as that site's failure by run_batch()
+            pass
+        sites.append(Site(name, db, os.path.join(base, output)))
+    outputs = Counter(site.output for site in sites)
+    clashes = [output for output, count in outputs.items() if count > 1]
+    if clashes:
+        raise ValueError("{}: several sites write {}".format(path, ", ".join(clashes)))
+    return sites
+
+
+def sqlite_path(db):
+    """The SQLite file named by a manifest db entry, or None. sqlite:///rel.db
+    and sqlite:////abs.db URLs are accepted; other databases are not."""
+    if not db:
+        return None
+    scheme, sep, rest = db.partition(':')
+    if not sep or len(scheme) == 1:
+        # A plain path (on Windows possibly with a drive letter)
+        return db
+    if scheme.lower() != 'sqlite':
+        raise ValueError("only SQLite databases are supported, not {}:".format(scheme))
+    return rest[3:] if rest.startswith('///') else rest
+
+
+def _build_site(site, db_path, section_keys, date, cache_dir, cache_bytes):
+    # Runs in a pool worker
+    cache = SectionCache(cache_dir, cache_bytes)
+    started = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(site.output)), exist_ok=True)
+        pages = _replace_atomically(site.output, lambda tmp: build_documentation(
+            tmp, section_keys, date, db_path, cache=cache, site=site.name))
+    except Exception as e:
+        return SiteResult(site, 0, time.perf_counter() - started, 0, cache.hits, cache.misses,
+                          "{}: {}".format(type(e).__name__, e))
+    return SiteResult(site, pages, time.perf_counter() - started, os.path.getsize(site.output),
+                      cache.hits, cache.misses, None)
+
+
+def run_batch(sites, sections=None, jobs=None, cache_dir=None, cache_bytes=DEFAULT_CACHE_BYTES,
+              date=None, on_result=None):
+    """Build every site's documentation; returns a SiteResult per site, in
+    manifest order. `sections` are section keys as for build_documentation(),
+    by default the standard sections plus DEFAULT_INCLUDE for sites with a
+    database. Without `cache_dir` fragments are shared through a temporary
+    directory. `on_result` is called with each SiteResult as it finishes."""
+    date = date or datetime.now().strftime(DATE_FORMAT)
+    results = {}
+
+    def finish(result):
+        results[result.site] = result
+        if on_result:
+            on_result(result)
+
+    # Plan every site in this process: fragment keys are cheap, and sites
+    # whose database is missing or whose sections can't be built fail here
+    plans = []
+    for site in sites:
+        try:
+            db_path = sqlite_path(site.db)
+            keys = sections
+            if keys is None:
+                keys = [section.key for section in select_sections()] + (DEFAULT_INCLUDE if db_path else [])
+            if db_path and not os.path.exists(db_path):
+                raise FileNotFoundError("SQLite database not found at {}".format(db_path))
+            ctx = _make_context(keys, date, db_path, site.name)
+            groups = page_groups(ctx.sections)
+            plans.append((site, db_path, keys, groups, [fragment_key(ctx, group) for group in groups]))
+        except Exception as e:
+            finish(SiteResult(site, 0, 0.0, 0, 0, 0, "{}: {}".format(type(e).__name__, e)))
+
+    temporary = cache_dir is None
+    if temporary:
+        cache_dir = tempfile.mkdtemp(prefix='zms-batch-')
+    cache = SectionCache(cache_dir, cache_bytes)
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            # Groups that several sites share are laid out once, up front
+            counts = Counter(key for plan in plans for key in set(plan[4]))
+            shared = {}
+            for site, db_path, keys, groups, group_keys in plans:
+                for group, key in zip(groups, group_keys):
+                    if counts[key] > 1 and key not in shared and key not in cache:
+                        shared[key] = pool.submit(_render_fragment_job, keys, [section.key for section in group],
+                                                  date, db_path, site.name)
+            for key, future in shared.items():
+                try:
+                    cache.put(key, future.result())
+                except Exception:
+                    # The sites that need the group will lay it out and report the error
+                    pass
+
+            futures = {pool.submit(_build_site, site, db_path, keys, date, cache_dir, cache_bytes): site
+                       for site, db_path, keys, groups, group_keys in plans}
+            for future in as_completed(futures):
+                try:
+                    finish(future.result())
+                except BrokenProcessPool:
+                    finish(SiteResult(futures[future], 0, 0.0, 0, 0, 0, "worker process died"))
+    finally:
+        if temporary:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return [results[site] for site in sites]
+
+
+def format_result(result):
+    if result.error:
+        return "✗ {:<24} {}".format(result.site.name, result.error)
+    rate = result.pages / result.seconds if result.seconds else 0
+    return "✓ {:<24} {:>4} pages {:>7.2f}s {:>7.1f} pages/s {:>8.1f} KB  {} reused, {} laid out".format(
+        result.site.name, result.pages, result.seconds, rate, result.size / 1024.0, result.reused, result.rendered)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the ZMS documentation for every site in a manifest.")
+    parser.add_argument('manifest', help="CSV (site,db,output) or JSON manifest")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help="worker processes (default: %(default)s)")
+    parser.add_argument('--sections', help="comma-separated section keys ({})".format(", ".join(SECTION_KEYS)))
+    parser.add_argument('--include', metavar='KEYS',
+                        help="comma-separated optional sections to add to the default ones "
+                             "(default: {} for sites with a database)".format(", ".join(DEFAULT_INCLUDE)))
+    parser.add_argument('--cache', metavar='DIR',
+                        help="keep fragments in this cache directory, so a repeat run only lays out what changed")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024), metavar='MB',
+                        help="evict least recently used fragments above this size (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        sites = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    keys = args.sections.split(',') if args.sections else None
+    if args.include:
+        keys = (keys or [section.key for section in select_sections()]) + args.include.split(',')
+    try:
+        select_sections(keys)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"🏭 Building {len(sites)} sites with {args.jobs} workers")
+    started = time.perf_counter()
+    results = run_batch(sites, keys, args.jobs, args.cache, args.cache_size * 1024 * 1024,
+                        on_result=lambda result: print(format_result(result)))
+    elapsed = time.perf_counter() - started
+
+    built = [result for result in results if not result.error]
+    failed = len(results) - len(built)
+    pages = sum(result.pages for result in built)
+    print("\n" + "="*60)
+    print(f"✓ {len(built)} of {len(results)} sites built in {elapsed:.2f}s "
+          f"({len(built) / elapsed if elapsed else 0:.2f} sites/s, {pages / elapsed if elapsed else 0:.1f} pages/s)")
+    if failed:
+        print(f"✗ {failed} failed:")
+        for result in results:
+            if result.error:
+                print(f"  {result.site.name}: {result.error}")
+    print("="*60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the documentation pipeline in create_docs.py.
+
+For each dataset size a synthetic database (the init.ts schema, with that
+many animals and ticket sales) is generated into a temp directory, then the
+build is timed stage by stage: style construction, flowable construction
+per section, layout, PDF serialization and the file write. Results are
+written as JSON; --compare reports stages that got slower than a previous
+run.
+
+The default sizes, 10 and 10,000 rows, build in seconds. --large adds the
+1,000,000-row dataset, whose data appendices take hours to lay out; run it
+deliberately, not on every change.
+
+    python bench_docs.py --output bench.json
+    python bench_docs.py --compare bench.json
+    python bench_docs.py --large --output bench-large.json
+"""
+
+from datetime import datetime
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import reportlab
+from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+import create_docs
+import table_styles
+from generate_dataset import default_counts, generate
+
+DEFAULT_SIZES = [10, 10000]
+# Opt-in with --large: hours with both data appendices
+LARGE_SIZE = 1000000
+DEFAULT_SECTIONS = [section.key for section in create_docs.select_sections()] + [
+    'appendix_animals', 'appendix_ticket_sales']
+
+
+def make_dataset(path, rows, seed=42):
+    """A database with the init.ts schema and `rows` animals and ticket sales."""
+    generate(path, default_counts(rows), seed=seed)
+
+
+class TimedDocTemplate(SimpleDocTemplate):
+    """Separates PDF serialization (canvas.save) from layout."""
+    serialize_time = 0.0
+
+    def _endBuild(self):
+        started = time.perf_counter()
+        SimpleDocTemplate._endBuild(self)
+        self.serialize_time = time.perf_counter() - started
+
+
+def bench_build(db_path, section_keys, out_dir):
+    stages = {}
+
+    # Cold style construction: drop the per-process caches first
+    create_docs._styles = None
+    table_styles._table_styles.clear()
+    started = time.perf_counter()
+    styles = create_docs.get_styles()
+    for palette in table_styles.PALETTES:
+        table_styles.get_table_style(palette)
+        table_styles.get_table_style(palette, compact=True)
+    stages['styles'] = time.perf_counter() - started
+
+    ctx = create_docs.BuildContext(styles, create_docs.select_sections(section_keys), db_path=db_path)
+    elements = []
+    stages['sections'] = {}
+    for i, section in enumerate(ctx.sections):
+        started = time.perf_counter()
+        elements.extend(create_docs.build_elements(ctx, [section]))
+        stages['sections'][section.key] = time.perf_counter() - started
+        if section.page_break and i < len(ctx.sections) - 1:
+            elements.append(PageBreak())
+
+    buf = io.BytesIO()
+    doc = TimedDocTemplate(buf, pagesize=create_docs.letter,
+                           rightMargin=0.75*create_docs.inch, leftMargin=0.75*create_docs.inch,
+                           topMargin=0.75*create_docs.inch, bottomMargin=0.75*create_docs.inch)
+    started = time.perf_counter()
+    doc.build(elements)
+    stages['layout'] = time.perf_counter() - started - doc.serialize_time
+    stages['serialize'] = doc.serialize_time
+
+    data = buf.getvalue()
+    started = time.perf_counter()
+    with open(os.path.join(out_dir, 'bench.pdf'), 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    stages['write'] = time.perf_counter() - started
+    return {'stages': stages, 'pages': doc.page, 'pdf_bytes': len(data)}
+
+
+def _flatten(stages, prefix=''):
+    for name, value in stages.items():
+        if isinstance(value, dict):
+            for item in _flatten(value, prefix + name + '.'):
+                yield item
+        else:
+            yield prefix + name, value
+
+
+def compare(baseline, results, threshold):
+    """Print stages slower than `threshold` times the baseline; return their count."""
+    before = {run['rows']: dict(_flatten(run['stages'])) for run in baseline['results']}
+    regressions = 0
+    for run in results['results']:
+        old = before.get(run['rows'])
+        if old is None:
+            continue
+        for name, value in _flatten(run['stages']):
+            # Ignore noise on stages that take well under a millisecond
+            if name in old and old[name] > 0.001 and value > old[name] * threshold:
+                regressions += 1
+                print(f"✗ {run['rows']} rows, {name}: {old[name]:.4f}s -> {value:.4f}s ({value / old[name]:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ZMS documentation build.")
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help="comma-separated animals/ticket_sales row counts (default: %(default)s)")
+    parser.add_argument('--large', action='store_true',
+                        help="also benchmark {:,} rows (takes hours)".format(LARGE_SIZE))
+    parser.add_argument('--sections', default=','.join(DEFAULT_SECTIONS), help="section keys to build")
+    parser.add_argument('--repeat', type=int, default=1, help="builds per size; the fastest is kept")
+    parser.add_argument('--output', default='docs_bench.json', help="JSON results file (default: %(default)s)")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="slowdown factor counted as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    if args.large and LARGE_SIZE not in sizes:
+        sizes.append(LARGE_SIZE)
+    section_keys = args.sections.split(',')
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'reportlab': reportlab.Version,
+            'platform': platform.platform(),
+            'sections': section_keys,
+        },
+        'results': [],
+    }
+
+    work_dir = tempfile.mkdtemp(prefix='zms-bench-')
+    try:
+        for rows in sizes:
+            db_path = os.path.join(work_dir, 'zoo-{}.db'.format(rows))
+            started = time.perf_counter()
+            make_dataset(db_path, rows)
+            generate_time = time.perf_counter() - started
+
+            best = None
+            for _ in range(args.repeat):
+                run = bench_build(db_path, section_keys, work_dir)
+                total = sum(value for _, value in _flatten(run['stages']))
+                if best is None or total < best[0]:
+                    best = (total, run)
+            total, run = best
+            run.update({'rows': rows, 'generate': generate_time, 'total': total})
+            results['results'].append(run)
+            print(f"{rows:>9,} rows: {total:8.3f}s total, layout {run['stages']['layout']:.3f}s, "
+                  f"{run['pages']} pages, {run['pdf_bytes'] / 1024:.0f} KB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.threshold):
+            return 1
+        print(f"✓ No stage slower than {args.threshold}x {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opt-in profiling of the documentation build.
+
+A BuildProfile records nested spans (wall time plus tracemalloc memory) for
+each stage of a build: every section's builder, the conversion of its blocks
+to flowables (where reportlab parses Paragraph markup), its share of page
+layout (where Tables are wrapped and split) and PDF serialization. Layout is
+attributed to sections by zero-size marker flowables placed in front of each
+section's flowables, which note the time as the layout engine reaches them.
+
+The spans are written as a Chrome trace (open in chrome://tracing or
+https://ui.perfetto.dev), with per-section totals under "otherData" so CI
+can diff two runs:
+
+    profile = BuildProfile()
+    build_documentation("out.pdf", profile=profile)
+    profile.close()
+    profile.write_trace("docs_profile.json")
+    print(profile.format_summary())
+
+tracemalloc slows the build down by roughly half again; compare times
+between profiled runs only.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+DEFAULT_TRACE_PATH = 'docs_profile.json'
+
+# start and duration in seconds from the start of the profile; peak is the
+# most memory traced while the span was open, above what was traced when it
+# opened, and allocated what it left allocated, in bytes
+Span = namedtuple('Span', 'name category start duration peak allocated depth args')
+# Seconds and bytes spent on one section, summed over its spans
+SectionProfile = namedtuple('SectionProfile', 'key build flowables layout peak')
+
+PHASES = ('build', 'flowables', 'layout')
+
+
+class _Frame(object):
+    __slots__ = ('name', 'category', 'args', 'start', 'memory', 'peak')
+
+
+class BuildProfile(object):
+    """Collects spans for one build. Not thread-safe: spans are expected
+    from the thread that created the profile."""
+
+    def __init__(self, trace_memory=True):
+        self.spans = []
+        self._stack = []
+        self._layout = None
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._memory = self.traced_memory = tracemalloc.is_tracing()
+        self._origin = time.perf_counter()
+
+    def _traced(self):
+        return tracemalloc.get_traced_memory() if self._memory else (0, 0)
+
+    def begin(self, name, category, **args):
+        current, peak = self._traced()
+        if self._stack:
+            # tracemalloc keeps a single peak; fold it into the enclosing span
+            # before resetting it for this one
+            self._stack[-1].peak = max(self._stack[-1].peak, peak)
+        if self._memory:
+            tracemalloc.reset_peak()
+        frame = _Frame()
+        frame.name, frame.category, frame.args = name, category, args
+        frame.start = time.perf_counter()
+        frame.memory = frame.peak = current
+        self._stack.append(frame)
+
+    def end(self, **args):
+        ended = time.perf_counter()
+        current, peak = self._traced()
+        frame = self._stack.pop()
+        frame.peak = max(frame.peak, peak)
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+        frame.args.update(args)
+        self.spans.append(Span(frame.name, frame.category, frame.start - self._origin, ended - frame.start,
+                               frame.peak - frame.memory, current - frame.memory, len(self._stack), frame.args))
+
+    @contextmanager
+    def span(self, name, category, **args):
+        self.begin(name, category, **args)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def layout(self, name):
+        """End the layout span of the previous section, if any, and start one for `name`."""
+        self.end_layout()
+        self.begin('layout ' + name, 'layout', section=name)
+        self._layout = len(self._stack)
+
+    def end_layout(self):
+        if self._layout is not None:
+            # Close anything a flowable left open along with the layout span
+            while len(self._stack) >= self._layout:
+                self.end()
+            self._layout = None
+
+    def marker(self, name):
+        """A zero-size flowable that starts the layout span for `name` when drawn."""
+        return _layout_marker_class()(self, name)
+
+    def build(self, doc, flowables, **kwargs):
+        """doc.build(flowables, **kwargs), with layout and serialization as separate spans."""
+        end_build = doc._endBuild
+
+        def _endBuild():
+            # _endBuild finishes the last page and then writes the PDF
+            self.end_layout()
+            with self.span('serialize', 'pdf'):
+                end_build()
+
+        doc._endBuild = _endBuild
+        try:
+            with self.span('doc.build', 'pdf', flowables=len(flowables)):
+                doc.build(flowables, **kwargs)
+        finally:
+            self.end_layout()
+            del doc._endBuild
+
+    def close(self):
+        """Close open spans and stop tracemalloc if this profile started it."""
+        self.end_layout()
+        while self._stack:
+            self.end()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+            self._memory = False
+
+    def sections(self):
+        """SectionProfiles, in the order the sections were first seen."""
+        totals = {}
+        for span in self.spans:
+            key = span.args.get('section')
+            if key is None or span.category not in PHASES:
+                continue
+            entry = totals.setdefault(key, dict.fromkeys(PHASES + ('peak',), 0))
+            entry[span.category] += span.duration
+            entry['peak'] = max(entry['peak'], span.peak)
+        order = sorted(totals, key=lambda key: min(span.start for span in self.spans if span.args.get('section') == key))
+        return [SectionProfile(key, *(totals[key][name] for name in PHASES + ('peak',))) for key in order]
+
+    def phases(self):
+        """{span name: (seconds, peak bytes)} for spans that are not per-section."""
+        totals = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            if 'section' in span.args:
+                continue
+            seconds, peak = totals.get(span.name, (0.0, 0))
+            totals[span.name] = (seconds + span.duration, max(peak, span.peak))
+        return totals
+
+    def trace(self):
+        """The spans as a Chrome trace (JSON object format)."""
+        pid, tid = os.getpid(), threading.get_ident()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': 'create_docs'}}]
+        for span in sorted(self.spans, key=lambda span: (span.start, span.depth)):
+            args = dict(span.args)
+            if self.traced_memory:
+                args.update(peak_kb=round(span.peak / 1024.0, 1), allocated_kb=round(span.allocated / 1024.0, 1))
+            events.append({'name': span.name, 'cat': span.category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': round(span.start * 1e6, 1), 'dur': round(span.duration * 1e6, 1), 'args': args})
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'sections': {entry.key: {'build_ms': round(entry.build * 1000, 3),
+                                         'flowables_ms': round(entry.flowables * 1000, 3),
+                                         'layout_ms': round(entry.layout * 1000, 3),
+                                         'peak_kb': round(entry.peak / 1024.0, 1)}
+                             for entry in self.sections()},
+                'phases': {name: {'ms': round(seconds * 1000, 3), 'peak_kb': round(peak / 1024.0, 1)}
+                           for name, (seconds, peak) in self.phases().items()},
+            },
+        }
+
+    def write_trace(self, path=DEFAULT_TRACE_PATH):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.trace(), f)
+
+    def format_summary(self):
+        """Time and peak memory per section, then for the whole-document phases."""
+        lines = ["{:<26} {:>9} {:>10} {:>9} {:>9} {:>10}".format(
+            'Section', 'build ms', 'flowables', 'layout', 'total', 'peak KB')]
+        for entry in self.sections():
+            total = entry.build + entry.flowables + entry.layout
+            lines.append("{:<26} {:>9.1f} {:>10.1f} {:>9.1f} {:>9.1f} {:>10.1f}".format(
+                entry.key, entry.build * 1000, entry.flowables * 1000, entry.layout * 1000,
+                total * 1000, entry.peak / 1024.0))
+        for name, (seconds, peak) in self.phases().items():
+            lines.append("{:<26} {:>9} {:>10} {:>9} {:>9.1f} {:>10.1f}".format(
+                name, '', '', '', seconds * 1000, peak / 1024.0))
+        return "\n".join(lines)
+
+
+_LayoutMarker = None
+
+
+def _layout_marker_class():
+    # Defined on first use: importing this module must not pull in platypus,
+    # which create_docs only loads once a PDF is laid out
+    global _LayoutMarker
+    if _LayoutMarker is not None:
+        return _LayoutMarker
+    from reportlab.platypus import Flowable
+
+    class LayoutMarker(Flowable):
+        """Takes no space; tells a BuildProfile where a section's layout starts."""
+        _ZEROSIZE = 1
+
+        def __init__(self, profile, name):
+            Flowable.__init__(self)
+            self.profile = profile
+            self.name = name
+            self.width = self.height = 0
+
+        def wrap(self, availWidth, availHeight):
+            return 0, 0
+
+        def draw(self):
+            self.profile.layout(self.name)
+
+    _LayoutMarker = LayoutMarker
+    return _LayoutMarker
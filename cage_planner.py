@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Placement plan for animals against cage capacity and cage type.
+
+Animals that need a cage are collected first: those in a cage holding more
+animals than its capacity (the smallest species groups in it move, so herds
+stay together), in a cage under maintenance, in a cage of a type their
+species can't live in, without a cage, plus any incoming animals. Their
+current cages are emptied of them, then they are placed in two steps:
+
+1. Species to cage types: a maximum flow from each species (its animals to
+   place) through the cage types it can live in (SPECIES_CAGE_TYPES, or the
+   types it already lives in for species not listed) to the free places of
+   each type. The graph has one node per species and type, so this is
+   instant however many cages there are, and it places as many animals as
+   can be placed at all.
+2. Animals to cages, per type: cages already housing the species first,
+   then the cages with the most free places, so a species fills few cages
+   and load spreads across the rest. Each cage is filled with one chunk.
+
+Per-cage state lives in flat arrays indexed by cage number (array('i') for
+capacity and head counts), so thousands of cages cost a few bytes each.
+
+    plan = plan_placements('backend/zoo.db', incoming={'Lion': 2})
+
+    python cage_planner.py [zoo.db] [--incoming Lion:2,Penguin:5] [--moves N]
+"""
+
+from array import array
+from collections import Counter, defaultdict, deque, namedtuple
+import argparse
+import sys
+import time
+
+from db_introspect import DEFAULT_DB_PATH, connect_readonly
+
+# Cage types each species can live in, best first. Species not listed may
+# live in the types they already live in.
+SPECIES_CAGE_TYPES = {
+    'bear': ('Mixed', 'Outdoor'),
+    'elephant': ('Outdoor',),
+    'flamingo': ('Aviary', 'Mixed'),
+    'giraffe': ('Mixed', 'Outdoor'),
+    'lion': ('Outdoor', 'Mixed'),
+    'lizard': ('Reptile House', 'Indoor'),
+    'parrot': ('Aviary', 'Indoor'),
+    'penguin': ('Indoor/Pool',),
+    'python': ('Reptile House', 'Indoor'),
+    'sea lion': ('Indoor/Pool',),
+    'snake': ('Reptile House', 'Indoor'),
+    'tiger': ('Outdoor', 'Mixed'),
+    'tortoise': ('Reptile House', 'Indoor', 'Outdoor'),
+    'zebra': ('Outdoor', 'Mixed'),
+}
+ACTIVE_STATUS = 'Active'
+
+REASONS = [
+    ('over capacity', 'Cage over capacity'),
+    ('maintenance', 'Cage not active'),
+    ('cage type', 'Wrong cage type for species'),
+    ('no cage', 'No cage assigned'),
+    ('incoming', 'Incoming'),
+]
+
+# from_cage is None for incoming animals and animals without a cage;
+# to_cage is None when no compatible cage has room
+Move = namedtuple('Move', 'animal_id species from_cage to_cage reason')
+Cage = namedtuple('Cage', 'id name type capacity status')
+# Per cage type: cages, capacity (of active cages), animals before and after,
+# and cages over capacity before and after
+TypeUsage = namedtuple('TypeUsage', 'type cages capacity before after over_before over_after')
+Plan = namedtuple('Plan', 'cages moves usage unplaced compatible seconds')
+
+
+def species_key(species):
+    return (species or '').strip().lower()
+
+
+def compatible_types(animals_by_species_type, cage_types):
+    """{species key: [cage type, ...]} for every species seen, best first."""
+    known = {}
+    for key, types in SPECIES_CAGE_TYPES.items():
+        present = [cage_type for cage_type in types if cage_type in cage_types]
+        if present:
+            known[key] = present
+    for key, counts in animals_by_species_type.items():
+        if key not in known:
+            known[key] = [cage_type for cage_type, _ in counts.most_common() if cage_type in cage_types]
+    return known
+
+
+def max_flow_assignment(demand, supply, edges):
+    """{(species, type): animals} placing as many animals as possible.
+    `demand` is {species: animals}, `supply` {type: free places} and
+    `edges` {species: [types, best first]}; Edmonds-Karp on the
+    species/type graph."""
+    source, sink = ('source',), ('sink',)
+    residual = defaultdict(dict)
+
+    def add(a, b, capacity):
+        residual[a][b] = residual[a].get(b, 0) + capacity
+        residual[b].setdefault(a, 0)
+
+    for species, count in demand.items():
+        add(source, ('s', species), count)
+        for cage_type in edges.get(species, ()):
+            add(('s', species), ('t', cage_type), count)
+    for cage_type, free in supply.items():
+        add(('t', cage_type), sink, free)
+
+    while True:
+        parent = {source: None}
+        queue = deque([source])
+        while queue and sink not in parent:
+            node = queue.popleft()
+            for nxt, capacity in residual[node].items():
+                if capacity > 0 and nxt not in parent:
+                    parent[nxt] = node
+                    queue.append(nxt)
+        if sink not in parent:
+            break
+        path = []
+        node = sink
+        while parent[node] is not None:
+            path.append((parent[node], node))
+            node = parent[node]
+        bottleneck = min(residual[a][b] for a, b in path)
+        for a, b in path:
+            residual[a][b] -= bottleneck
+            residual[b][a] += bottleneck
+
+    flow = {}
+    for species in demand:
+        for cage_type in edges.get(species, ()):
+            # Flow on an edge is what its reverse edge has accumulated
+            sent = residual[('t', cage_type)].get(('s', species), 0)
+            if sent:
+                flow[(species, cage_type)] = sent
+    return flow
+
+
+def plan_placements(db_path=DEFAULT_DB_PATH, incoming=None):
+    """A Plan for the animals and cages in `db_path`; `incoming` is
+    {species: count} of animals still to arrive."""
+    started = time.perf_counter()
+    conn = connect_readonly(db_path)
+    try:
+        cages = [Cage(*row) for row in conn.execute(
+            "SELECT id, name, COALESCE(type, ''), COALESCE(capacity, 0), COALESCE(status, ?) FROM cages ORDER BY rowid",
+            (ACTIVE_STATUS,))]
+        index = {cage.id: i for i, cage in enumerate(cages)}
+        # Animal rows as three parallel lists, cage as an index (-1: none)
+        animal_ids, animal_species, animal_cage = [], [], array('i')
+        for animal_id, species, cage_id in conn.execute("SELECT id, species, cage_id FROM animals ORDER BY rowid"):
+            animal_ids.append(animal_id)
+            animal_species.append(species or '')
+            animal_cage.append(index.get(cage_id, -1))
+        # Few distinct species: key each one once
+        keys = {species: species_key(species) for species in set(animal_species)}
+        animal_key = [keys[species] for species in animal_species]
+    finally:
+        conn.close()
+
+    n = len(cages)
+    capacity = array('i', (max(cage.capacity, 0) for cage in cages))
+    active = array('b', (cage.status == ACTIVE_STATUS for cage in cages))
+    cage_types = sorted(set(cage.type for cage in cages))
+    codes = {cage_type: code for code, cage_type in enumerate(cage_types)}
+    type_code = array('i', (codes[cage.type] for cage in cages))
+    count = array('i', bytes(4 * n))
+    residents = defaultdict(list)             # cage index -> animal indexes
+    for a, cage in enumerate(animal_cage):
+        if cage >= 0:
+            count[cage] += 1
+            residents[cage].append(a)
+    seen_types = defaultdict(Counter)         # species key -> Counter of cage types
+    for (key, code), number in Counter((animal_key[a], type_code[cage])
+                                       for a, cage in enumerate(animal_cage) if cage >= 0).items():
+        seen_types[key][cage_types[code]] = number
+    compatible = compatible_types(seen_types, set(cage.type for cage, ok in zip(cages, active) if ok))
+    before = array('i', count)
+
+    # Who has to move
+    moving = []                               # (animal index or None, species, reason)
+    for a, cage in enumerate(animal_cage):
+        if cage < 0:
+            moving.append((a, animal_species[a], 'no cage'))
+        elif not active[cage]:
+            moving.append((a, animal_species[a], 'maintenance'))
+        elif cage_types[type_code[cage]] not in compatible.get(animal_key[a], cage_types):
+            moving.append((a, animal_species[a], 'cage type'))
+    leaving = set(a for a, _, _ in moving)
+    for cage, members in residents.items():
+        staying = [a for a in members if a not in leaving]
+        excess = len(staying) - capacity[cage]
+        if excess > 0 and active[cage]:
+            # Smallest species groups leave first, the latest arrivals within a group
+            sizes = Counter(animal_key[a] for a in staying)
+            staying.sort(key=lambda a: (sizes[animal_key[a]], -a))
+            for a in staying[:excess]:
+                moving.append((a, animal_species[a], 'over capacity'))
+                leaving.add(a)
+    for a in leaving:
+        count[animal_cage[a]] -= 1
+    for species, number in (incoming or {}).items():
+        moving.extend((None, species, 'incoming') for _ in range(number))
+
+    # Species to cage types
+    demand = Counter(species_key(species) for _, species, _ in moving)
+    supply = Counter()
+    for i in range(n):
+        if active[i] and capacity[i] > count[i]:
+            supply[cages[i].type] += capacity[i] - count[i]
+    flow = max_flow_assignment(demand, supply, compatible)
+
+    # Animals to cages within each type
+    by_type = defaultdict(list)
+    for i in range(n):
+        if active[i]:
+            by_type[cage_types[type_code[i]]].append(i)
+    housing = defaultdict(set)                # species key -> cage indexes housing it after removals
+    for cage, members in residents.items():
+        for a in members:
+            if a not in leaving:
+                housing[animal_key[a]].add(cage)
+    queues = defaultdict(deque)
+    for a, species, reason in moving:
+        queues[species_key(species)].append((a, species, reason))
+    moves = []
+    for (key, cage_type), placed in sorted(flow.items(), key=lambda item: -item[1]):
+        candidates = [i for i in by_type[cage_type] if capacity[i] > count[i]]
+        candidates.sort(key=lambda i: (i not in housing[key], count[i] - capacity[i], i))
+        queue = queues[key]
+        for i in candidates:
+            if not placed:
+                break
+            take = min(placed, capacity[i] - count[i])
+            for _ in range(take):
+                a, species, reason = queue.popleft()
+                moves.append(Move(animal_ids[a] if a is not None else None, species,
+                                  cages[animal_cage[a]].id if a is not None and animal_cage[a] >= 0 else None,
+                                  cages[i].id, reason))
+            count[i] += take
+            housing[key].add(i)
+            placed -= take
+    unplaced = Counter()
+    for key, queue in queues.items():
+        for a, species, reason in queue:
+            moves.append(Move(animal_ids[a] if a is not None else None, species,
+                              cages[animal_cage[a]].id if a is not None and animal_cage[a] >= 0 else None, None, reason))
+            unplaced[species] += 1
+            if a is not None and animal_cage[a] >= 0:
+                # Nowhere better to go: it stays where it is
+                count[animal_cage[a]] += 1
+
+    totals = [[0] * 6 for _ in cage_types]
+    for i in range(n):
+        row = totals[type_code[i]]
+        row[0] += 1
+        row[1] += capacity[i] if active[i] else 0
+        row[2] += before[i]
+        row[3] += count[i]
+        row[4] += before[i] > capacity[i]
+        row[5] += count[i] > capacity[i]
+    usage = [TypeUsage(cage_type, *row) for cage_type, row in zip(cage_types, totals)]
+    return Plan(cages, moves, usage, unplaced, compatible, time.perf_counter() - started)
+
+
+def parse_incoming(text):
+    """{species: count} from "Lion:2,Penguin:5"."""
+    incoming = Counter()
+    for part in (text or '').split(','):
+        if not part.strip():
+            continue
+        species, _, number = part.rpartition(':')
+        if not species or not number.strip().isdigit():
+            raise ValueError("Expected SPECIES:COUNT, got {!r}".format(part))
+        incoming[species.strip()] += int(number)
+    return incoming
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan where animals should live given cage capacity and type.")
+    parser.add_argument('db', nargs='?', default=DEFAULT_DB_PATH, help="SQLite database (default: backend/zoo.db)")
+    parser.add_argument('--incoming', metavar='SPECIES:N,...', help="animals still to arrive, e.g. Lion:2,Penguin:5")
+    parser.add_argument('--moves', type=int, default=20, help="moves to list (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        plan = plan_placements(args.db, parse_incoming(args.incoming))
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    placed = sum(1 for move in plan.moves if move.to_cage)
+    print(f"✓ Planned {len(plan.moves):,} placements over {len(plan.cages):,} cages in {plan.seconds * 1000:.0f} ms: "
+          f"{placed:,} placed, {len(plan.moves) - placed:,} without room")
+    print(f"{'Type':<16} {'Capacity':>9} {'Before':>9} {'After':>9} {'Over before':>12} {'Over after':>11}")
+    for usage in plan.usage:
+        print(f"{usage.type:<16} {usage.capacity:>9,} {usage.before:>9,} {usage.after:>9,} "
+              f"{usage.over_before:>12,} {usage.over_after:>11,}")
+    for move in plan.moves[:args.moves]:
+        print(f"  {move.animal_id or '(new)':<12} {move.species:<12} {move.from_cage or '-':>10} -> "
+              f"{move.to_cage or 'no room':<10} {move.reason}")
+    for species, number in plan.unplaced.most_common():
+        print(f"⚠️ {number:,} {species} without room in {', '.join(plan.compatible.get(species_key(species), [])) or 'any known cage type'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,119 +1,217 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""
+ZMS documentation generator.
+
+Can be imported and called repeatedly from a long-running process:
+
+    from create_docs import build_documentation
+    build_documentation("out.pdf", sections=["overview", "database"])
+
+or run as a script:
+
+    python create_docs.py [output.pdf] [--sections overview,database,...] [--db [zoo.db]]
+                          [--include analytics,...] [--appendix] [--cache [DIR]] [--stats] [--jobs N] [--optimize]
+                          [--profile [TRACE.json]]
+    python create_docs.py [output.pdf] --check
+    python create_docs.py [output.pdf] --watch [--debounce MS] [--poll SECONDS] [other options]
+    python create_docs.py docs.html | docs.md [--format html|markdown] [--sections ...] [--db ...]
 
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+Importing this module is kept cheap, for processes that start per request:
+reportlab's styles, platypus, charts and canvas are imported by the
+functions that lay out a PDF, the first time one runs, and HTML and Markdown
+exports never load them. A PDF's flowables are made section by section as
+layout reaches them and dropped once placed (see FlowableStream).
+startup_budget.py fails when import time or peak memory regress.
+"""
+
+from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
-from reportlab.lib import colors
+import reportlab
+from collections import Counter, namedtuple
+from contextlib import nullcontext
 from datetime import datetime
+from html import escape as html_escape
+import argparse
+import hashlib
+import inspect
+import io
 import os
+import sys
+import tempfile
+import time
+
+from analytics import compute_analytics
+from api_routes import DEFAULT_SERVER_PATH as SERVER_PATH, check_pdf, group_routes, load_routes, source_signature
+from build_profile import DEFAULT_TRACE_PATH, BuildProfile
+from cage_planner import REASONS, plan_placements, species_key
+from data_appendix import iter_batches, streaming_table
+from db_introspect import DEFAULT_DB_PATH, INIT_SCRIPT_PATH, connect_readonly, database_signature, introspect_database
+from doc_model import RENDERERS, Break, Chart, Code, DataTable, Heading, Para, Space, Table
+from file_watch import DEFAULT_DEBOUNCE, open_watcher, wait_for_changes
+from fonts import arabic_font_path, arabic_markup, has_arabic
+from frontend_inventory import DEFAULT_SRC_DIR as FRONTEND_SRC_DIR, MANY_FETCHES, build_inventory
+from frontend_inventory import source_signature as frontend_signature
+from index_advisor import DEFAULT_REPEAT as ADVISOR_REPEAT, analyse as analyse_queries
+from pdf_optimize import describe as describe_optimization, optimize_pdf
+from search_index import SOURCE_NAMES as SEARCH_SOURCES, SearchIndex, SearchPage
+from section_cache import DEFAULT_CACHE_BYTES, DEFAULT_CACHE_DIR, SectionCache
+from table_styles import FRAME_WIDTH, PALETTES, get_table_style, make_table
+from vaccination_schedule import VaccinationSchedule
+
+PDF_PATH = "ZMS_Complete_Documentation.pdf"
+DATE_FORMAT = '%d-%m-%Y'
+
+
+def escape(text):
+    """Escape &, < and > for paragraph markup."""
+    return html_escape(text, quote=False)
+
+
+# Paragraph styles are built on first use and shared by every build in this process
+_styles = None
+
+
+def get_styles():
+    global _styles
+    if _styles is not None:
+        return _styles
+
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    base = getSampleStyleSheet()
+    _styles = {}
+    _styles['title'] = ParagraphStyle(
+        'CustomTitle',
+        parent=base['Heading1'],
+        fontSize=28,
+        textColor=colors.HexColor('#1F2937'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    )
+
+    _styles['heading'] = ParagraphStyle(
+        'CustomHeading',
+        parent=base['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#374151'),
+        spaceAfter=12,
+        spaceBefore=12,
+        fontName='Helvetica-Bold',
+        borderColor=colors.HexColor('#3B82F6'),
+        borderWidth=2,
+        borderPadding=10,
+        backColor=colors.HexColor('#EFF6FF')
+    )
+
+    _styles['subheading'] = ParagraphStyle(
+        'CustomSubHeading',
+        parent=base['Heading3'],
+        fontSize=13,
+        textColor=colors.HexColor('#1F2937'),
+        spaceAfter=10,
+        spaceBefore=10,
+        fontName='Helvetica-Bold'
+    )
+
+    _styles['body'] = ParagraphStyle(
+        'CustomBody',
+        parent=base['BodyText'],
+        fontSize=11,
+        textColor=colors.HexColor('#374151'),
+        spaceAfter=12,
+        alignment=TA_JUSTIFY,
+        leading=14
+    )
+
+    _styles['cell'] = ParagraphStyle(
+        'CustomCell',
+        parent=base['BodyText'],
+        fontSize=8,
+        leading=10,
+        textColor=colors.HexColor('#1F2937')
+    )
+
+    _styles['cell_code'] = ParagraphStyle(
+        'CustomCellCode',
+        parent=_styles['cell'],
+        fontName='Courier',
+        fontSize=7,
+        leading=9
+    )
+
+    _styles['code'] = ParagraphStyle(
+        'CustomCode',
+        parent=base['BodyText'],
+        fontSize=9,
+        textColor=colors.HexColor('#1F2937'),
+        spaceAfter=10,
+        fontName='Courier',
+        leftIndent=20,
+        backColor=colors.HexColor('#F3F4F6'),
+        borderColor=colors.HexColor('#D1D5DB'),
+        borderWidth=1,
+        borderPadding=8
+    )
+    return _styles
+
+
+# Per-build state handed to every section builder
+class BuildContext(object):
+    def __init__(self, styles, sections, date=None, db_path=None, site=None):
+        self._styles = styles
+        self.sections = sections
+        self.numbers = {}
+        for section in sections:
+            if section.heading:
+                self.numbers[section.key] = len(self.numbers) + 1
+        self.date = date or datetime.now().strftime(DATE_FORMAT)
+        self.db_path = db_path
+        # Name of the zoo the document is for, when one system serves several
+        self.site = site
+
+    @property
+    def styles(self):
+        # Paragraph styles, built when a PDF is first laid out; text exports never need them
+        if self._styles is None:
+            self._styles = get_styles()
+        return self._styles
 
-# Create PDF
-pdf_path = "ZMS_Complete_Documentation.pdf"
-doc = SimpleDocTemplate(pdf_path, pagesize=letter,
-                        rightMargin=0.75*inch, leftMargin=0.75*inch,
-                        topMargin=0.75*inch, bottomMargin=0.75*inch)
-
-# Container for PDF elements
-elements = []
-
-# Define styles
-styles = getSampleStyleSheet()
-title_style = ParagraphStyle(
-    'CustomTitle',
-    parent=styles['Heading1'],
-    fontSize=28,
-    textColor=colors.HexColor('#1F2937'),
-    spaceAfter=30,
-    alignment=TA_CENTER,
-    fontName='Helvetica-Bold'
-)
-
-heading_style = ParagraphStyle(
-    'CustomHeading',
-    parent=styles['Heading2'],
-    fontSize=16,
-    textColor=colors.HexColor('#374151'),
-    spaceAfter=12,
-    spaceBefore=12,
-    fontName='Helvetica-Bold',
-    borderColor=colors.HexColor('#3B82F6'),
-    borderWidth=2,
-    borderPadding=10,
-    backColor=colors.HexColor('#EFF6FF')
-)
-
-subheading_style = ParagraphStyle(
-    'CustomSubHeading',
-    parent=styles['Heading3'],
-    fontSize=13,
-    textColor=colors.HexColor('#1F2937'),
-    spaceAfter=10,
-    spaceBefore=10,
-    fontName='Helvetica-Bold'
-)
-
-body_style = ParagraphStyle(
-    'CustomBody',
-    parent=styles['BodyText'],
-    fontSize=11,
-    textColor=colors.HexColor('#374151'),
-    spaceAfter=12,
-    alignment=TA_JUSTIFY,
-    leading=14
-)
-
-code_style = ParagraphStyle(
-    'CustomCode',
-    parent=styles['BodyText'],
-    fontSize=9,
-    textColor=colors.HexColor('#1F2937'),
-    spaceAfter=10,
-    fontName='Courier',
-    leftIndent=20,
-    backColor=colors.HexColor('#F3F4F6'),
-    borderColor=colors.HexColor('#D1D5DB'),
-    borderWidth=1,
-    borderPadding=8
-)
 
 # Title Page
-elements.append(Spacer(1, 2*inch))
-elements.append(Paragraph("Zoo Management System (ZMS)", title_style))
-elements.append(Spacer(1, 0.3*inch))
-elements.append(Paragraph("مکمل تکنیکی ڈاکومنٹیشن", title_style))
-elements.append(Spacer(1, 0.5*inch))
-elements.append(Paragraph("Document Date: {}".format(datetime.now().strftime('%d-%m-%Y')), body_style))
-elements.append(Spacer(1, 0.3*inch))
-elements.append(Paragraph("Complete Technical Documentation for Zoo Management System including Frontend, Backend, Database Architecture and Communication Flow.", body_style))
+def build_title_page(ctx):
+    return [
+        Space(2*inch),
+        Heading("Zoo Management System (ZMS)", 0),
+        Space(0.3*inch),
+        Heading("مکمل تکنیکی ڈاکومنٹیشن", 0),
+        Space(0.5*inch),
+    ] + ([Para("Site: {}".format(escape(ctx.site)))] if ctx.site else []) + [
+        Para("Document Date: {}".format(ctx.date)),
+        Space(0.3*inch),
+        Para("Complete Technical Documentation for Zoo Management System including Frontend, Backend, Database Architecture and Communication Flow."),
+    ]
 
-elements.append(PageBreak())
 
 # Table of Contents
-elements.append(Paragraph("Table of Contents", heading_style))
-elements.append(Spacer(1, 0.2*inch))
-
-toc_content = """
-1. Project Overview<br/>
-2. Technology Stack<br/>
-3. Project Architecture<br/>
-4. Database Design<br/>
-5. Backend API Endpoints<br/>
-6. Frontend Structure<br/>
-7. Frontend and Backend Communication<br/>
-8. User Flows<br/>
-9. Security<br/>
-10. Conclusion
-"""
-elements.append(Paragraph(toc_content, body_style))
-elements.append(PageBreak())
+def build_contents(ctx):
+    numbered = [section for section in ctx.sections if section.heading]
+    toc_content = "".join(
+        "{}. {}<br/>".format(i, section.title) for i, section in enumerate(numbered, 1)
+    )
+    return [
+        Heading("Table of Contents", 1),
+        Space(0.2*inch),
+        Para(toc_content),
+    ]
+
 
 # 1. Project Overview
-elements.append(Paragraph("1. PROJECT OVERVIEW", heading_style))
-elements.append(Spacer(1, 0.15*inch))
-elements.append(Paragraph("""
+def build_overview(ctx):
+    return [
+        Para("""
 Zoo Management System (ZMS) is a comprehensive web application designed to manage all operations of a zoo. It handles animal records, employee management, veterinary care, ticket sales, visitor information, and inventory management. The system serves multiple user types including zoo staff, veterinarians, and public visitors.
 <br/><br/>
 <b>Key Features:</b><br/>
@@ -124,56 +222,35 @@ Zoo Management System (ZMS) is a comprehensive web application designed to manag
 • Ticket sales and visitor tracking<br/>
 • Inventory management<br/>
 • Event planning and management
-""", body_style))
-elements.append(Spacer(1, 0.2*inch))
+"""),
+        Space(0.2*inch),
+    ]
+
 
 # 2. Technology Stack
-elements.append(Paragraph("2. TECHNOLOGY STACK", heading_style))
-elements.append(Spacer(1, 0.15*inch))
-
-tech_data = [
-    ['Layer', 'Technology', 'Version & Details'],
-    ['Frontend Framework', 'React', '18.3.1 with JSX'],
-    ['Frontend Language', 'TypeScript', '5.5.4'],
-    ['Routing', 'React Router', '6.26.2'],
-    ['Styling', 'Tailwind CSS', '3.4.17'],
-    ['Build Tool', 'Vite', '5.2.0'],
-    ['Backend Framework', 'Express.js', '4.21.1'],
-    ['Backend Runtime', 'Node.js', 'CommonJS'],
-    ['Database', 'SQLite', 'better-sqlite3 11.5.0'],
-    ['Backend Language', 'TypeScript', '5.5.4'],
-    ['CORS Handling', 'cors package', '2.8.5'],
-    ['Icons Library', 'lucide-react', '0.522.0'],
-]
+def build_tech_stack(ctx):
+    tech_data = [
+        ['Layer', 'Technology', 'Version & Details'],
+        ['Frontend Framework', 'React', '18.3.1 with JSX'],
+        ['Frontend Language', 'TypeScript', '5.5.4'],
+        ['Routing', 'React Router', '6.26.2'],
+        ['Styling', 'Tailwind CSS', '3.4.17'],
+        ['Build Tool', 'Vite', '5.2.0'],
+        ['Backend Framework', 'Express.js', '4.21.1'],
+        ['Backend Runtime', 'Node.js', 'CommonJS'],
+        ['Database', 'SQLite', 'better-sqlite3 11.5.0'],
+        ['Backend Language', 'TypeScript', '5.5.4'],
+        ['CORS Handling', 'cors package', '2.8.5'],
+        ['Icons Library', 'lucide-react', '0.522.0'],
+    ]
+
+    tech_table = Table(tech_data, 'blue', [1.8*inch, 1.8*inch, 2.2*inch])
+    return [tech_table, Space(0.2*inch)]
 
-tech_table = Table(tech_data, colWidths=[1.8*inch, 1.8*inch, 2.2*inch])
-tech_table.setStyle(TableStyle([
-    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
-    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-    ('FONTSIZE', (0, 0), (-1, 0), 10),
-    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F9FAFB')),
-    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
-    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F9FAFB')]),
-    ('FONTSIZE', (0, 1), (-1, -1), 9),
-    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ('LEFTPADDING', (0, 0), (-1, -1), 8),
-    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-    ('TOPPADDING', (0, 0), (-1, -1), 8),
-]))
-elements.append(tech_table)
-elements.append(Spacer(1, 0.2*inch))
 
 # 3. Project Architecture
-elements.append(Paragraph("3. PROJECT ARCHITECTURE", heading_style))
-elements.append(Spacer(1, 0.15*inch))
-elements.append(Paragraph("""
-<b>Directory Structure:</b>
-""", subheading_style))
-
-arch_text = """
+def build_architecture(ctx):
+    arch_text = """
 zms/ (Root Directory)<br/>
 ├── src/ (Frontend)<br/>
 │   ├── components/ (UI Components)<br/>
@@ -193,167 +270,254 @@ zms/ (Root Directory)<br/>
 ├── public/ (Static Assets)<br/>
 └── Configuration Files (package.json, tsconfig.json, etc.)
 """
-elements.append(Paragraph(arch_text, body_style))
-elements.append(Spacer(1, 0.2*inch))
+    return [
+        Heading("""
+<b>Directory Structure:</b>
+"""),
+        Para(arch_text),
+        Space(0.2*inch),
+    ]
+
 
 # 4. Database Design
-elements.append(Paragraph("4. DATABASE DESIGN", heading_style))
-elements.append(Spacer(1, 0.15*inch))
-elements.append(Paragraph("Database is SQLite with Foreign Key constraints enabled for data integrity.", subheading_style))
-elements.append(Spacer(1, 0.1*inch))
-
-db_tables = [
-    ['Table Name', 'Purpose', 'Key Columns'],
-    ['users', 'User authentication', 'id, name, email, password, role'],
-    ['animals', 'Animal records', 'id, name, species, age, gender, health_status, cage_id'],
-    ['cages', 'Cage information', 'id, name, type, capacity, occupancy, location, status'],
-    ['employees', 'Employee records', 'id, name, email, role, phone, salary, join_date'],
-    ['doctors', 'Veterinarian info', 'id, name, specialization, email, phone, availability'],
-    ['medical_checks', 'Medical checkups', 'id, animal_id, doctor_id, date, diagnosis, treatment'],
-    ['vaccinations', 'Vaccination records', 'id, animal_id, vaccine_name, date_administered, next_due_date'],
-    ['events', 'Event management', 'id, title, description, date, time, location, capacity'],
-    ['tickets', 'Ticket types', 'id, type, price, description'],
-    ['ticket_sales', 'Sales records', 'id, ticket_id, quantity, total_amount, date, visitor_name'],
-    ['visitors', 'Visitor info', 'id, name, email, phone, registration_date'],
-    ['inventory', 'Inventory items', 'id, name, category, quantity, unit, min_threshold, expiry_date'],
-]
+# Purpose of each table from backend/src/db/init.ts, used by both the static and
+# the live (introspected) variants of the section
+TABLE_PURPOSES = {
+    'zoo_info': 'Zoo profile',
+    'users': 'User authentication',
+    'animals': 'Animal records',
+    'cages': 'Cage information',
+    'employees': 'Employee records',
+    'doctors': 'Veterinarian info',
+    'medical_checks': 'Medical checkups',
+    'vaccinations': 'Vaccination records',
+    'events': 'Event management',
+    'tickets': 'Ticket types',
+    'ticket_sales': 'Sales records',
+    'visitors': 'Visitor info',
+    'inventory': 'Inventory items',
+}
+
+def build_database(ctx):
+    if ctx.db_path:
+        return build_database_live(ctx)
+
+    db_tables = [
+        ['Table Name', 'Purpose', 'Key Columns'],
+        ['zoo_info', 'Zoo profile', 'id, name, location, description, capacity, start_time, end_time'],
+        ['users', 'User authentication', 'id, name, email, password, role'],
+        ['animals', 'Animal records', 'id, name, species, age, gender, health_status, cage_id'],
+        ['cages', 'Cage information', 'id, name, type, capacity, occupancy, location, status'],
+        ['employees', 'Employee records', 'id, name, email, role, phone, salary, join_date, status'],
+        ['doctors', 'Veterinarian info', 'id, name, specialization, email, phone, availability, experience'],
+        ['medical_checks', 'Medical checkups', 'id, animal_id, doctor_id, date, diagnosis, treatment'],
+        ['vaccinations', 'Vaccination records', 'id, animal_id, vaccine_name, date_administered, next_due_date'],
+        ['events', 'Event management', 'id, title, description, date, time, location, capacity'],
+        ['tickets', 'Ticket types', 'id, type, price, description'],
+        ['ticket_sales', 'Sales records', 'id, ticket_id, quantity, total_amount, date, visitor_name'],
+        ['visitors', 'Visitor info', 'id, name, email, phone, registration_date'],
+        ['inventory', 'Inventory items', 'id, name, category, quantity, unit, min_threshold, expiry_date'],
+    ]
+
+    db_table = Table(db_tables, 'green', [1.3*inch, 1.7*inch, 2.8*inch], compact=True)
+    return [
+        Heading("Database is SQLite with Foreign Key constraints enabled for data integrity."),
+        Space(0.1*inch),
+        db_table,
+        Space(0.2*inch),
+    ]
+
+
+def _format_size(size):
+    if size is None:
+        return '-'
+    if size >= 1024 * 1024:
+        return '{:.1f} MB'.format(size / (1024 * 1024))
+    return '{:.1f} KB'.format(size / 1024)
+
+
+def build_database_live(ctx):
+
+    tables = introspect_database(ctx.db_path)
+    has_usage = any(table.pages is not None for table in tables)
+
+    header = ['Table Name', 'Purpose', 'Columns', 'Rows']
+    if has_usage:
+        header.append('Pages / Size')
+    rows = [header]
+    fk_rows = [['Table', 'Column', 'References']]
+    for table in tables:
+        fk_columns = {fk.column for fk in table.foreign_keys}
+        names = []
+        for column in table.columns:
+            name = column.name
+            if column.pk:
+                name = '<b>{}</b>'.format(name)
+            elif column.name in fk_columns:
+                name = '<i>{}</i>'.format(name)
+            names.append(name)
+        row = [table.name, TABLE_PURPOSES.get(table.name, ''),
+               Para(', '.join(names), 'cell'), '{:,}'.format(table.row_count)]
+        if has_usage:
+            row.append('{} / {}'.format(table.pages, _format_size(table.size_bytes)))
+        rows.append(row)
+        for fk in table.foreign_keys:
+            fk_rows.append([table.name, fk.column, '{}({})'.format(fk.table, fk.ref_column)])
+
+    db_table = Table(rows, 'green', compact=True, right_align=tuple(range(3, len(header))))
+    elements = [
+        Heading("Database is SQLite with Foreign Key constraints enabled for data integrity."),
+        Para("Introspected from <b>{}</b>: {} tables, {:,} rows. Primary keys in bold, foreign keys in italics.".format(
+            os.path.basename(ctx.db_path), len(tables), sum(table.row_count for table in tables))),
+        Space(0.1*inch),
+        db_table,
+        Space(0.2*inch),
+    ]
+    if len(fk_rows) > 1:
+        fk_table = Table(fk_rows, 'green', [1.8*inch, 1.8*inch, 2.2*inch], compact=True)
+        elements += [Heading("Foreign Keys"), fk_table, Space(0.2*inch)]
+    return elements
 
-db_table = Table(db_tables, colWidths=[1.3*inch, 1.7*inch, 2.8*inch])
-db_table.setStyle(TableStyle([
-    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10B981')),
-    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-    ('FONTSIZE', (0, 0), (-1, 0), 9),
-    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F0FDF4')),
-    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#D1FAE5')),
-    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0FDF4')]),
-    ('FONTSIZE', (0, 1), (-1, -1), 8),
-    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ('LEFTPADDING', (0, 0), (-1, -1), 6),
-    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-    ('TOPPADDING', (0, 0), (-1, -1), 6),
-]))
-elements.append(db_table)
-elements.append(Spacer(1, 0.2*inch))
-
-elements.append(PageBreak())
 
 # 5. Backend API Endpoints
-elements.append(Paragraph("5. BACKEND API ENDPOINTS", heading_style))
-elements.append(Spacer(1, 0.15*inch))
-
-elements.append(Paragraph("A. Authentication Endpoints", subheading_style))
-api_auth_data = [
-    ['Method', 'Endpoint', 'Purpose'],
-    ['POST', '/api/auth/register', 'Register new user'],
-    ['POST', '/api/auth/login', 'User login'],
-]
-auth_table = Table(api_auth_data, colWidths=[0.9*inch, 2.3*inch, 2.3*inch])
-auth_table.setStyle(TableStyle([
-    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7C3AED')),
-    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-    ('FONTSIZE', (0, 0), (-1, 0), 10),
-    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DDD6FE')),
-    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FAF5FF')]),
-    ('FONTSIZE', (0, 1), (-1, -1), 9),
-]))
-elements.append(auth_table)
-elements.append(Spacer(1, 0.1*inch))
-
-elements.append(Paragraph("B. Animal Endpoints", subheading_style))
-api_animals_data = [
-    ['GET', '/api/animals', 'Get all animals'],
-    ['POST', '/api/animals', 'Add new animal'],
-    ['PUT', '/api/animals/:id', 'Update animal'],
-    ['DELETE', '/api/animals/:id', 'Delete animal'],
-]
-animals_table = Table(api_animals_data, colWidths=[0.9*inch, 2.3*inch, 2.3*inch])
-animals_table.setStyle(TableStyle([
-    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F59E0B')),
-    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#FED7AA')),
-    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FFFBEB')]),
-    ('FONTSIZE', (0, 1), (-1, -1), 9),
-]))
-elements.append(animals_table)
-elements.append(Spacer(1, 0.1*inch))
-
-elements.append(Paragraph("C. Other Core Endpoints", subheading_style))
-other_endpoints = """
-<b>Cages:</b> GET /api/cages, POST /api/cages, PUT /api/cages/:id, DELETE /api/cages/:id<br/>
-<b>Employees:</b> GET /api/employees, POST /api/employees, PUT /api/employees/:id, DELETE /api/employees/:id<br/>
-<b>Doctors:</b> GET /api/doctors, POST /api/doctors, PUT /api/doctors/:id, DELETE /api/doctors/:id<br/>
-<b>Vaccinations:</b> GET /api/vaccinations, POST /api/vaccinations, PUT /api/vaccinations/:id, DELETE /api/vaccinations/:id<br/>
-<b>Medical Checks:</b> GET /api/medical-checks, POST /api/medical-checks, PUT /api/medical-checks/:id, DELETE /api/medical-checks/:id<br/>
-<b>Events:</b> GET /api/events, POST /api/events, PUT /api/events/:id, DELETE /api/events/:id<br/>
-<b>Tickets:</b> GET /api/tickets, POST /api/tickets, PUT /api/tickets/:id, DELETE /api/tickets/:id<br/>
-<b>Ticket Sales:</b> GET /api/ticket-sales, POST /api/ticket-sales<br/>
-<b>Visitors:</b> GET /api/visitors, POST /api/visitors<br/>
-<b>Inventory:</b> GET /api/inventory, POST /api/inventory, PUT /api/inventory/:id, DELETE /api/inventory/:id<br/>
-<b>Health Check:</b> GET /api/health
-"""
-elements.append(Paragraph(other_endpoints, body_style))
+# Generated from the app.get/post/put/delete registrations in backend/src/index.ts
+RESOURCE_LABELS = {
+    'auth': 'Authentication',
+    'health': 'Health Check',
+}
+
+TABLE_PALETTE_CYCLE = ['purple', 'amber', 'blue', 'green']
+
+
+def build_api(ctx):
+    elements = []
+    groups = group_routes(load_routes(SERVER_PATH))
+    for i, (resource, routes) in enumerate(groups.items()):
+        label = RESOURCE_LABELS.get(resource, resource.replace('-', ' ').title())
+        elements.append(Heading("{}. {} Endpoints".format(chr(ord('A') + i), label)))
+        rows = [['Method', 'Endpoint', 'SQL']]
+        for route in routes:
+            sql = '<br/>'.join(escape(statement) for statement in route.sql) or '-'
+            rows.append([route.method, route.path, Para(sql, 'cell_code')])
+        elements.append(Table(rows, TABLE_PALETTE_CYCLE[i % len(TABLE_PALETTE_CYCLE)]))
+        elements.append(Space(0.1*inch))
+    return elements
 
-elements.append(PageBreak())
 
 # 6. Frontend Structure
-elements.append(Paragraph("6. FRONTEND STRUCTURE", heading_style))
-elements.append(Spacer(1, 0.15*inch))
-
-elements.append(Paragraph("A. Main Pages", subheading_style))
-pages_text = """
-<b>Public Pages:</b><br/>
-• LandingPage - Main zoo homepage<br/>
-• RegisterPage - New user registration<br/>
-• LoginPage - User login<br/>
-• EventsPage - Events listing<br/>
-• TicketPurchasePage - Ticket booking<br/>
-<br/>
-<b>Staff Pages (Protected):</b><br/>
-• DashboardPage - Staff dashboard<br/>
-• AnimalsPage - Animal management<br/>
-• CagesPage - Cage management<br/>
-• EmployeesPage - Employee management<br/>
-• DoctorsPage - Veterinarian management<br/>
-• MedicalChecksPage - Medical records<br/>
-• VaccinationsPage - Vaccination records<br/>
-• SalariesPage - Salary management<br/>
-• InventoryPage - Inventory management<br/>
-• TicketSalesPage - Sales tracking<br/>
-• EventManagementPage - Event management<br/>
-• VisitorsPage - Visitor records
-"""
-elements.append(Paragraph(pages_text, body_style))
-elements.append(Spacer(1, 0.15*inch))
-
-elements.append(Paragraph("B. UI Components", subheading_style))
-components_text = """
-<b>Basic Components:</b> Button, Input, Select, Modal, Table, Card, Badge, StatCard, Navbar, FeatureCard<br/>
-<b>Special Components:</b> ProtectedRoute (for access control), AnimalShape (custom SVG)
-"""
-elements.append(Paragraph(components_text, body_style))
-elements.append(Spacer(1, 0.15*inch))
-
-elements.append(Paragraph("C. State Management", subheading_style))
-state_text = """
+# What each page is for, by component name; the list itself is scanned from src/
+PAGE_PURPOSES = {
+    'LandingPage': 'Main zoo homepage',
+    'RegisterPage': 'New user registration',
+    'LoginPage': 'User login',
+    'EventsPage': 'Events listing',
+    'TicketPurchasePage': 'Ticket booking',
+    'TicketsPage': 'Ticket type management',
+    'DashboardPage': 'Staff dashboard',
+    'AnimalsPage': 'Animal management',
+    'CagesPage': 'Cage management',
+    'EmployeesPage': 'Employee management',
+    'DoctorsPage': 'Veterinarian management',
+    'MedicalChecksPage': 'Medical records',
+    'VaccinationsPage': 'Vaccination records',
+    'SalariesPage': 'Salary management',
+    'InventoryPage': 'Inventory management',
+    'TicketSalesPage': 'Sales tracking',
+    'EventManagementPage': 'Event management',
+    'VisitorsPage': 'Visitor records',
+}
+
+COMPONENT_NOTES = {
+    'ProtectedRoute': 'access control',
+    'AnimalShape': 'custom SVG',
+}
+
+
+def _module_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _kb(size):
+    return '{:.1f} KB'.format(size / 1024.0)
+
+
+def build_frontend(ctx):
+    inventory = build_inventory(FRONTEND_SRC_DIR)
+    elements = []
+
+    elements.append(Heading("A. Main Pages"))
+    elements.append(Para(
+        "Scanned from <b>src/</b>: {} source files, {} pages, {} routes in App.tsx. <i>Bundle</i> is the page plus "
+        "every src/ module it imports, directly or indirectly; npm packages are not included.".format(
+            len(inventory.files), len(inventory.pages), len(inventory.routes))))
+    rows = [['Page', 'Purpose', 'Route', 'Size', 'Bundle']]
+    for page in sorted(inventory.pages, key=lambda page: (not page.routes, page.routes[0].path if page.routes else page.path)):
+        name = _module_name(page.path)
+        if page.routes:
+            route = ', '.join(route.path + (' (staff)' if route.protected else '') for route in page.routes)
+        elif page.imported_by:
+            route = 'inside ' + ', '.join(_module_name(path) for path in page.imported_by)
+        else:
+            route = 'not routed'
+        rows.append([Para(escape(page.path), 'cell_code'),
+                     PAGE_PURPOSES.get(name, ''), route, _kb(page.size),
+                     '{} ({} files)'.format(_kb(page.bundle_size), page.modules)])
+    elements.append(Table(rows, 'blue', [1.9*inch, 1.4*inch, 1.3*inch, 0.6*inch, 1.0*inch],
+                          compact=True, right_align=(3, 4)))
+    elements.append(Space(0.15*inch))
+
+    elements.append(Heading("B. UI Components"))
+    components = [source for source in inventory.files if source.path.startswith('components/')]
+    basic = [_module_name(source.path) for source in components if source.path.startswith('components/ui/')]
+    special = ['{} ({})'.format(_module_name(source.path), COMPONENT_NOTES[_module_name(source.path)])
+               if _module_name(source.path) in COMPONENT_NOTES else _module_name(source.path)
+               for source in components if not source.path.startswith('components/ui/')]
+    elements.append(Para("<b>Basic Components (components/ui):</b> {}<br/><b>Other Components:</b> {}".format(
+        ", ".join(basic) or '-', ", ".join(special) or '-')))
+    elements.append(Space(0.15*inch))
+
+    elements.append(Heading("C. State Management"))
+    state_text = """
 <b>AuthContext:</b> Manages user authentication state globally. Provides user information, login/logout functions to all components. Enables ProtectedRoute to restrict access.
 """
-elements.append(Paragraph(state_text, body_style))
+    elements.append(Para(state_text))
+    elements.append(Space(0.15*inch))
+
+    elements.append(Heading("D. API Requests on Page Load"))
+    loading = [page for page in inventory.pages if page.load_calls]
+    elements.append(Para(
+        "Requests each page sends when it mounts, found by following its useEffect hooks into the local "
+        "functions they call. Every request is a separate round trip before the page can render its data; "
+        "pages with {} or more are marked, and requests not grouped in one Promise.all() wait for each "
+        "other.".format(MANY_FETCHES)))
+    rows = [['Page', 'Requests', 'Endpoints', 'Issued']]
+    for page in sorted(loading, key=lambda page: (-len(page.load_calls), page.path)):
+        endpoints = []
+        for name in page.load_calls:
+            function = inventory.api.get(name)
+            endpoints.append(escape('{} {}'.format(function.method, function.path) if function else 'api.' + name))
+        many = len(page.load_calls) >= MANY_FETCHES
+        if len(page.load_calls) == 1:
+            issued = '-'
+        else:
+            issued = 'at once' if page.parallel else 'one after another'
+        rows.append([Para(('<b>{}</b>' if many else '{}').format(escape(page.path)), 'cell_code'),
+                     ('{} (many)' if many else '{}').format(len(page.load_calls)),
+                     Para('<br/>'.join(endpoints), 'cell_code'), issued])
+    elements.append(Table(rows, 'amber', [1.9*inch, 0.9*inch, 2.5*inch, 1.1*inch], compact=True, right_align=(1,)))
+    return elements
+
+
+def _frontend_input(ctx):
+    return frontend_signature(FRONTEND_SRC_DIR)
 
-elements.append(PageBreak())
 
 # 7. Frontend and Backend Communication
-elements.append(Paragraph("7. FRONTEND AND BACKEND COMMUNICATION", heading_style))
-elements.append(Spacer(1, 0.15*inch))
+def build_communication(ctx):
+    elements = []
 
-elements.append(Paragraph("Communication Protocol", subheading_style))
-comm_text = """
+    elements.append(Heading("Communication Protocol"))
+    comm_text = """
 Frontend communicates with Backend via HTTP REST API. The api.ts utility file contains all API functions. Communication flow:
 
 1. User interacts with React component
@@ -367,11 +531,11 @@ Frontend communicates with Backend via HTTP REST API. The api.ts utility file co
 Base URL: http://localhost:3001/api
 Default Port: 3001 (configurable via PORT env variable)
 """
-elements.append(Paragraph(comm_text, body_style))
-elements.append(Spacer(1, 0.1*inch))
+    elements.append(Para(comm_text))
+    elements.append(Space(0.1*inch))
 
-elements.append(Paragraph("Data Flow Example - Getting Animals", subheading_style))
-flow_example = """
+    elements.append(Heading("Data Flow Example - Getting Animals"))
+    flow_example = """
 Frontend Request:
 fetch('http://localhost:3001/api/animals', {
   method: 'GET',
@@ -390,11 +554,11 @@ Response:
   { id: 'ani-2', name: 'Ella', species: 'Elephant', ... }
 ]
 """
-elements.append(Paragraph(flow_example, code_style))
-elements.append(Spacer(1, 0.15*inch))
+    elements.append(Code(flow_example))
+    elements.append(Space(0.15*inch))
 
-elements.append(Paragraph("CORS and Middleware", subheading_style))
-cors_text = """
+    elements.append(Heading("CORS and Middleware"))
+    cors_text = """
 Backend enables CORS to allow cross-origin requests from frontend. Middleware components:
 • cors() - Enables cross-origin requests
 • express.json() - Parses JSON request bodies
@@ -402,19 +566,19 @@ Backend enables CORS to allow cross-origin requests from frontend. Middleware co
 • Error handlers - Returns appropriate error responses
 
 Data Mapping:
-Frontend uses camelCase (firstName), Database uses snake_case (first_name). 
+Frontend uses camelCase (firstName), Database uses snake_case (first_name).
 mapper.ts utility converts between formats automatically.
 """
-elements.append(Paragraph(cors_text, body_style))
+    elements.append(Para(cors_text))
+    return elements
 
-elements.append(PageBreak())
 
 # 8. User Flows
-elements.append(Paragraph("8. USER FLOWS", heading_style))
-elements.append(Spacer(1, 0.15*inch))
+def build_user_flows(ctx):
+    elements = []
 
-elements.append(Paragraph("Flow 1: User Registration", subheading_style))
-flow1_text = """
+    elements.append(Heading("Flow 1: User Registration"))
+    flow1_text = """
 1. User opens RegisterPage
 2. Enters name, email, password, and role
 3. Clicks submit button
@@ -424,11 +588,11 @@ flow1_text = """
 7. Success response returned
 8. User redirected to login page
 """
-elements.append(Paragraph(flow1_text, body_style))
-elements.append(Spacer(1, 0.1*inch))
+    elements.append(Para(flow1_text))
+    elements.append(Space(0.1*inch))
 
-elements.append(Paragraph("Flow 2: User Login", subheading_style))
-flow2_text = """
+    elements.append(Heading("Flow 2: User Login"))
+    flow2_text = """
 1. User opens LoginPage
 2. Enters email and password
 3. Clicks login button
@@ -439,11 +603,11 @@ flow2_text = """
 8. Frontend stores in AuthContext
 9. User redirected to dashboard
 """
-elements.append(Paragraph(flow2_text, body_style))
-elements.append(Spacer(1, 0.1*inch))
+    elements.append(Para(flow2_text))
+    elements.append(Space(0.1*inch))
 
-elements.append(Paragraph("Flow 3: Adding Animal", subheading_style))
-flow3_text = """
+    elements.append(Heading("Flow 3: Adding Animal"))
+    flow3_text = """
 1. Staff opens AnimalsPage
 2. Clicks "Add Animal" button
 3. Modal opens with form
@@ -456,11 +620,11 @@ flow3_text = """
 10. Response returns new animal
 11. Frontend adds to list and refreshes display
 """
-elements.append(Paragraph(flow3_text, body_style))
-elements.append(Spacer(1, 0.1*inch))
+    elements.append(Para(flow3_text))
+    elements.append(Space(0.1*inch))
 
-elements.append(Paragraph("Flow 4: Ticket Purchase", subheading_style))
-flow4_text = """
+    elements.append(Heading("Flow 4: Ticket Purchase"))
+    flow4_text = """
 1. Visitor opens TicketPurchasePage
 2. Selects ticket type and quantity
 3. Enters personal information
@@ -472,16 +636,16 @@ flow4_text = """
 9. Response returns confirmation
 10. Frontend displays confirmation with details
 """
-elements.append(Paragraph(flow4_text, body_style))
+    elements.append(Para(flow4_text))
+    return elements
 
-elements.append(PageBreak())
 
 # 9. Security
-elements.append(Paragraph("9. SECURITY MEASURES", heading_style))
-elements.append(Spacer(1, 0.15*inch))
+def build_security(ctx):
+    elements = []
 
-elements.append(Paragraph("Current Security Features", subheading_style))
-security_text = """
+    elements.append(Heading("Current Security Features"))
+    security_text = """
 ✓ Role-based Access Control (RBAC) - Different users have different permissions
 ✓ ProtectedRoute Component - Restricts unauthorized access to staff pages
 ✓ CORS Configuration - Controls which origins can access API
@@ -490,11 +654,11 @@ security_text = """
 ✓ HTTP Methods - Proper use of GET, POST, PUT, DELETE
 ✓ Error handling - Server returns appropriate error codes
 """
-elements.append(Paragraph(security_text, body_style))
-elements.append(Spacer(1, 0.15*inch))
+    elements.append(Para(security_text))
+    elements.append(Space(0.15*inch))
 
-elements.append(Paragraph("Recommended Security Improvements", subheading_style))
-improvement_text = """
+    elements.append(Heading("Recommended Security Improvements"))
+    improvement_text = """
 ⚠️ CRITICAL IMPROVEMENTS NEEDED:
 
 1. PASSWORD HASHING: Use bcrypt instead of plain-text passwords
@@ -528,15 +692,13 @@ improvement_text = """
    - Current: Basic logging only
    - Recommended: Complete audit trail
 """
-elements.append(Paragraph(improvement_text, body_style))
+    elements.append(Para(improvement_text))
+    return elements
 
-elements.append(PageBreak())
 
 # 10. Conclusion
-elements.append(Paragraph("10. CONCLUSION AND SUMMARY", heading_style))
-elements.append(Spacer(1, 0.15*inch))
-
-conclusion_text = """
+def build_conclusion(ctx):
+    conclusion_text = """
 Zoo Management System is a modern, scalable web application built with React, Express, and SQLite. It successfully demonstrates:
 
 ✓ Full-stack development capabilities
@@ -549,10 +711,10 @@ Zoo Management System is a modern, scalable web application built with React, Ex
 
 The application serves multiple user types with appropriate access levels and provides comprehensive management tools for zoo operations including animal care, staff management, inventory control, and visitor services.
 """
-elements.append(Paragraph(conclusion_text, body_style))
-elements.append(Spacer(1, 0.2*inch))
-
-elements.append(Paragraph("""
+    return [
+        Para(conclusion_text),
+        Space(0.2*inch),
+        Para("""
 <b>System Performance:</b><br/>
 • Frontend: React with Vite for fast development/builds<br/>
 • Backend: Express on Node.js for high performance<br/>
@@ -576,28 +738,1231 @@ Generated: {}<br/>
 Version: 1.0<br/>
 Status: Complete and Current<br/>
 Last Updated: {}
-""".format(datetime.now().strftime("%d-%m-%Y"), datetime.now().strftime("%d-%m-%Y")), body_style))
-
-# Build PDF
-doc.build(elements)
-pdf_size = os.path.getsize(pdf_path) / 1024
-print("\n" + "="*60)
-print("✓ PDF DOCUMENTATION GENERATED SUCCESSFULLY!")
-print("="*60)
-print(f"📄 File Name: {pdf_path}")
-print(f"📊 File Size: {pdf_size:.2f} KB")
-print(f"📝 Total Pages: 10+")
-print(f"📍 Location: {os.getcwd()}")
-print("="*60)
-print("\nDocumentation Contents:")
-print("  1. Project Overview")
-print("  2. Technology Stack")
-print("  3. Project Architecture")
-print("  4. Database Design (13 tables)")
-print("  5. Backend API Endpoints")
-print("  6. Frontend Structure")
-print("  7. Communication Protocol")
-print("  8. User Flows (4 examples)")
-print("  9. Security Analysis")
-print("  10. Conclusion & Future Enhancements")
-print("="*60)
+""".format(ctx.date, ctx.date)),
+    ]
+
+
+# Operational Analytics (needs a database)
+def _money(value):
+    return '{:,.2f}'.format(value or 0)
+
+
+def _percent(value):
+    return '-' if value is None else '{:.1f}%'.format(value * 100)
+
+
+def build_analytics(ctx):
+    data = compute_analytics(ctx.db_path)
+    totals = data.totals
+    elements = []
+
+    elements.append(Heading("Key Figures"))
+    summary = [
+        ['Metric', 'Value'],
+        ['Ticket revenue', _money(totals['revenue'])],
+        ['Tickets sold', '{:,}'.format(totals['tickets'] or 0)],
+        ['Sales recorded', '{:,}'.format(totals['sales'])],
+        ['Days with sales', '{:,}'.format(totals['days'])],
+        ['Visitors registered', '{:,}'.format(totals['visitors'])],
+        ['Average daily revenue', _money(totals['revenue'] / totals['days'] if totals['days'] else 0)],
+        ['Animals housed / cage capacity', '{:,} / {:,} ({})'.format(totals['housed'], totals['capacity'], _percent(totals['utilization']))],
+        ['Cages over capacity', '{:,}'.format(totals['over_capacity'])],
+    ]
+    elements.append(Table(summary, 'blue', [3.0*inch, 2.8*inch]))
+    elements.append(Space(0.15*inch))
+
+    if data.daily:
+        elements.append(Heading("Daily Revenue"))
+        elements.append(Chart('line', [day for day, _, _, _ in data.daily], [revenue or 0 for _, revenue, _, _ in data.daily]))
+    if data.weekly:
+        recent = data.weekly[-12:]
+        elements.append(Heading("Weekly Revenue (last {} weeks)".format(len(recent))))
+        elements.append(Chart('bar', [week for week, _, _ in recent], [revenue or 0 for _, revenue, _ in recent]))
+        rows = [['Week', 'Revenue', 'Tickets']] + [[week, _money(revenue), '{:,}'.format(tickets or 0)]
+                                                   for week, revenue, tickets in recent]
+        elements.append(Table(rows, 'green', compact=True))
+        elements.append(Space(0.15*inch))
+
+    if data.visitors:
+        recent = data.visitors[-12:]
+        elements.append(Heading("New Visitors (last {} weeks)".format(len(recent))))
+        elements.append(Chart('bar', [week for week, _ in recent], [count for _, count in recent]))
+
+    if data.ticket_types:
+        elements.append(Heading("Revenue by Ticket Type"))
+        rows = [['Ticket Type', 'Sales', 'Tickets', 'Revenue', 'Share']]
+        for ticket_type, sales, quantity, revenue in data.ticket_types:
+            share = (revenue or 0) / totals['revenue'] if totals['revenue'] else None
+            rows.append([ticket_type, '{:,}'.format(sales), '{:,}'.format(quantity or 0), _money(revenue), _percent(share)])
+        elements.append(Table(rows, 'purple'))
+        elements.append(Space(0.15*inch))
+
+    if data.cages:
+        busiest = sorted(data.cages, key=lambda cage: cage.ratio or 0, reverse=True)[:20]
+        elements.append(Heading("Cage Occupancy ({} busiest of {:,})".format(len(busiest), len(data.cages))))
+        rows = [['Cage', 'Type', 'Capacity', 'Recorded', 'Animals', 'Utilization']]
+        for cage in busiest:
+            rows.append([cage.name, cage.type or '', '{:,}'.format(cage.capacity or 0), '{:,}'.format(cage.recorded or 0),
+                         '{:,}'.format(cage.animals), _percent(cage.ratio)])
+        elements.append(Table(rows, 'amber', compact=True))
+        elements.append(Para("<i>Recorded</i> is cages.occupancy; <i>Animals</i> counts animals assigned to the cage.", 'cell'))
+        elements.append(Space(0.15*inch))
+
+    if data.health:
+        elements.append(Heading("Animal Health Status"))
+        elements.append(Chart('pie', [status for status, _ in data.health], [count for _, count in data.health]))
+        rows = [['Health Status', 'Animals', 'Share']] + [
+            [status, '{:,}'.format(count), _percent(count / totals['animals'] if totals['animals'] else None)]
+            for status, count in data.health]
+        elements.append(Table(rows, 'green', compact=True))
+    return elements
+
+
+# Performance (optional): results of a load_test.py run against the backend
+def _ms(value):
+    return '{:,.2f}'.format(value) if value is not None else '-'
+
+
+def build_performance(ctx):
+    from load_test import DEFAULT_RESULTS_PATH as LOAD_RESULTS_PATH, distribution, load_results
+    if not os.path.exists(LOAD_RESULTS_PATH):
+        return [Para("No load test results yet. Start the backend against a local PostgreSQL and run "
+                     "<b>python load_test.py</b>; this section reads the <b>load_test.json</b> it writes.")]
+    results = load_results(LOAD_RESULTS_PATH)
+    meta, totals = results['meta'], results['totals']
+    load = "{} concurrent requests".format(meta['concurrency'])
+    if meta.get('rate'):
+        load += " at a fixed {:g} requests/s".format(meta['rate'])
+    elements = [Para(
+        "Load test of <b>{}</b> on {}: {} over {} keep-alive connections for {:.1f}s. "
+        "Latencies are in milliseconds, read from HDR-style histograms with about 1% precision{}.".format(
+            escape(meta['url']), meta['timestamp'].replace('T', ' '), load, meta['connections'], totals['elapsed'],
+            "; with a fixed arrival rate they include time spent waiting to be sent" if meta.get('rate') else ""))]
+
+    rows = [['Endpoint', 'Requests', 'Errors', 'Req/s', 'p50', 'p95', 'p99', 'Max']]
+    for entry in results['endpoints'] + [dict(totals, method='All', path='')]:
+        latency = entry['latency_ms']
+        rows.append(['{} {}'.format(entry['method'], entry['path']).strip(), '{:,}'.format(entry['requests']),
+                     '{:,}'.format(entry['errors']), '{:,.1f}'.format(entry['throughput'])]
+                    + [_ms(latency.get(name)) for name in ('p50', 'p95', 'p99', 'max')])
+    elements.append(Table(rows, 'blue', [2.0*inch, 0.75*inch, 0.6*inch, 0.6*inch] + [0.6*inch] * 4,
+                          right_align=tuple(range(1, 8))))
+    elements.append(Space(0.15*inch))
+
+    for entry in results['endpoints']:
+        bins = distribution(entry['histogram'])
+        if not bins:
+            continue
+        elements.append(Heading("Latency Distribution: {} {}".format(entry['method'], entry['path'])))
+        elements.append(Chart('bar', ['{} ms'.format(label) for label, _ in bins], [count for _, count in bins]))
+        if entry['errors']:
+            failures = ["HTTP {}: {:,}".format(status, count) for status, count in entry['statuses'].items()
+                        if int(status) >= 400]
+            failures += ["{}: {:,}".format(name, count) for name, count in entry['failures'].items()]
+            elements.append(Para("Errors: {}.".format(", ".join(failures)), 'cell'))
+        elements.append(Space(0.15*inch))
+    return elements
+
+
+def _performance_input(ctx):
+    from load_test import DEFAULT_RESULTS_PATH as LOAD_RESULTS_PATH
+    return source_signature(LOAD_RESULTS_PATH) if os.path.exists(LOAD_RESULTS_PATH) else None
+
+
+# Query Performance (needs a database): index advice for the server's SQL
+QUERY_KINDS = [
+    ('scan', 'Filtered full-table scan'),
+    ('fk', 'Foreign key check scan'),
+    ('full', 'Whole-table read (list or aggregate)'),
+    ('indexed', 'Index or primary key lookup'),
+    ('write', 'Insert'),
+    ('error', 'Not runnable on SQLite'),
+]
+
+
+def build_query_performance(ctx):
+    advice = analyse_queries(ctx.db_path, SERVER_PATH)
+    findings = advice.findings
+    statements = len({(finding.method, finding.path, finding.sql) for finding in findings})
+    elements = [Para(
+        "Each of the {} SQL statements in <b>backend/src/index.ts</b> was run through EXPLAIN QUERY PLAN against a copy of "
+        "<b>{}</b> ({:,} rows). Timings are the best of {} runs of the statement, each rolled back, before and "
+        "after the recommended indexes were created on the copy.".format(
+            statements, os.path.basename(ctx.db_path),
+            sum(advice.rows.values()), ADVISOR_REPEAT))]
+
+    rows = [['Query Plan', 'Statements']]
+    for kind, label in QUERY_KINDS:
+        count = sum(1 for finding in findings if finding.kind == kind)
+        if count:
+            rows.append([label, str(count)])
+    elements.append(Table(rows, 'blue', [3.5*inch, 1.2*inch], right_align=(1,)))
+    elements.append(Space(0.15*inch))
+
+    flagged = [finding for finding in findings if finding.index]
+    elements.append(Heading("Recommended Indexes"))
+    if not flagged:
+        elements.append(Para("No statement scans a table that an index would help with."))
+    else:
+        rows = [['Endpoint', 'Index', 'Before', 'After', 'Speed-up']]
+        for finding in flagged:
+            speedup = finding.before / finding.after if finding.after else None
+            rows.append(['{} {}'.format(finding.method, finding.path),
+                         Para("{};<br/><i>{}</i>".format(escape(finding.index), escape('; '.join(finding.plan))), 'cell_code'),
+                         '{:.3f} ms'.format(finding.before), '{:.3f} ms'.format(finding.after),
+                         '{:.0f}x'.format(speedup) if speedup else '-'])
+        elements.append(Table(rows, 'amber', [1.5*inch, 2.9*inch, 0.75*inch, 0.75*inch, 0.6*inch],
+                              compact=True, right_align=(2, 3, 4)))
+        elements.append(Para("To apply them:", 'cell'))
+        elements.append(Code(";\n".join(advice.indexes) + ";"))
+    elements.append(Space(0.15*inch))
+
+    full = [finding for finding in findings
+            if finding.kind == 'full' and finding.table and ' LIMIT ' not in finding.sql.upper()]
+    if full:
+        elements.append(Heading("Whole-Table Reads"))
+        elements.append(Para("These read every row of their table on each request; an index can't help, "
+                             "so their cost grows with the table. They need pagination or pre-aggregated totals."))
+        rows = [['Endpoint', 'Statement', 'Rows']]
+        for finding in full:
+            rows.append(['{} {}'.format(finding.method, finding.path), Para(escape(finding.sql), 'cell_code'),
+                         '{:,}'.format(advice.rows.get(finding.table, 0))])
+        elements.append(Table(rows, 'green', [1.8*inch, 3.3*inch, 0.9*inch], compact=True, right_align=(2,)))
+    return elements
+
+
+# Clinical Search Digest (optional): what the full-text index (see
+# search_index.py) finds for recurring clinical topics. Queries are FTS5
+# syntax; words are stemmed, so "infection" also finds "infected".
+SEARCH_TOPICS = [
+    ('Infections', 'infection OR antibiotics'),
+    ('Wounds and lameness', 'wound OR limp OR fracture OR injury'),
+    ('Parasites', 'parasites OR deworming'),
+    ('Dental', 'dental OR teeth'),
+    ('Weight and appetite', 'weight OR appetite OR diet'),
+    ('Respiratory', 'respiratory'),
+    ('Hydration', 'hydration OR dehydrated'),
+]
+SEARCH_HITS_PER_TOPIC = 3
+
+
+def _snippet(text):
+    # Markers can't be Paragraph markup before the text around them is escaped
+    return escape(text).replace('\x02', '<b>').replace('\x03', '</b>')
+
+
+def build_search_digest(ctx):
+    index = SearchIndex(ctx.db_path)
+    try:
+        refreshed = index.refresh()
+        counts = [(topic, query, index.counts(query, raw=True)) for topic, query in SEARCH_TOPICS]
+        pages = {topic: index.search(query, per_page=SEARCH_HITS_PER_TOPIC, raw=True, markers=('\x02', '\x03'))
+                 for topic, query, found in counts if found}
+    finally:
+        index.close()
+    elements = [Para(
+        "Medical check diagnoses and treatments, animal notes, vaccine names and inventory items of <b>{}</b> are "
+        "held in a full-text index ({:,} entries) that is updated incrementally from the database. Matches are "
+        "ranked by BM25; the same index answers ad hoc searches with "
+        "<b>python search_index.py WORDS</b>.".format(
+            os.path.basename(ctx.db_path), refreshed.entries))]
+
+    rows = [['Topic', 'Query'] + [name.capitalize() for name in SEARCH_SOURCES] + ['Total']]
+    for topic, query, found in counts:
+        rows.append([topic, Para(escape(query), 'cell_code')] + ['{:,}'.format(found.get(name, 0)) for name in SEARCH_SOURCES]
+                    + ['{:,}'.format(sum(found.values()))])
+    elements.append(Table(rows, 'purple', [1.4*inch, 1.6*inch, 0.7*inch, 0.7*inch, 0.9*inch, 0.7*inch, 0.6*inch],
+                          compact=True, right_align=(2, 3, 4, 5, 6)))
+    elements.append(Space(0.15*inch))
+
+    if pages:
+        elements.append(Heading("Best Matches per Topic"))
+        rows = [['Topic', 'Record', 'Match']]
+        for topic, _, _ in counts:
+            for hit in pages.get(topic, SearchPage(topic, 0, 1, 0, [])).hits:
+                rows.append([topic, Para("{} {}<br/>{}".format(hit.source, escape(hit.ref or ''), escape(hit.title or '')), 'cell'),
+                             Para(_snippet(hit.snippet), 'cell')])
+        elements.append(Table(rows, 'blue', [1.4*inch, 2.2*inch, 3.0*inch], compact=True))
+    else:
+        elements.append(Para("None of the topics matched any record."))
+    return elements
+
+
+# Vaccination Schedule (optional): overdue and upcoming vaccinations from
+# vaccination_schedule.py, as of the document date, grouped by cage
+SCHEDULE_DAYS = 30
+SCHEDULE_CAGES = 20
+SCHEDULE_ROWS = 60
+
+
+def _animal_cages(db_path, animal_ids):
+    """{animal id: (name, species, cage id, cage name)} for `animal_ids`, looked up by primary key."""
+    found = {}
+    ids = sorted(animal_ids)
+    conn = connect_readonly(db_path)
+    try:
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            found.update((row[0], row[1:]) for row in conn.execute(
+                "SELECT a.id, a.name, a.species, a.cage_id, c.name FROM animals AS a "
+                "LEFT JOIN cages AS c ON c.id = a.cage_id WHERE a.id IN ({})".format(", ".join("?" * len(batch))), batch))
+    finally:
+        conn.close()
+    return found
+
+
+def _schedule_input(ctx):
+    return _database_input(ctx), ctx.date
+
+
+def build_vaccination_schedule(ctx):
+    as_of = datetime.strptime(ctx.date, DATE_FORMAT).date()
+    schedule = VaccinationSchedule(ctx.db_path)
+    try:
+        schedule.refresh()
+    finally:
+        schedule.close()
+    overdue = schedule.overdue(as_of)
+    upcoming = schedule.due_within(as_of, SCHEDULE_DAYS)
+    week = schedule.count_due_within(as_of, 7)
+    elements = [Para(
+        "Each animal's vaccines are due on the <i>next due date</i> of their latest vaccination. As of {}, "
+        "<b>{:,}</b> of the {:,} animal and vaccine pairs in <b>{}</b> are overdue and {:,} fall due within {} days.".format(
+            as_of.isoformat(), len(overdue), len(schedule), os.path.basename(ctx.db_path), len(upcoming), SCHEDULE_DAYS))]
+
+    rows = [['Status', 'Vaccinations'],
+            ['Overdue', '{:,}'.format(len(overdue))],
+            ['Due within 7 days', '{:,}'.format(week)],
+            ['Due in 8 to {} days'.format(SCHEDULE_DAYS), '{:,}'.format(len(upcoming) - week)],
+            ['Due later', '{:,}'.format(len(schedule) - len(overdue) - len(upcoming))]]
+    elements.append(Table(rows, 'green', [3.0*inch, 1.5*inch], right_align=(1,)))
+    elements.append(Space(0.15*inch))
+    if not overdue and not upcoming:
+        return elements
+
+    animals = _animal_cages(ctx.db_path, set(due.animal_id for due in overdue + upcoming))
+    cages = {}
+    for due in overdue + upcoming:
+        _, _, cage_id, cage_name = animals.get(due.animal_id, (None, None, None, None))
+        cage = cages.setdefault(cage_id, {'name': cage_name or cage_id or '(no cage)', 'dues': [], 'animals': set()})
+        cage['dues'].append(due)
+        cage['animals'].add(due.animal_id)
+    ranked = sorted(cages.values(), key=lambda cage: (-sum(1 for due in cage['dues'] if due.days < 0),
+                                                      -len(cage['dues']), cage['name']))[:SCHEDULE_CAGES]
+
+    elements.append(Heading("Cages with the Most Vaccinations Due ({} of {:,})".format(len(ranked), len(cages))))
+    rows = [['Cage', 'Animals', 'Overdue', 'Next {} Days'.format(SCHEDULE_DAYS)]]
+    for cage in ranked:
+        late = sum(1 for due in cage['dues'] if due.days < 0)
+        rows.append([cage['name'], '{:,}'.format(len(cage['animals'])), '{:,}'.format(late),
+                     '{:,}'.format(len(cage['dues']) - late)])
+    elements.append(Table(rows, 'amber', [2.6*inch, 1.0*inch, 1.0*inch, 1.2*inch], compact=True, right_align=(1, 2, 3)))
+    elements.append(Space(0.15*inch))
+
+    elements.append(Heading("Due and Overdue Vaccinations by Cage"))
+    rows = [['Cage', 'Animal', 'Vaccine', 'Due', 'Status']]
+    listed = 0
+    for cage in ranked:
+        for i, due in enumerate(cage['dues']):
+            if listed == SCHEDULE_ROWS:
+                break
+            name, species, _, _ = animals.get(due.animal_id, (None, None, None, None))
+            status = '{} days overdue'.format(-due.days) if due.days < 0 else 'today' if due.days == 0 \
+                else 'in {} days'.format(due.days)
+            rows.append([cage['name'] if i == 0 else '', '{} ({})'.format(name or due.animal_id, species or '?'),
+                         due.vaccine or '', due.due.isoformat(), status])
+            listed += 1
+    elements.append(Table(rows, 'purple', [1.4*inch, 1.8*inch, 1.2*inch, 0.9*inch, 1.1*inch], compact=True))
+    remaining = len(overdue) + len(upcoming) - listed
+    if remaining > 0:
+        elements.append(Para("{:,} more not listed; <b>python vaccination_schedule.py</b> lists them all.".format(remaining), 'cell'))
+    return elements
+
+
+# Cage Capacity Plan (optional): placements from cage_planner.py; rows
+# listed in the shortfall and moves tables
+CAGE_PLAN_ROWS = 30
+
+
+def _utilization(animals, capacity):
+    return '{:.0f}%'.format(100.0 * animals / capacity) if capacity else '-'
+
+
+def build_cage_plan(ctx):
+    plan = plan_placements(ctx.db_path)
+    placed = [move for move in plan.moves if move.to_cage]
+    elements = [Para(
+        "Where animals should live given each cage's capacity and type. Animals in cages over capacity (the "
+        "smallest species groups in the cage), in cages that are not active, in a cage type their species can't "
+        "live in, or without a cage are placed in compatible cages with room. Of the {:,} animals in <b>{}</b> "
+        "that need a place, <b>{:,}</b> can be moved and {:,} have no compatible cage with room. The plan is "
+        "advisory: nothing is written to the database.".format(
+            len(plan.moves), os.path.basename(ctx.db_path), len(placed), len(plan.moves) - len(placed)))]
+
+    elements.append(Heading("Utilization by Cage Type"))
+    rows = [['Cage Type', 'Cages', 'Capacity', 'Animals Before', 'Use Before', 'Over Before',
+             'Animals After', 'Use After', 'Over After']]
+    for usage in plan.usage:
+        rows.append([usage.type or '(none)', '{:,}'.format(usage.cages), '{:,}'.format(usage.capacity),
+                     '{:,}'.format(usage.before), _utilization(usage.before, usage.capacity),
+                     '{:,}'.format(usage.over_before), '{:,}'.format(usage.after),
+                     _utilization(usage.after, usage.capacity), '{:,}'.format(usage.over_after)])
+    elements.append(Table(rows, 'blue', [1.1*inch] + [0.66*inch] * 8, compact=True,
+                          right_align=(1, 2, 3, 4, 5, 6, 7, 8)))
+    elements.append(Para("<i>Capacity counts active cages only; Over is the number of cages holding more animals "
+                         "than their capacity.</i>", 'cell'))
+    elements.append(Space(0.15*inch))
+    if not plan.moves:
+        return elements
+
+    elements.append(Heading("Why Animals Move"))
+    reasons = Counter(move.reason for move in plan.moves)
+    moved = Counter(move.reason for move in placed)
+    rows = [['Reason', 'Animals', 'Placed', 'No Room']]
+    for reason, label in REASONS:
+        if reasons[reason]:
+            rows.append([label, '{:,}'.format(reasons[reason]), '{:,}'.format(moved[reason]),
+                         '{:,}'.format(reasons[reason] - moved[reason])])
+    elements.append(Table(rows, 'green', [2.6*inch, 1.0*inch, 1.0*inch, 1.0*inch], right_align=(1, 2, 3)))
+    elements.append(Space(0.15*inch))
+
+    if plan.unplaced:
+        elements.append(Heading("Capacity Shortfall by Species"))
+        rows = [['Species', 'Without Room', 'Cage Types']]
+        for species, count in plan.unplaced.most_common(CAGE_PLAN_ROWS):
+            types = plan.compatible.get(species_key(species))
+            rows.append([species or '(unknown)', '{:,}'.format(count), ', '.join(types) if types else 'none known'])
+        elements.append(Table(rows, 'amber', [1.8*inch, 1.2*inch, 2.6*inch], compact=True, right_align=(1,)))
+        elements.append(Space(0.15*inch))
+
+    if placed:
+        names = {cage.id: cage.name or cage.id for cage in plan.cages}
+        routes = Counter((move.species, names.get(move.from_cage, '(no cage)'), names[move.to_cage])
+                         for move in placed)
+        elements.append(Heading("Planned Moves ({} of {:,} routes)".format(
+            min(len(routes), CAGE_PLAN_ROWS), len(routes))))
+        rows = [['Species', 'From', 'To', 'Animals']]
+        for (species, source, target), count in routes.most_common(CAGE_PLAN_ROWS):
+            rows.append([species, source, target, '{:,}'.format(count)])
+        elements.append(Table(rows, 'purple', [1.6*inch, 1.7*inch, 1.7*inch, 0.8*inch], compact=True,
+                              right_align=(3,)))
+        if len(routes) > CAGE_PLAN_ROWS:
+            elements.append(Para("<b>python cage_planner.py</b> lists every move.", 'cell'))
+    return elements
+
+
+# Appendices: full listings of live tables, streamed from the database in
+# batches. Columns are (name, width in inches); cell text is clipped to fit.
+APPENDIX_COLUMNS = {
+    'animals': [('id', 0.8), ('name', 1.2), ('species', 1.1), ('age', 0.5),
+                ('gender', 0.7), ('health_status', 1.4), ('cage_id', 0.9)],
+    'ticket_sales': [('id', 1.3), ('ticket_id', 0.8), ('quantity', 0.7), ('total_amount', 1.0),
+                     ('date', 0.9), ('visitor_name', 1.9)],
+    'inventory': [('id', 0.7), ('name', 1.6), ('category', 1.0), ('quantity', 0.8),
+                  ('unit', 0.7), ('min_threshold', 0.9), ('expiry_date', 1.0)],
+    'medical_checks': [('id', 0.8), ('animal_id', 0.8), ('doctor_id', 0.8), ('date', 0.9),
+                       ('diagnosis', 1.3), ('treatment', 1.3), ('status', 0.8)],
+    'vaccinations': [('id', 0.8), ('animal_id', 0.9), ('vaccine_name', 1.8),
+                     ('date_administered', 1.3), ('next_due_date', 1.3)],
+}
+
+
+def _format_cell(value, max_chars):
+    if value is None:
+        return ''
+    text = '{:,.2f}'.format(value) if isinstance(value, float) else str(value)
+    return text if len(text) <= max_chars else text[:max_chars - 1] + '…'
+
+
+def build_appendix(ctx, table):
+    columns = APPENDIX_COLUMNS[table]
+    conn = connect_readonly(ctx.db_path)
+    try:
+        exists = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?",
+                              (table,)).fetchone()[0]
+        row_count = conn.execute("SELECT COUNT(*) FROM {}".format(table)).fetchone()[0] if exists else 0
+    finally:
+        conn.close()
+    if not exists:
+        return [Para("Table <b>{}</b> does not exist in {}.".format(table, os.path.basename(ctx.db_path)))]
+
+    # ~4.4pt per character at 8pt Helvetica, less cell padding
+    limits = [max(int((width*inch - 12) / 4.4), 4) for _, width in columns]
+    sql = "SELECT {} FROM {} ORDER BY rowid".format(", ".join(name for name, _ in columns), table)
+    batches = (
+        [[_format_cell(value, limit) for value, limit in zip(row, limits)] for row in batch]
+        for batch in iter_batches(ctx.db_path, sql)
+    )
+    header = [name.replace('_', ' ').title() for name, _ in columns]
+    return [
+        Para("All {:,} rows of <b>{}</b> from {}.".format(row_count, table, os.path.basename(ctx.db_path))),
+        DataTable(header, batches, [width*inch for _, width in columns], 'green'),
+    ]
+
+
+def build_appendix_animals(ctx):
+    return build_appendix(ctx, 'animals')
+
+
+def build_appendix_ticket_sales(ctx):
+    return build_appendix(ctx, 'ticket_sales')
+
+
+def build_appendix_inventory(ctx):
+    return build_appendix(ctx, 'inventory')
+
+
+def build_appendix_medical_checks(ctx):
+    return build_appendix(ctx, 'medical_checks')
+
+
+def build_appendix_vaccinations(ctx):
+    return build_appendix(ctx, 'vaccinations')
+
+
+def _date_input(ctx):
+    return ctx.date
+
+
+def _title_input(ctx):
+    return ctx.date, ctx.site
+
+
+def _contents_input(ctx):
+    return [section.title for section in ctx.sections if section.heading]
+
+
+def _api_input(ctx):
+    return source_signature(SERVER_PATH)
+
+
+def _query_input(ctx):
+    return (source_signature(SERVER_PATH), _database_input(ctx))
+
+
+def _database_input(ctx):
+    return database_signature(ctx.db_path) if ctx.db_path else None
+
+
+# Section registry, in document order. `heading` is None for the unnumbered
+# front matter; `page_break` starts the next section on a fresh page.
+# `inputs(ctx)` returns the data, besides the builder's code, that the
+# section's output depends on; it is part of the section's cache key.
+# `needs_db` sections read the live database: they are only built when asked
+# for by key and need a db_path. `optional` sections are also only built when
+# asked for, but need no database.
+Section = namedtuple('Section', 'key title heading build page_break inputs needs_db optional',
+                     defaults=(None, False, False))
+
+SECTIONS = [
+    Section('title', 'Title Page', None, build_title_page, True, _title_input),
+    Section('contents', 'Table of Contents', None, build_contents, True, _contents_input),
+    Section('overview', 'Project Overview', 'PROJECT OVERVIEW', build_overview, False),
+    Section('tech_stack', 'Technology Stack', 'TECHNOLOGY STACK', build_tech_stack, False),
+    Section('architecture', 'Project Architecture', 'PROJECT ARCHITECTURE', build_architecture, False),
+    Section('database', 'Database Design', 'DATABASE DESIGN', build_database, True, _database_input),
+    Section('api', 'Backend API Endpoints', 'BACKEND API ENDPOINTS', build_api, True, _api_input),
+    Section('frontend', 'Frontend Structure', 'FRONTEND STRUCTURE', build_frontend, True, _frontend_input),
+    Section('communication', 'Frontend and Backend Communication', 'FRONTEND AND BACKEND COMMUNICATION', build_communication, True),
+    Section('user_flows', 'User Flows', 'USER FLOWS', build_user_flows, True),
+    Section('security', 'Security', 'SECURITY MEASURES', build_security, True),
+    Section('conclusion', 'Conclusion', 'CONCLUSION AND SUMMARY', build_conclusion, True, _date_input),
+    Section('analytics', 'Operational Analytics', 'OPERATIONAL ANALYTICS',
+            build_analytics, True, _database_input, True),
+    Section('performance', 'Performance', 'PERFORMANCE UNDER LOAD',
+            build_performance, True, _performance_input, False, True),
+    Section('query_performance', 'Query Performance', 'QUERY PERFORMANCE',
+            build_query_performance, True, _query_input, True),
+    Section('search_digest', 'Clinical Search Digest', 'CLINICAL SEARCH DIGEST',
+            build_search_digest, True, _database_input, True),
+    Section('vaccination_schedule', 'Vaccination Schedule', 'VACCINATION SCHEDULE',
+            build_vaccination_schedule, True, _schedule_input, True),
+    Section('cage_plan', 'Cage Capacity Plan', 'CAGE CAPACITY PLAN',
+            build_cage_plan, True, _database_input, True),
+    Section('appendix_animals', 'Appendix: Animals', 'APPENDIX: ANIMALS',
+            build_appendix_animals, True, _database_input, True),
+    Section('appendix_ticket_sales', 'Appendix: Ticket Sales', 'APPENDIX: TICKET SALES',
+            build_appendix_ticket_sales, True, _database_input, True),
+    Section('appendix_inventory', 'Appendix: Inventory', 'APPENDIX: INVENTORY',
+            build_appendix_inventory, True, _database_input, True),
+    Section('appendix_medical_checks', 'Appendix: Medical Checks', 'APPENDIX: MEDICAL CHECKS',
+            build_appendix_medical_checks, True, _database_input, True),
+    Section('appendix_vaccinations', 'Appendix: Vaccinations', 'APPENDIX: VACCINATIONS',
+            build_appendix_vaccinations, True, _database_input, True),
+]
+
+SECTION_KEYS = [section.key for section in SECTIONS]
+APPENDIX_KEYS = [key for key in SECTION_KEYS if key.startswith('appendix_')]
+
+
+def select_sections(keys=None):
+    if keys is None:
+        return [section for section in SECTIONS if not (section.needs_db or section.optional)]
+    wanted = set(keys)
+    unknown = wanted.difference(SECTION_KEYS)
+    if unknown:
+        raise ValueError("Unknown section(s): {}".format(", ".join(sorted(unknown))))
+    return [section for section in SECTIONS if section.key in wanted]
+
+
+def section_blocks(ctx, section, last=True):
+    """The blocks of one section: its numbered heading, its content and,
+    unless it is the `last` section, its page break."""
+    blocks = []
+    if section.heading:
+        blocks.append(Heading("{}. {}".format(ctx.numbers[section.key], section.heading), 1))
+        blocks.append(Space(0.15*inch))
+    blocks.extend(section.build(ctx))
+    if section.page_break and not last:
+        blocks.append(Break())
+    return blocks
+
+
+def build_blocks(ctx, sections=None):
+    """The document model (see doc_model.py) for `sections`, by default all of
+    the context's sections, with their numbered headings and page breaks."""
+    sections = ctx.sections if sections is None else sections
+    blocks = []
+    for i, section in enumerate(sections):
+        blocks.extend(section_blocks(ctx, section, i == len(sections) - 1))
+    return blocks
+
+
+# PDF rendering of the document model
+CHART_COLORS = [PALETTES[name][0] for name in ('blue', 'green', 'amber', 'purple')] + ['#EF4444', '#6B7280']
+
+
+def _line_chart(labels, values):
+    from reportlab.graphics.charts.linecharts import HorizontalLineChart
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.lib import colors
+    drawing = Drawing(FRAME_WIDTH, 2.4*inch)
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 0.6*inch, 0.4*inch
+    chart.width, chart.height = FRAME_WIDTH - 0.8*inch, 1.8*inch
+    chart.data = [list(values)]
+    step = max(len(labels) // 8, 1)
+    chart.categoryAxis.categoryNames = [label if i % step == 0 else '' for i, label in enumerate(labels)]
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.angle = 30
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.lines[0].strokeColor = colors.HexColor(CHART_COLORS[0])
+    chart.lines[0].strokeWidth = 1.5
+    drawing.add(chart)
+    return drawing
+
+
+def _bar_chart(labels, values):
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.lib import colors
+    drawing = Drawing(FRAME_WIDTH, 2.2*inch)
+    chart = VerticalBarChart()
+    chart.x, chart.y = 0.6*inch, 0.4*inch
+    chart.width, chart.height = FRAME_WIDTH - 0.8*inch, 1.6*inch
+    chart.data = [list(values)]
+    chart.categoryAxis.categoryNames = list(labels)
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars[0].fillColor = colors.HexColor(CHART_COLORS[1])
+    drawing.add(chart)
+    return drawing
+
+
+def _pie_chart(labels, values):
+    from reportlab.graphics.charts.piecharts import Pie
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.lib import colors
+    drawing = Drawing(FRAME_WIDTH, 2.0*inch)
+    pie = Pie()
+    pie.x, pie.y = FRAME_WIDTH / 2 - 0.8*inch, 0.1*inch
+    pie.width = pie.height = 1.6*inch
+    pie.data = list(values)
+    pie.labels = list(labels)
+    pie.slices.fontSize = 7
+    for i in range(len(values)):
+        pie.slices[i].fillColor = colors.HexColor(CHART_COLORS[i % len(CHART_COLORS)])
+    drawing.add(pie)
+    return drawing
+
+
+CHARTS = {'line': _line_chart, 'bar': _bar_chart, 'pie': _pie_chart}
+HEADING_STYLES = ['title', 'heading', 'subheading']
+
+
+def _pdf_cell(styles, cell):
+    from reportlab.platypus import Paragraph
+    if isinstance(cell, Para):
+        return Paragraph(arabic_markup(cell.text), styles[cell.style])
+    # Plain cells are drawn in Helvetica, which has no Arabic-script glyphs
+    if isinstance(cell, str) and has_arabic(cell):
+        return Paragraph(arabic_markup(escape(cell)), styles['cell'])
+    return cell
+
+
+def to_flowables(ctx, blocks):
+    """Yield a flowable per block."""
+    from reportlab.platypus import PageBreak, Paragraph, Spacer
+    s = ctx.styles
+    for block in blocks:
+        if isinstance(block, Heading):
+            yield Paragraph(arabic_markup(block.text), s[HEADING_STYLES[block.level]])
+        elif isinstance(block, Para):
+            yield Paragraph(arabic_markup(block.text), s[block.style])
+        elif isinstance(block, Code):
+            yield Paragraph(escape(block.text), s['code'])
+        elif isinstance(block, Table):
+            rows = [[_pdf_cell(s, cell) for cell in row] for row in block.rows]
+            table = make_table(rows, block.palette, block.col_widths, block.compact)
+            if block.right_align:
+                table.setStyle([('ALIGN', (c, 1), (c, -1), 'RIGHT') for c in block.right_align])
+            yield table
+        elif isinstance(block, DataTable):
+            yield streaming_table(block.header, iter(block.batches), block.col_widths,
+                                  get_table_style(block.palette, compact=True))
+        elif isinstance(block, Chart):
+            yield CHARTS[block.kind](block.labels, block.values)
+        elif isinstance(block, Space):
+            yield Spacer(1, block.height)
+        elif isinstance(block, Break):
+            yield PageBreak()
+
+
+class FlowableStream(list):
+    """The list doc.build() consumes, filled from an iterator of flowables
+    as layout reaches its end. platypus deletes each flowable from the front
+    once it is placed, so only the flowables of the page being laid out are
+    alive at a time rather than the whole document's.
+
+    platypus reads len() and looks ahead through runs of keep-with-next
+    flowables (headings), so the list always holds such a run up to and
+    including the flowable that ends it."""
+
+    def __init__(self, flowables):
+        list.__init__(self)
+        self._source = iter(flowables)
+
+    def _fill(self):
+        if list.__len__(self) and not list.__getitem__(self, -1).getKeepWithNext():
+            return
+        for flowable in self._source:
+            self.append(flowable)
+            if not flowable.getKeepWithNext():
+                break
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+    def __iter__(self):
+        # Anything but doc.build() gets every flowable, at the cost of holding them all
+        self.extend(self._source)
+        return list.__iter__(self)
+
+
+def _iter_elements(ctx, sections):
+    # Each section is built only when layout gets to it
+    for i, section in enumerate(sections):
+        yield from to_flowables(ctx, section_blocks(ctx, section, i == len(sections) - 1))
+
+
+def build_elements(ctx, sections=None, profile=None):
+    """Flowables for `sections`, as a FlowableStream. With a BuildProfile as
+    `profile`, each section's builder and flowable conversion is timed up
+    front, and a marker in front of its flowables times its layout."""
+    sections = ctx.sections if sections is None else sections
+    if profile is None:
+        return FlowableStream(_iter_elements(ctx, sections))
+    elements = []
+    for i, section in enumerate(sections):
+        with profile.span('build ' + section.key, 'build', section=section.key):
+            blocks = section_blocks(ctx, section, i == len(sections) - 1)
+        with profile.span('flowables ' + section.key, 'flowables', section=section.key, blocks=len(blocks)):
+            flowables = list(to_flowables(ctx, blocks))
+        elements.append(profile.marker(section.key))
+        elements.extend(flowables)
+    return elements
+
+
+def make_doc_template(output):
+    from reportlab.platypus import SimpleDocTemplate
+    return SimpleDocTemplate(output, pagesize=letter,
+                             rightMargin=0.75*inch, leftMargin=0.75*inch,
+                             topMargin=0.75*inch, bottomMargin=0.75*inch)
+
+
+def draw_footer(canvas, page_number, date):
+    from reportlab.lib import colors
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.HexColor('#6B7280'))
+    canvas.drawString(0.75*inch, 0.5*inch, "Zoo Management System - Technical Documentation ({})".format(date))
+    canvas.drawRightString(letter[0] - 0.75*inch, 0.5*inch, "Page {}".format(page_number))
+    canvas.restoreState()
+
+
+# Incremental and parallel builds: the document is cut into page groups (runs
+# of sections that share pages), each group is rendered to its own PDF
+# fragment keyed by a hash of everything it depends on, and the fragments are
+# stitched together. Fragments carry no footer; page numbers are stamped on
+# the stitched document so they stay correct whatever the fragments' lengths.
+def page_groups(sections):
+    groups = []
+    current = []
+    for section in sections:
+        current.append(section)
+        if section.page_break:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_code_fingerprints = {}
+
+
+def _global_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+def _constant_repr(value, functions):
+    """repr() of a constant that stays the same across processes: functions
+    inside it (e.g. a dispatch table) are named, and queued on `functions`
+    to be fingerprinted, instead of showing their memory address."""
+    if inspect.isfunction(value):
+        if os.path.dirname(os.path.abspath(inspect.getfile(value))) == _HERE:
+            functions.append(value)
+        return '<function {}.{}>'.format(value.__module__, value.__qualname__)
+    if isinstance(value, dict):
+        return '{%s}' % ', '.join('{}: {}'.format(_constant_repr(key, functions), _constant_repr(item, functions))
+                                  for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return '{}({})'.format(type(value).__name__, ', '.join(_constant_repr(item, functions) for item in value))
+    return repr(value)
+
+
+def code_fingerprint(fn):
+    """Hash the source of `fn` plus the project functions and constants it uses."""
+    if fn in _code_fingerprints:
+        return _code_fingerprints[fn]
+    h = hashlib.sha256()
+    seen = set()
+    pending = [fn]
+    while pending:
+        f = pending.pop()
+        if f in seen:
+            continue
+        seen.add(f)
+        h.update(inspect.getsource(f).encode('utf-8'))
+        for name in sorted(_global_names(f.__code__)):
+            value = f.__globals__.get(name)
+            if inspect.isfunction(value):
+                if os.path.dirname(os.path.abspath(inspect.getfile(value))) == _HERE:
+                    pending.append(value)
+            elif isinstance(value, (str, int, float, tuple, list, dict)):
+                h.update(name.encode('utf-8'))
+                h.update(_constant_repr(value, pending).encode('utf-8'))
+    _code_fingerprints[fn] = h.hexdigest()
+    return _code_fingerprints[fn]
+
+
+def fragment_key(ctx, group):
+    h = hashlib.sha256()
+    h.update(reportlab.Version.encode('utf-8'))
+    h.update(repr(arabic_font_path()).encode('utf-8'))
+    for fn in (get_styles, make_doc_template, build_elements):
+        h.update(code_fingerprint(fn).encode('utf-8'))
+    for section in group:
+        inputs = section.inputs(ctx) if section.inputs else None
+        h.update(repr((section.key, section.heading, ctx.numbers.get(section.key), inputs)).encode('utf-8'))
+        h.update(code_fingerprint(section.build).encode('utf-8'))
+    return h.hexdigest()
+
+
+def render_fragment(ctx, group, profile=None):
+    buf = io.BytesIO()
+    if profile is None:
+        make_doc_template(buf).build(build_elements(ctx, group))
+    else:
+        profile.build(make_doc_template(buf), build_elements(ctx, group, profile))
+    return buf.getvalue()
+
+
+def _render_fragment_job(section_keys, group_keys, date, db_path, site=None):
+    # Runs in a pool worker: rebuild the context there (styles are cached per
+    # worker process) and render one page group
+    ctx = BuildContext(None, select_sections(section_keys), date=date, db_path=db_path, site=site)
+    group = [section for section in ctx.sections if section.key in group_keys]
+    return render_fragment(ctx, group)
+
+
+def footer_overlay(pages, date):
+    from reportlab.pdfgen.canvas import Canvas
+    buf = io.BytesIO()
+    c = Canvas(buf, pagesize=letter)
+    for page_number in range(1, pages + 1):
+        draw_footer(c, page_number, date)
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def stitch_fragments(fragments, output, date):
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        raise RuntimeError("Incremental and parallel builds need pypdf: pip install pypdf")
+    writer = PdfWriter()
+    for data in fragments:
+        writer.append(PdfReader(io.BytesIO(data)))
+    overlay = PdfReader(io.BytesIO(footer_overlay(len(writer.pages), date)))
+    for page, footer in zip(writer.pages, overlay.pages):
+        page.merge_page(footer)
+        # Merging rewrites the page's content stream uncompressed
+        page.compress_content_streams()
+    writer.write(output)
+    return len(writer.pages)
+
+
+def _make_context(sections, date, db_path, site=None):
+    ctx = BuildContext(None, select_sections(sections), date=date, db_path=db_path, site=site)
+    if not db_path and any(section.needs_db for section in ctx.sections):
+        raise ValueError("Sections {} need a database (db_path)".format(
+            ", ".join(section.key for section in ctx.sections if section.needs_db)))
+    return ctx
+
+
+def _stage(profile, name):
+    return profile.span(name, 'stage') if profile is not None else nullcontext()
+
+
+def build_documentation(output=PDF_PATH, sections=None, date=None, db_path=None, cache=None, jobs=None,
+                        profile=None, site=None):
+    """Render the documentation to `output` (a path or binary file object).
+
+    `sections` is an iterable of keys from SECTION_KEYS; only those builders
+    run. With `db_path` the Database Design section is introspected from that
+    SQLite file instead of using the built-in table list. With a
+    SectionCache as `cache`, unchanged page groups are reused from the cache
+    instead of being laid out again; with `jobs` > 1 the remaining groups are
+    laid out in that many worker processes. `site` names the zoo on the
+    title page. Returns the number of pages written.
+
+    With a BuildProfile (see build_profile.py) as `profile`, every stage
+    run in this process is recorded on it; groups laid out in worker
+    processes are timed as a whole.
+    """
+    with _stage(profile, 'context'):
+        ctx = _make_context(sections, date, db_path, site)
+    if cache is None and not (jobs and jobs > 1):
+        def on_page(canvas, doc):
+            draw_footer(canvas, canvas.getPageNumber(), ctx.date)
+
+        doc = make_doc_template(output)
+        if profile is None:
+            doc.build(build_elements(ctx), onFirstPage=on_page, onLaterPages=on_page)
+        else:
+            profile.build(doc, build_elements(ctx, profile=profile), onFirstPage=on_page, onLaterPages=on_page)
+        return doc.page
+
+    groups = page_groups(ctx.sections)
+    with _stage(profile, 'fragment keys'):
+        keys = [fragment_key(ctx, group) for group in groups] if cache is not None else [None] * len(groups)
+        fragments = [cache.get(key) if cache is not None else None for key in keys]
+    missing = [i for i, data in enumerate(fragments) if data is None]
+
+    if jobs and jobs > 1 and len(missing) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        section_keys = [section.key for section in ctx.sections]
+        with _stage(profile, 'worker processes'), ProcessPoolExecutor(max_workers=min(jobs, len(missing))) as pool:
+            futures = {
+                i: pool.submit(_render_fragment_job, section_keys,
+                               [section.key for section in groups[i]], ctx.date, ctx.db_path, ctx.site)
+                for i in missing
+            }
+            for i, future in futures.items():
+                fragments[i] = future.result()
+    else:
+        for i in missing:
+            fragments[i] = render_fragment(ctx, groups[i], profile)
+
+    if cache is not None:
+        for i in missing:
+            cache.put(keys[i], fragments[i])
+    with _stage(profile, 'stitch'):
+        return stitch_fragments(fragments, output, ctx.date)
+
+
+def build_optimized(output=PDF_PATH, **kwargs):
+    """build_documentation() followed by optimize_pdf(): page streams
+    compressed and identical fonts and images stored once. Takes the same
+    arguments; returns (pages, OptimizeReport)."""
+    buf = io.BytesIO()
+    pages = build_documentation(buf, **kwargs)
+    with _stage(kwargs.get('profile'), 'optimize'):
+        data, report = optimize_pdf(buf.getvalue())
+    if hasattr(output, 'write'):
+        output.write(data)
+    else:
+        with open(output, 'wb') as f:
+            f.write(data)
+    return pages, report
+
+
+# Text formats skip reportlab layout entirely: the document model is written
+# straight to the file by a doc_model renderer
+FORMATS = ['pdf'] + sorted(RENDERERS)
+FORMAT_EXTENSIONS = {'.html': 'html', '.htm': 'html', '.md': 'markdown'}
+
+
+def export_documentation(output, format='html', sections=None, date=None, db_path=None):
+    """Write the documentation as `format` ('html' or 'markdown') to
+    `output`, a path or text file object. Takes the same sections, date and
+    db_path as build_documentation()."""
+    ctx = _make_context(sections, date, db_path)
+    render = RENDERERS[format]
+    title = "Zoo Management System - Technical Documentation ({})".format(ctx.date)
+    if hasattr(output, 'write'):
+        render(build_blocks(ctx), output, title)
+        return
+    with open(output, 'w', encoding='utf-8') as f:
+        render(build_blocks(ctx), f, title)
+
+
+# Watch mode: a long-lived process that rebuilds the output whenever the
+# sources it documents change. Styles, parsed routes and code fingerprints
+# stay warm in this process, and unchanged page groups come straight from the
+# fragment cache, so an edit only lays out the groups whose inputs changed.
+WATCH_PATHS = [
+    SERVER_PATH,
+    INIT_SCRIPT_PATH,
+    # The Frontend Structure section scans all of src/, not just src/pages
+    FRONTEND_SRC_DIR,
+]
+
+
+def _replace_atomically(output, write):
+    """Call write(temp_path) and rename the result over `output`, so readers
+    only ever see the old file or the complete new one."""
+    directory, name = os.path.split(os.path.abspath(output))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + name + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        result = write(tmp)
+        # mkstemp creates the file private to its owner; keep the mode the output had
+        try:
+            mode = os.stat(output).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return result
+
+
+def watch_documentation(output=PDF_PATH, format='pdf', sections=None, db_path=None, cache=None,
+                        debounce=DEFAULT_DEBOUNCE, poll_interval=None, optimize=False):
+    """Build `output`, then rebuild it after every burst of changes to
+    WATCH_PATHS (and the database, with `db_path`) until interrupted."""
+    paths = list(WATCH_PATHS)
+    if db_path:
+        paths += [db_path, db_path + '-wal']
+    if sections is not None and 'performance' in sections:
+        from load_test import DEFAULT_RESULTS_PATH as LOAD_RESULTS_PATH
+        paths.append(LOAD_RESULTS_PATH)
+    if format == 'pdf' and cache is None:
+        cache = SectionCache()
+
+    def rebuild():
+        if format == 'pdf' and optimize:
+            return _replace_atomically(output, lambda tmp: build_optimized(tmp, sections=sections, db_path=db_path, cache=cache))
+        if format == 'pdf':
+            return _replace_atomically(output, lambda tmp: build_documentation(tmp, sections, db_path=db_path, cache=cache))
+        return _replace_atomically(output, lambda tmp: export_documentation(tmp, format, sections, db_path=db_path))
+
+    watcher = open_watcher(paths, poll_interval)
+    try:
+        started = time.perf_counter()
+        rebuild()
+        print(f"✓ Built {output} in {time.perf_counter() - started:.2f}s")
+        print(f"👀 Watching {len(paths)} paths ({watcher.kind}); press Ctrl+C to stop")
+        last_keys = None
+        if format == 'pdf':
+            ctx = _make_context(sections, None, db_path)
+            last_keys = [fragment_key(ctx, group) for group in page_groups(ctx.sections)]
+        while True:
+            changed = wait_for_changes(watcher, debounce)
+            names = ", ".join(sorted(os.path.relpath(path) for path in changed))
+            started = time.perf_counter()
+            try:
+                if format == 'pdf':
+                    ctx = _make_context(sections, None, db_path)
+                    keys = [fragment_key(ctx, group) for group in page_groups(ctx.sections)]
+                    if keys == last_keys:
+                        print(f"· {names} changed; no section depends on it")
+                        continue
+                    stale = sum(1 for i, key in enumerate(keys) if last_keys is None or i >= len(last_keys) or key != last_keys[i])
+                    rebuild()
+                    last_keys = keys
+                    detail = "{} of {} page groups".format(stale, len(keys))
+                else:
+                    rebuild()
+                    detail = "everything"
+            except Exception as e:
+                print(f"❌ {names} changed; rebuild failed, {output} left as it was: {e}")
+                continue
+            print(f"🔄 {names} changed; rebuilt {detail} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+
+
+def check_documentation(pdf_path):
+    if not os.path.exists(pdf_path):
+        print(f"✗ {pdf_path} not found")
+        return 2
+    try:
+        missing, stale = check_pdf(pdf_path, SERVER_PATH)
+    except ImportError:
+        print("✗ --check needs pypdf: pip install pypdf")
+        return 2
+    for method, path in missing:
+        print(f"✗ Not documented: {method} {path}")
+    for method, path in stale:
+        print(f"✗ No longer in {os.path.relpath(SERVER_PATH)}: {method} {path}")
+    if missing or stale:
+        return 1
+    print(f"✓ {pdf_path} documents every endpoint in {os.path.relpath(SERVER_PATH)}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the ZMS technical documentation PDF.")
+    parser.add_argument('output', nargs='?', default=PDF_PATH, help="output file path")
+    parser.add_argument('--format', choices=FORMATS,
+                        help="output format (default: from the output file's extension, else pdf)")
+    parser.add_argument('--sections', help="comma-separated section keys ({})".format(", ".join(SECTION_KEYS)))
+    parser.add_argument('--db', nargs='?', const=DEFAULT_DB_PATH, metavar='SQLITE_FILE',
+                        help="introspect the Database Design section from a SQLite file (default: backend/zoo.db)")
+    parser.add_argument('--include', metavar='KEYS',
+                        help="comma-separated optional sections to add to the default ones, e.g. performance, or analytics,query_performance,search_digest,vaccination_schedule,cage_plan (need --db)")
+    parser.add_argument('--appendix', action='store_true',
+                        help="append full listings of animals, ticket sales, inventory, medical checks and vaccinations (needs --db)")
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_DIR, metavar='DIR',
+                        help="reuse unchanged sections from an on-disk fragment cache (default: .docs_cache)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024), metavar='MB',
+                        help="evict least recently used fragments above this size (default: %(default)s)")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="lay out page groups in N worker processes")
+    parser.add_argument('--check', action='store_true',
+                        help="don't build; exit non-zero if the endpoints in the output PDF differ from backend/src/index.ts")
+    parser.add_argument('--stats', action='store_true', help="report fragment cache hits and misses")
+    parser.add_argument('--optimize', action='store_true',
+                        help="compress page streams, store identical fonts and images once, and report the savings")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, metavar='TRACE_JSON',
+                        help="time each section and build phase with tracemalloc, write a Chrome trace "
+                             "(default: %(const)s) and print a summary")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and rebuild when index.ts, init.ts or anything in src/ changes")
+    parser.add_argument('--debounce', type=int, default=int(DEFAULT_DEBOUNCE * 1000), metavar='MS',
+                        help="with --watch, wait for this long without changes before rebuilding (default: %(default)s)")
+    parser.add_argument('--poll', type=float, metavar='SECONDS',
+                        help="with --watch, poll for changes at this interval instead of using inotify")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return check_documentation(args.output)
+
+    keys = args.sections.split(',') if args.sections else None
+    if args.include:
+        keys = (keys or [section.key for section in select_sections()]) + args.include.split(',')
+    if args.appendix:
+        keys = (keys or [section.key for section in select_sections()]) + APPENDIX_KEYS
+    try:
+        selected = select_sections(keys)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.db and not os.path.exists(args.db):
+        parser.error("SQLite database not found at {}".format(args.db))
+    if not args.db and any(section.needs_db for section in selected):
+        parser.error("--db is required for {}".format(
+            ", ".join(section.key for section in selected if section.needs_db)))
+
+    cache = None
+    if args.cache or args.stats:
+        cache = SectionCache(args.cache or DEFAULT_CACHE_DIR, args.cache_size * 1024 * 1024)
+
+    output_format = args.format or FORMAT_EXTENSIONS.get(os.path.splitext(args.output)[1].lower(), 'pdf')
+    if args.profile and (args.watch or output_format != 'pdf'):
+        parser.error("--profile profiles a single PDF build; it can't be combined with --watch or non-PDF output")
+    if args.watch:
+        return watch_documentation(args.output, output_format, [section.key for section in selected],
+                                   db_path=args.db, cache=cache, debounce=args.debounce / 1000.0,
+                                   poll_interval=args.poll, optimize=args.optimize)
+    pdf_path = args.output
+    profile = BuildProfile() if args.profile else None
+    started = time.perf_counter()
+    report = None
+    if output_format == 'pdf' and args.optimize:
+        pages, report = build_optimized(pdf_path, sections=[section.key for section in selected],
+                                        db_path=args.db, cache=cache, jobs=args.jobs, profile=profile)
+    elif output_format == 'pdf':
+        pages = build_documentation(pdf_path, sections=[section.key for section in selected],
+                                    db_path=args.db, cache=cache, jobs=args.jobs, profile=profile)
+    else:
+        export_documentation(pdf_path, output_format, sections=[section.key for section in selected], db_path=args.db)
+    elapsed = time.perf_counter() - started
+    if profile is not None:
+        profile.close()
+        profile.write_trace(args.profile)
+    pdf_size = os.path.getsize(pdf_path) / 1024
+    print("\n" + "="*60)
+    print(f"✓ {output_format.upper()} DOCUMENTATION GENERATED SUCCESSFULLY!")
+    print("="*60)
+    print(f"📄 File Name: {pdf_path}")
+    print(f"📊 File Size: {pdf_size:.2f} KB")
+    if output_format == 'pdf':
+        print(f"📝 Total Pages: {pages}")
+    if report is not None:
+        print(f"🗜️ Optimized: {describe_optimization(report)}")
+    print(f"📍 Location: {os.path.dirname(os.path.abspath(pdf_path))}")
+    print("="*60)
+    print("\nDocumentation Contents:")
+    number = 0
+    for section in selected:
+        if section.heading:
+            number += 1
+            print(f"  {number}. {section.title}")
+    print("="*60)
+    if args.stats:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evictions ({cache.directory})")
+        print(f"Build time: {elapsed:.3f}s")
+    if profile is not None:
+        print("\nProfile (tracemalloc on):")
+        print(profile.format_summary())
+        print(f"📈 Trace: {args.profile} (open in chrome://tracing or ui.perfetto.dev)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bounded-memory table listings for the documentation appendices.
+
+Rows are read from SQLite in fixed-size batches and laid out by
+StreamingTable, a flowable that hands platypus one page-sized Table at a
+time. Only the current batch and the chunk being laid out are ever held in
+memory, however many rows the table has.
+
+Importing this module doesn't import platypus: iter_batches() is used by
+HTML and Markdown exports and migrate_to_postgres.py too, so StreamingTable
+is defined the first time streaming_table() is called.
+"""
+
+from db_introspect import connect_readonly
+from table_styles import auto_col_widths, get_table_style
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def iter_batches(db_path, sql, params=(), batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of up to `batch_size` rows; the connection lives only as
+    long as the iteration."""
+    conn = connect_readonly(db_path)
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+_StreamingTable = None
+
+
+def _streaming_table_class():
+    # Defined on first use, like build_profile's LayoutMarker: platypus is
+    # only loaded once a PDF is laid out
+    global _StreamingTable
+    if _StreamingTable is not None:
+        return _StreamingTable
+    from reportlab.platypus import Flowable, PageBreak, Table
+
+    class StreamingTable(Flowable):
+        """A table whose rows come from an iterator of batches.
+
+        It never fits a frame as a whole, so platypus asks it to split; each split
+        returns one Table chunk that fills the available space followed by a new
+        StreamingTable for the rest of the rows, or the last chunk alone. Where
+        not even the header and one row fit, it moves itself to the next page.
+        """
+
+        def __init__(self, header, batches, col_widths=None, style=None, pending=None, rows_hint=40, moved=False):
+            Flowable.__init__(self)
+            self.header = header
+            self.batches = batches
+            self.col_widths = col_widths
+            self.style = style or get_table_style('green', compact=True)
+            self.pending = pending or []
+            self.rows_hint = rows_hint
+            # Already moved to a fresh page because nothing fit
+            self.moved = moved
+
+        def _fill(self):
+            while not self.pending:
+                batch = next(self.batches, None)
+                if batch is None:
+                    return False
+                self.pending = batch
+            return True
+
+        def _table(self, rows):
+            table = Table([self.header] + rows, colWidths=self.col_widths, repeatRows=1)
+            table.setStyle(self.style)
+            return table
+
+        def _rest(self, used, rows_hint, moved=False):
+            return StreamingTable(self.header, self.batches, self.col_widths, self.style,
+                                  pending=self.pending[used:], rows_hint=rows_hint, moved=moved)
+
+        def wrap(self, availWidth, availHeight):
+            if not self._fill():
+                return (0, 0)
+            return (availWidth, availHeight + 1)
+
+        def split(self, availWidth, availHeight):
+            if not self._fill():
+                return []
+            if self.col_widths is None:
+                # Size the columns once, from the first batch, so every chunk lines up
+                self.col_widths = auto_col_widths([self.header] + self.pending, compact=True, avail_width=availWidth)
+            # Lay out only slightly more rows than the last chunk held, not the
+            # whole batch; while that fits, try twice as many, reading further
+            # batches if need be, so each chunk fills the space (a second chunk on
+            # the same page would repeat the header mid-page)
+            rows_hint = self.rows_hint
+            while True:
+                candidate = self.pending[:rows_hint + 1]
+                table = self._table(candidate)
+                parts = table.split(availWidth, availHeight)
+                if len(parts) != 1:
+                    break
+                if len(candidate) == len(self.pending):
+                    batch = next(self.batches, None)
+                    if batch is None:
+                        # The rest of the rows fit: this is the last chunk
+                        return [table]
+                    self.pending = self.pending + batch
+                rows_hint *= 2
+            used = len(parts[0]._cellvalues) - 1 if parts else 0
+            if used <= 0:
+                if self.moved:
+                    # Not even a fresh page holds the header and a row; let
+                    # platypus report the oversized table
+                    return [self._table(self.pending[:1]), self._rest(1, self.rows_hint)]
+                return [PageBreak(), self._rest(0, self.rows_hint, moved=True)]
+            return [parts[0], self._rest(used, max(used, 1))]
+
+        def draw(self):
+            pass
+
+    _StreamingTable = StreamingTable
+    return _StreamingTable
+
+
+def streaming_table(header, batches, col_widths=None, style=None):
+    """A StreamingTable flowable laying out the rows of `batches`, an iterator
+    of row lists, under `header`."""
+    return _streaming_table_class()(header, batches, col_widths, style)
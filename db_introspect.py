@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Schema introspection for the ZMS SQLite database.
+
+Everything is read on one read-only connection from the catalog
+(sqlite_master and the pragma table-valued functions), so no table rows are
+ever fetched into Python: row counts come from a single COUNT(*) aggregate
+per table and page usage from the dbstat virtual table when it is compiled in.
+"""
+
+from collections import namedtuple
+import os
+import re
+import sqlite3
+import sys
+from urllib.parse import quote
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'zoo.db')
+INIT_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'src', 'db', 'init.ts')
+
+Column = namedtuple('Column', 'name type notnull default pk')
+ForeignKey = namedtuple('ForeignKey', 'column table ref_column')
+TableInfo = namedtuple('TableInfo', 'name columns foreign_keys indexes row_count pages size_bytes')
+
+
+def connect_readonly(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError("SQLite database not found at {}".format(path))
+    # Quoted, so a '?', '#' or '%' in the path isn't read as URI syntax
+    return sqlite3.connect('file:{}?mode=ro'.format(quote(os.path.abspath(path))), uri=True)
+
+
+def database_signature(path):
+    """Cheap change detector for a database file: path, size and mtime of the
+    main file and its WAL, without opening a connection."""
+    signature = [os.path.abspath(path)]
+    for name in (path, path + '-wal'):
+        try:
+            st = os.stat(name)
+        except FileNotFoundError:
+            continue
+        signature.append((st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+
+def schema_from_init_script(path=INIT_SCRIPT_PATH):
+    """The CREATE TABLE statements from backend/src/db/init.ts, adapted to SQLite."""
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    statements = re.findall(r"CREATE TABLE IF NOT EXISTS.*?\);", source, re.S)
+    return [statement.replace('SERIAL PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT')
+            for statement in statements]
+
+
+def quote_ident(name):
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _page_usage(conn):
+    """Return {table: (pages, bytes)} from dbstat, or None if it is unavailable.
+
+    Index b-trees are folded into the table they belong to.
+    """
+    try:
+        rows = conn.execute(
+            "SELECT m.tbl_name, COUNT(*), SUM(s.pgsize) "
+            "FROM dbstat AS s JOIN sqlite_master AS m ON m.name = s.name "
+            "GROUP BY m.tbl_name"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return {name: (pages, size) for name, pages, size in rows}
+
+
+def introspect_database(path=DEFAULT_DB_PATH):
+    """Return a list of TableInfo for every user table in `path`, by name."""
+    conn = connect_readonly(path)
+    try:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        if not names:
+            return []
+
+        columns = {name: [] for name in names}
+        for table, name, type_, notnull, default, pk in conn.execute(
+            "SELECT m.name, p.name, p.type, p.\"notnull\", p.dflt_value, p.pk "
+            "FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+            "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%' "
+            "ORDER BY m.name, p.cid"
+        ):
+            columns[table].append(Column(name, type_, bool(notnull), default, pk))
+
+        foreign_keys = {name: [] for name in names}
+        for table, column, ref_table, ref_column in conn.execute(
+            "SELECT m.name, f.\"from\", f.\"table\", f.\"to\" "
+            "FROM sqlite_master AS m JOIN pragma_foreign_key_list(m.name) AS f "
+            "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%' "
+            "ORDER BY m.name, f.id, f.seq"
+        ):
+            foreign_keys[table].append(ForeignKey(column, ref_table, ref_column))
+
+        indexes = {name: [] for name in names}
+        for table, index in conn.execute(
+            "SELECT m.name, i.name "
+            "FROM sqlite_master AS m JOIN pragma_index_list(m.name) AS i "
+            "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%' "
+            "ORDER BY m.name, i.name"
+        ):
+            indexes[table].append(index)
+
+        # One statement, one aggregate per table; rows stay inside SQLite
+        counts = dict(conn.execute(" UNION ALL ".join(
+            "SELECT ?, COUNT(*) FROM {}".format(quote_ident(name)) for name in names
+        ), names).fetchall())
+
+        usage = _page_usage(conn)
+    finally:
+        conn.close()
+
+    tables = []
+    for name in names:
+        pages, size = usage.get(name, (0, 0)) if usage is not None else (None, None)
+        tables.append(TableInfo(name, columns[name], foreign_keys[name], indexes[name],
+                                counts[name], pages, size))
+    return tables
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH
+    for table in introspect_database(db_path):
+        pages = '-' if table.pages is None else table.pages
+        print(f"{table.name}: {table.row_count} rows, {pages} pages, "
+              f"{len(table.columns)} columns, {len(table.foreign_keys)} foreign keys")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format-neutral document model for the ZMS documentation.
+
+Section builders in create_docs.py return lists of the blocks below; the PDF
+renderer there turns them into reportlab flowables, while render_html() and
+render_markdown() here write them straight to a text stream without any
+page layout. Text fields hold the reportlab paragraph markup the sections
+were written in: XML-escaped text with <b>, <i> and <br/> tags.
+
+DataTable rows come from an iterator of batches and are written as they are
+read, so exporting a large appendix holds one batch in memory at a time.
+"""
+
+from collections import namedtuple
+from html import escape as html_escape, unescape
+import re
+
+from table_styles import PALETTES
+
+# level 0 is the document title, 1 a numbered section heading, 2 a sub-heading
+Heading = namedtuple('Heading', 'text level', defaults=(2,))
+# style is a key of create_docs.get_styles(); 'cell' and 'cell_code' are for table cells
+Para = namedtuple('Para', 'text style', defaults=('body',))
+# Plain (unescaped) preformatted text
+Code = namedtuple('Code', 'text')
+# rows[0] is the header; cells are plain strings or Para. col_widths in points
+# are a PDF hint; right_align lists column indices whose body cells align right
+Table = namedtuple('Table', 'rows palette col_widths compact right_align',
+                   defaults=('blue', None, False, ()))
+# A table listing whose rows arrive in batches (lists of lists of strings)
+DataTable = namedtuple('DataTable', 'header batches col_widths palette', defaults=(None, 'green'))
+# kind is 'line', 'bar' or 'pie'
+Chart = namedtuple('Chart', 'kind labels values')
+# Vertical space in points, and a forced page break; only paged output uses them
+Space = namedtuple('Space', 'height')
+Break = namedtuple('Break', '')
+
+
+_TAG = re.compile(r'<(/?)(\w+)\s*/?>')
+_SPACE = re.compile(r'\s+')
+
+
+def markup_to_html(text):
+    # The markup is already XML-escaped, and <b>, <i> and <br/> are HTML too
+    return _SPACE.sub(' ', text).strip()
+
+
+def markup_to_markdown(text, line_break='  \n'):
+    def tag(match):
+        name = match.group(2).lower()
+        if name == 'br':
+            return '\n'
+        if name == 'b':
+            return '**'
+        if name == 'i':
+            return '*'
+        return ''
+
+    text = _TAG.sub(tag, _SPACE.sub(' ', text).strip())
+    lines = [line.strip() for line in text.split('\n')]
+    return unescape(line_break.join(lines)).strip()
+
+
+def _number(value):
+    return '{:,}'.format(value) if isinstance(value, int) else '{:,.2f}'.format(value)
+
+
+def _cell_html(cell):
+    return markup_to_html(cell.text) if isinstance(cell, Para) else html_escape(str(cell))
+
+
+def _cell_markdown(cell):
+    text = markup_to_markdown(cell.text, '<br>') if isinstance(cell, Para) else str(cell)
+    return text.replace('|', '\\|').replace('\n', ' ')
+
+
+# HTML
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Helvetica, Arial, sans-serif; color: #374151; max-width: 60em; margin: 2em auto; padding: 0 1em; line-height: 1.4; }}
+h1 {{ color: #1F2937; text-align: center; }}
+h2 {{ color: #374151; background: #EFF6FF; border: 2px solid #3B82F6; padding: 0.4em 0.6em; margin-top: 2em; }}
+h3 {{ color: #1F2937; }}
+pre {{ background: #F3F4F6; border: 1px solid #D1D5DB; padding: 0.8em; overflow-x: auto; }}
+table {{ border-collapse: collapse; margin: 0.5em 0 1em; font-size: 0.85em; }}
+th, td {{ padding: 0.35em 0.6em; text-align: left; vertical-align: top; }}
+td.num {{ text-align: right; }}
+.code {{ font-family: Courier, monospace; font-size: 0.9em; }}
+.bar {{ height: 0.8em; background: #3B82F6; }}
+{palettes}
+</style>
+</head>
+<body>
+"""
+
+
+def _palette_css():
+    rules = []
+    for name, (header, body, grid) in sorted(PALETTES.items()):
+        rules.append('table.{0} th {{ background: {1}; color: white; }} '
+                     'table.{0} th, table.{0} td {{ border: 1px solid {3}; }} '
+                     'table.{0} tr:nth-child(odd) td {{ background: {2}; }}'.format(name, header, body, grid))
+    return '\n'.join(rules)
+
+
+def _write_html_rows(out, rows, right_align=()):
+    for row in rows:
+        out.write('<tr>')
+        for c, cell in enumerate(row):
+            if c in right_align:
+                out.write('<td class="num">{}</td>'.format(_cell_html(cell)))
+            elif isinstance(cell, Para) and cell.style == 'cell_code':
+                out.write('<td class="code">{}</td>'.format(_cell_html(cell)))
+            else:
+                out.write('<td>{}</td>'.format(_cell_html(cell)))
+        out.write('</tr>\n')
+
+
+def render_html(blocks, out, title=''):
+    """Write `blocks` to the text stream `out` as a standalone HTML page."""
+    out.write(_HTML_HEAD.format(title=html_escape(title), palettes=_palette_css()))
+    for block in blocks:
+        if isinstance(block, Heading):
+            level = block.level + 1
+            out.write('<h{0}>{1}</h{0}>\n'.format(level, markup_to_html(block.text)))
+        elif isinstance(block, Para):
+            css = ' class="code"' if block.style == 'cell_code' else ''
+            out.write('<p{}>{}</p>\n'.format(css, markup_to_html(block.text)))
+        elif isinstance(block, Code):
+            out.write('<pre>{}</pre>\n'.format(html_escape(block.text.strip('\n'))))
+        elif isinstance(block, Table):
+            out.write('<table class="{}">\n<tr>{}</tr>\n'.format(
+                block.palette, ''.join('<th>{}</th>'.format(_cell_html(cell)) for cell in block.rows[0])))
+            _write_html_rows(out, block.rows[1:], block.right_align)
+            out.write('</table>\n')
+        elif isinstance(block, DataTable):
+            out.write('<table class="{}">\n<tr>{}</tr>\n'.format(
+                block.palette, ''.join('<th>{}</th>'.format(html_escape(cell)) for cell in block.header)))
+            for batch in block.batches:
+                _write_html_rows(out, batch)
+            out.write('</table>\n')
+        elif isinstance(block, Chart):
+            # No plotting outside the PDF: a table with proportional bars
+            top = max([value or 0 for value in block.values] or [0]) or 1
+            total = sum(value or 0 for value in block.values) or 1
+            out.write('<table class="blue">\n')
+            for label, value in zip(block.labels, block.values):
+                value = value or 0
+                share = ' ({:.1f}%)'.format(100.0 * value / total) if block.kind == 'pie' else ''
+                out.write('<tr><td>{}</td><td class="num">{}{}</td>'
+                          '<td style="width: 20em"><div class="bar" style="width: {:.1f}%"></div></td></tr>\n'.format(
+                              html_escape(str(label)), _number(value), share, 100.0 * value / top))
+            out.write('</table>\n')
+    out.write('</body>\n</html>\n')
+
+
+# Markdown
+def _write_markdown_rows(out, rows):
+    for row in rows:
+        out.write('| {} |\n'.format(' | '.join(_cell_markdown(cell) for cell in row)))
+
+
+def render_markdown(blocks, out, title=''):
+    """Write `blocks` to the text stream `out` as GitHub-flavoured Markdown."""
+    for block in blocks:
+        if isinstance(block, Heading):
+            out.write('{} {}\n\n'.format('#' * (block.level + 1), markup_to_markdown(block.text, ' ')))
+        elif isinstance(block, Para):
+            out.write(markup_to_markdown(block.text) + '\n\n')
+        elif isinstance(block, Code):
+            out.write('```\n{}\n```\n\n'.format(block.text.strip('\n')))
+        elif isinstance(block, Table):
+            _write_markdown_rows(out, block.rows[:1])
+            out.write('|{}\n'.format(''.join('---:|' if c in block.right_align else '---|'
+                                              for c in range(len(block.rows[0])))))
+            _write_markdown_rows(out, block.rows[1:])
+            out.write('\n')
+        elif isinstance(block, DataTable):
+            _write_markdown_rows(out, [block.header])
+            out.write('|{}\n'.format('---|' * len(block.header)))
+            for batch in block.batches:
+                _write_markdown_rows(out, batch)
+            out.write('\n')
+        elif isinstance(block, Chart):
+            out.write('| | Value |\n|---|---:|\n')
+            for label, value in zip(block.labels, block.values):
+                out.write('| {} | {} |\n'.format(str(label).replace('|', '\\|'), _number(value or 0)))
+            out.write('\n')
+
+
+RENDERERS = {
+    'html': render_html,
+    'markdown': render_markdown,
+}
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Change notification for files and directory trees.
+
+On Linux the kernel's inotify API is used directly through ctypes: one watch
+per directory (the parent directory for a watched file, so editors that save
+by writing a new file and renaming it over the old one are still seen), and
+the process sleeps in select() until something changes. Elsewhere, or if
+inotify is unavailable, the watched paths are polled for mtime and size
+changes instead.
+
+    watcher = open_watcher(['backend/src/index.ts', 'src/pages'])
+    while True:
+        changed = wait_for_changes(watcher, debounce=0.2)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+DEFAULT_DEBOUNCE = 0.2
+DEFAULT_POLL_INTERVAL = 0.5
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct('iIII')
+
+
+def _walk_dirs(root):
+    yield root
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [name for name in dirnames if not name.startswith('.') and name != 'node_modules']
+        for name in dirnames:
+            yield os.path.join(dirpath, name)
+
+
+class InotifyWatcher(object):
+    """Watches files (through their directories) and whole directory trees."""
+    kind = 'inotify'
+
+    def __init__(self, paths):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}     # watch descriptor -> directory
+        self._files = {}    # directory -> names of the watched files in it
+        self._trees = []    # watched directory trees
+        try:
+            for path in paths:
+                path = os.path.abspath(path)
+                if os.path.isdir(path):
+                    self._trees.append(path)
+                    for directory in _walk_dirs(path):
+                        self._add(directory)
+                else:
+                    directory, name = os.path.split(path)
+                    self._files.setdefault(directory, set()).add(name)
+                    self._add(directory)
+        except BaseException:
+            self.close()
+            raise
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK | IN_ONLYDIR)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, "Can't watch {}: {}".format(directory, os.strerror(errno)))
+        self._dirs[wd] = directory
+
+    def _in_tree(self, path):
+        return any(path == tree or path.startswith(tree + os.sep) for tree in self._trees)
+
+    def changes(self, timeout=None):
+        """Changed paths reported within `timeout` seconds (None: wait for
+        the first), as a set; empty if nothing changed."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: report everything
+                changed.update(self._trees)
+                changed.update(os.path.join(directory, name)
+                               for directory, names in self._files.items() for name in names)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            if self._in_tree(path):
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Watch new subdirectories, and count files that arrived before the watch did
+                    for subdirectory in _walk_dirs(path):
+                        try:
+                            self._add(subdirectory)
+                        except OSError:
+                            pass
+                changed.add(path)
+            elif name and os.fsdecode(name) in self._files.get(directory, ()):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(object):
+    """Compares the mtime and size of every watched file every `interval` seconds."""
+    kind = 'polling'
+
+    def __init__(self, paths, interval=DEFAULT_POLL_INTERVAL):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                for directory in _walk_dirs(path):
+                    try:
+                        names = os.listdir(directory)
+                    except OSError:
+                        continue
+                    for name in names:
+                        self._stat(os.path.join(directory, name), snapshot)
+            else:
+                self._stat(path, snapshot)
+        return snapshot
+
+    @staticmethod
+    def _stat(path, snapshot):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        snapshot[path] = (st.st_mtime_ns, st.st_size)
+
+    def changes(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = set(path for path in set(snapshot) | set(self._snapshot)
+                          if snapshot.get(path) != self._snapshot.get(path))
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else
+                       max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+def open_watcher(paths, poll_interval=None):
+    """An InotifyWatcher for `paths` where possible, else a PollingWatcher.
+    With `poll_interval` polling is used regardless."""
+    paths = [path for path in paths if os.path.exists(path) or os.path.isdir(os.path.dirname(os.path.abspath(path)))]
+    if poll_interval is None:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, poll_interval or DEFAULT_POLL_INTERVAL)
+
+
+def wait_for_changes(watcher, debounce=DEFAULT_DEBOUNCE):
+    """Block until something changes, then keep collecting changes until the
+    paths have been quiet for `debounce` seconds; returns every changed path."""
+    changed = set()
+    while not changed:
+        changed = watcher.changes()
+    while True:
+        more = watcher.changes(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+if __name__ == "__main__":
+    watcher = open_watcher(sys.argv[1:] or ['.'])
+    print(f"👀 Watching {', '.join(sys.argv[1:] or ['.'])} ({watcher.kind})")
+    try:
+        while True:
+            for path in sorted(wait_for_changes(watcher)):
+                print(f"  changed: {path}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fonts for the PDF renderer.
+
+The base-14 fonts (Helvetica, Courier) have no Arabic-script glyphs, so runs
+of Urdu or Arabic text are set in DejaVu Sans, bundled as
+fonts/DejaVuSans.ttf (see fonts/LICENSE), and registered with reportlab as
+ARABIC_FONT. reportlab embeds TrueType fonts as subsets holding only the
+glyphs the document uses, so the font costs a few kilobytes per document
+rather than its file size. Set ZMS_ARABIC_FONT to the path of another .ttf
+file to use that instead.
+
+Arabic script also has to be shaped (each letter takes its initial, medial,
+final or isolated form, and lam-alef becomes one ligature) and laid out right
+to left before reportlab, which draws characters one glyph each in logical
+order, can set it. shape() does both here, with the presentation forms from
+the Unicode database Python ships, so no shaping engine is needed. A form
+the font has no glyph for is replaced by the plain letter.
+"""
+
+import os
+import re
+import sys
+import unicodedata
+
+ARABIC_FONT = 'ZMS-Arabic'
+ARABIC_FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts', 'DejaVuSans.ttf')
+
+# Arabic, Arabic Supplement, Arabic Extended-A and the presentation forms;
+# a run may contain spaces and zero-width non-joiners between words
+_LETTERS = '\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF'
+_ARABIC_RUN = re.compile('[{0}](?:[{0}\\s\u200c]*[{0}])?'.format(_LETTERS))
+
+LAM = '\u0644'
+TATWEEL = '\u0640'
+ZWNJ, ZWJ = '\u200c', '\u200d'
+# Arabic-Indic and Extended Arabic-Indic digits, with the decimal and
+# thousands separators; numbers read left to right inside right-to-left text
+_DIGITS = set(map(chr, range(0x0660, 0x066A))) | set(map(chr, range(0x06F0, 0x06FA))) | {'\u066b', '\u066c'}
+_FORM_TAGS = {'<isolated>': 'isolated', '<final>': 'final', '<initial>': 'initial', '<medial>': 'medial'}
+
+# {letter: {form: presentation form}} and {lam + alef: {form: ligature}},
+# filled from the Unicode database on first use
+_FORMS = {}
+_LAM_ALEF = {}
+
+_font = {}
+_warned = set()
+
+
+def _warn(message):
+    if message not in _warned:
+        _warned.add(message)
+        print("⚠️ {}".format(message), file=sys.stderr)
+
+
+def arabic_font_path():
+    """The .ttf used for Arabic-script text, or None if there is none."""
+    if 'path' not in _font:
+        path = os.environ.get('ZMS_ARABIC_FONT') or ARABIC_FONT_PATH
+        _font['path'] = path if os.path.exists(path) else None
+    return _font['path']
+
+
+def register_arabic_font():
+    """Register ARABIC_FONT with reportlab; returns its name, or None."""
+    if 'name' in _font:
+        return _font['name']
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    path = arabic_font_path()
+    _font['name'] = None
+    if path is None:
+        _warn("No font for Arabic-script text: {} is missing and ZMS_ARABIC_FONT is not set".format(ARABIC_FONT_PATH))
+        return None
+    try:
+        font = TTFont(ARABIC_FONT, path)
+        pdfmetrics.registerFont(font)
+    except Exception as e:
+        _warn("Can't use {} for Arabic-script text: {}".format(path, e))
+        return None
+    _font['name'] = ARABIC_FONT
+    # Code points the font has glyphs for
+    _font['covers'] = frozenset(font.face.charToGlyph)
+    return ARABIC_FONT
+
+
+def _load_forms():
+    for code in range(0xFB50, 0xFF00):
+        decomposition = unicodedata.decomposition(chr(code)).split()
+        if len(decomposition) < 2 or decomposition[0] not in _FORM_TAGS:
+            continue
+        form = _FORM_TAGS[decomposition[0]]
+        letters = ''.join(chr(int(point, 16)) for point in decomposition[1:])
+        if len(letters) == 1:
+            _FORMS.setdefault(letters, {}).setdefault(form, chr(code))
+        elif len(letters) == 2 and letters[0] == LAM:
+            _LAM_ALEF.setdefault(letters, {}).setdefault(form, chr(code))
+
+
+def _joins_next(char):
+    """Whether `char` connects to the letter after it (dual-joining)."""
+    forms = _FORMS.get(char, ())
+    return 'initial' in forms or 'medial' in forms or char in (TATWEEL, ZWJ)
+
+
+def _joins_previous(char):
+    """Whether `char` connects to the letter before it."""
+    return 'final' in _FORMS.get(char, ()) or char in (TATWEEL, ZWJ)
+
+
+def _transparent(char):
+    # Vowel marks and other combining marks sit on a letter and don't break joining
+    return unicodedata.category(char) == 'Mn'
+
+
+def _join(text, covers):
+    """`text` in logical order with each letter replaced by its contextual form."""
+    if not _FORMS:
+        _load_forms()
+    usable = (lambda glyph: glyph is not None) if covers is None else \
+        (lambda glyph: glyph is not None and ord(glyph) in covers)
+    # Indexes of the letters, skipping marks, so neighbours are found past them
+    letters = [i for i, char in enumerate(text) if not _transparent(char)]
+    shaped = list(text)
+    skip = set()
+    for n, i in enumerate(letters):
+        if i in skip:
+            continue
+        char = text[i]
+        previous = text[letters[n - 1]] if n > 0 else None
+        following = letters[n + 1] if n + 1 < len(letters) else None
+        joined_before = previous is not None and _joins_next(previous) and _joins_previous(char)
+        if char == LAM and following == i + 1:
+            ligature = _LAM_ALEF.get(char + text[following], {}).get('final' if joined_before else 'isolated')
+            if usable(ligature):
+                shaped[i] = ligature
+                shaped[following] = ''
+                skip.add(following)
+                continue
+        joined_after = following is not None and _joins_next(char) and _joins_previous(text[following])
+        form = ('medial' if joined_after else 'final') if joined_before else ('initial' if joined_after else 'isolated')
+        glyph = _FORMS.get(char, {}).get(form)
+        if usable(glyph):
+            shaped[i] = glyph
+    return ''.join(char for char in shaped if char not in (ZWNJ, ZWJ))
+
+
+def _visual(text):
+    """Right-to-left `text` in left-to-right drawing order: letters, each with
+    its marks, are reversed, and runs of digits keep their order."""
+    clusters = []
+    for char in text:
+        if clusters and (_transparent(char) or (char in _DIGITS and clusters[-1][-1] in _DIGITS)):
+            clusters[-1] += char
+        else:
+            clusters.append(char)
+    return ''.join(reversed(clusters))
+
+
+def shape(text, covers=None):
+    """Arabic-script `text` as contextual glyph forms in visual (left to right)
+    order. `covers`, if given, holds the code points the font has glyphs for."""
+    return _visual(_join(text, covers))
+
+
+def has_arabic(text):
+    return _ARABIC_RUN.search(text) is not None
+
+
+def arabic_markup(text):
+    """Paragraph markup `text` with every Arabic-script run shaped and set in
+    ARABIC_FONT. Text without such runs is returned unchanged, cheaply."""
+    if not has_arabic(text):
+        return text
+    font = register_arabic_font()
+    if font is None:
+        return text
+    covers = _font['covers']
+    return _ARABIC_RUN.sub(lambda match: '<font name="{}">{}</font>'.format(font, shape(match.group(0), covers)), text)
+
+
+if __name__ == "__main__":
+    path = arabic_font_path()
+    print(f"Arabic-script font: {path or 'none'}")
+    sample = ' '.join(sys.argv[1:]) or "مکمل تکنیکی ڈاکومنٹیشن"
+    print(shape(sample))
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inventory of the React frontend in src/.
+
+Every .ts/.tsx file is scanned on a thread pool for its size, its imports
+and its calls to the api object from src/utils/api.ts, telling apart the
+calls made when the component mounts (inside a useEffect, or in a local
+function a useEffect calls) and whether those run together in a
+Promise.all() or one after another. Routes come from the <Route> elements
+in src/App.tsx, and the HTTP method and path of each api function from
+api.ts itself.
+
+Scan results are memoized in-process and on disk by the SHA-256 of each
+file's content, so a repeat run reads every file but only parses the ones
+that changed.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import re
+import sys
+
+from section_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+SOURCE_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx')
+# Pages issuing at least this many requests on mount are flagged
+MANY_FETCHES = 3
+SCAN_THREADS = 8
+
+# path is relative to src/ with forward slashes. imports are the module
+# specifiers as written; load_calls are (api function, in Promise.all) pairs
+SourceFile = namedtuple('SourceFile', 'path size lines digest imports api_calls load_calls')
+ApiFunction = namedtuple('ApiFunction', 'name method path')
+PageRoute = namedtuple('PageRoute', 'path component module protected')
+# bundle_size is the size of the page plus every src/ module it imports,
+# directly or not; imported_by lists the src/ files that import the page
+Page = namedtuple('Page', 'path routes size bundle_size modules imported_by load_calls parallel')
+Inventory = namedtuple('Inventory', 'files routes api pages')
+
+_IMPORT = re.compile(r"""^\s*import\s+(?:[\w*{}\s,]+\s+from\s+)?['"]([^'"]+)['"]""", re.M)
+_API_CALL = re.compile(r'\bapi\.(\w+)\s*\(')
+_EFFECT = re.compile(r'\b(?:React\.)?useEffect\s*\(')
+_LOCAL_FUNCTION = re.compile(
+    r'\b(?:const|let)\s+(\w+)\s*=\s*(?:async\s*)?(?:\([^()]*\)|\w+)\s*=>\s*\{'
+    r'|\b(?:async\s+)?function\s+(\w+)\s*\([^()]*\)\s*\{')
+_CALL = re.compile(r'\b(\w+)\s*\(')
+_PROMISE_ALL = re.compile(r'\bPromise\.all\s*\(')
+_ROUTE = re.compile(r'<Route\b[^>]*?\bpath="([^"]*)"\s+element=\{(.*?)\}\s*/>', re.S)
+_COMPONENT = re.compile(r'<([A-Z]\w*)')
+_NAMED_IMPORT = re.compile(r"""import\s*\{([^}]*)\}\s*from\s*['"]([^'"]+)['"]""")
+_API_FUNCTION = re.compile(
+    r'^\s*(\w+):\s*\([^()]*\)\s*=>\s*fetch\(\s*`\$\{API_BASE_URL\}([^`]*)`(\s*,\s*\{\s*method:\s*[\'"](\w+)[\'"])?', re.M)
+
+_memo = {}
+
+
+def _matching(source, start):
+    """Index just past the bracket that closes the one at source[start].
+    Brackets are counted everywhere: skipping quotes would trip over the
+    apostrophes in JSX text, which are far more common than unbalanced
+    brackets inside strings."""
+    pairs = {'(': ')', '{': '}', '[': ']'}
+    stack = []
+    for i in range(start, len(source)):
+        ch = source[i]
+        if ch in pairs:
+            stack.append(pairs[ch])
+        elif stack and ch == stack[-1]:
+            stack.pop()
+            if not stack:
+                return i + 1
+    return len(source)
+
+
+def _load_calls(source):
+    """(api function, in Promise.all) for the calls made on mount, in order."""
+    functions = {}
+    for match in _LOCAL_FUNCTION.finditer(source):
+        functions[match.group(1) or match.group(2)] = (match.end() - 1, _matching(source, match.end() - 1))
+    spans = []
+    pending = [(match.end() - 1, _matching(source, match.end() - 1)) for match in _EFFECT.finditer(source)]
+    seen = set()
+    while pending:
+        span = pending.pop()
+        if span in seen:
+            continue
+        seen.add(span)
+        spans.append(span)
+        for match in _CALL.finditer(source, *span):
+            if match.group(1) in functions:
+                pending.append(functions[match.group(1)])
+
+    together = [(match.end() - 1, _matching(source, match.end() - 1)) for match in _PROMISE_ALL.finditer(source)]
+    calls = {}
+    for start, end in spans:
+        for match in _API_CALL.finditer(source, start, end):
+            calls[match.start()] = (match.group(1), any(a <= match.start() < b for a, b in together))
+    return [calls[position] for position in sorted(calls)]
+
+
+def parse_source(path, source):
+    """A SourceFile for `source` (the text of the file at `path`, relative to src/)."""
+    data = source.encode('utf-8')
+    api_calls = []
+    for name in _API_CALL.findall(source):
+        if name not in api_calls:
+            api_calls.append(name)
+    return SourceFile(path, len(data), source.count('\n') + 1, hashlib.sha256(data).hexdigest(),
+                      _IMPORT.findall(source), api_calls, _load_calls(source))
+
+
+def _cache_path(cache_dir, src_dir):
+    name = hashlib.sha256(os.path.abspath(src_dir).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, 'frontend-{}.json'.format(name))
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            return {digest: SourceFile(*entry) for digest, entry in json.load(f).items()}
+    except (OSError, ValueError, TypeError, AttributeError):
+        return {}
+
+
+def scan_sources(src_dir=DEFAULT_SRC_DIR, cache_dir=DEFAULT_CACHE_DIR, threads=SCAN_THREADS):
+    """SourceFiles for every source file under `src_dir`, sorted by path."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        dirnames[:] = sorted(name for name in dirnames if name != 'node_modules' and not name.startswith('.'))
+        paths.extend(os.path.join(dirpath, name) for name in filenames if name.endswith(SOURCE_EXTENSIONS))
+
+    cache_path = _cache_path(cache_dir, src_dir) if cache_dir else None
+    known = _read_cache(cache_path) if cache_path else {}
+    known.update(_memo)
+
+    def scan(full_path):
+        relative = os.path.relpath(full_path, src_dir).replace(os.sep, '/')
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        cached = known.get(digest)
+        if cached is not None:
+            return cached._replace(path=relative), False
+        return parse_source(relative, data.decode('utf-8')), True
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(scan, paths))
+    files = sorted((source for source, _ in results), key=lambda source: source.path)
+    for source in files:
+        _memo[source.digest] = source
+
+    if cache_path and any(parsed for _, parsed in results):
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = cache_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({source.digest: list(source) for source in files}, f)
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass
+    return files
+
+
+def parse_api(source):
+    """{name: ApiFunction} for the functions of the real api object in api.ts."""
+    functions = {}
+    for match in _API_FUNCTION.finditer(source):
+        path = re.sub(r'\$\{(\w+)\}', r':\1', '/api' + match.group(2))
+        functions[match.group(1)] = ApiFunction(match.group(1), (match.group(4) or 'GET').upper(), path)
+    return functions
+
+
+def parse_app_routes(source):
+    """PageRoutes for the <Route> elements in App.tsx, with the module each
+    page component is imported from."""
+    modules = {}
+    for names, module in _NAMED_IMPORT.findall(source):
+        for name in names.split(','):
+            name = name.split(' as ')[-1].strip()
+            if name:
+                modules[name] = module
+    routes = []
+    for path, element in _ROUTE.findall(source):
+        components = [name for name in _COMPONENT.findall(element) if name != 'ProtectedRoute']
+        component = components[-1] if components else None
+        routes.append(PageRoute(path, component, modules.get(component), 'ProtectedRoute' in element))
+    return routes
+
+
+def resolve_import(importer, specifier, paths):
+    """The src-relative path `specifier` refers to from the file `importer`,
+    or None for packages and files outside the scan."""
+    if not specifier.startswith('.'):
+        return None
+    base = os.path.normpath(os.path.join(os.path.dirname(importer), specifier)).replace(os.sep, '/')
+    for candidate in [base] + [base + ext for ext in SOURCE_EXTENSIONS] + \
+            [base + '/index' + ext for ext in SOURCE_EXTENSIONS]:
+        if candidate in paths:
+            return candidate
+    return None
+
+
+def source_signature(src_dir=DEFAULT_SRC_DIR):
+    """Cheap change detector for the tree: path, size and mtime of every source file."""
+    signature = []
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        dirnames[:] = sorted(name for name in dirnames if name != 'node_modules' and not name.startswith('.'))
+        for name in sorted(filenames):
+            if name.endswith(SOURCE_EXTENSIONS):
+                st = os.stat(os.path.join(dirpath, name))
+                signature.append((os.path.relpath(os.path.join(dirpath, name), src_dir), st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+
+def build_inventory(src_dir=DEFAULT_SRC_DIR, cache_dir=DEFAULT_CACHE_DIR):
+    files = scan_sources(src_dir, cache_dir)
+    by_path = {source.path: source for source in files}
+
+    def read(relative):
+        path = os.path.join(src_dir, relative)
+        if not os.path.exists(path):
+            return ''
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    api = parse_api(read('utils/api.ts'))
+    routes = parse_app_routes(read('App.tsx'))
+    graph = {source.path: [target for target in (resolve_import(source.path, spec, by_path) for spec in source.imports)
+                           if target] for source in files}
+
+    pages = []
+    for source in files:
+        if not source.path.startswith('pages/'):
+            continue
+        # Everything the page pulls in from src/, i.e. its share of the bundle
+        closure = set()
+        pending = [source.path]
+        while pending:
+            path = pending.pop()
+            if path not in closure:
+                closure.add(path)
+                pending.extend(graph.get(path, []))
+        page_routes = [route for route in routes
+                       if resolve_import('App.tsx', route.module or '', by_path) == source.path]
+        load_calls = [name for name, _ in source.load_calls]
+        parallel = bool(source.load_calls) and all(together for _, together in source.load_calls)
+        imported_by = [path for path, targets in graph.items() if source.path in targets]
+        pages.append(Page(source.path, page_routes, source.size, sum(by_path[path].size for path in closure),
+                          len(closure), imported_by, load_calls, parallel))
+    return Inventory(files, routes, api, pages)
+
+
+if __name__ == "__main__":
+    inventory = build_inventory(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SRC_DIR)
+    for page in inventory.pages:
+        routes = ', '.join(route.path for route in page.routes) or '(not routed)'
+        flag = ' ⚠' if len(page.load_calls) >= MANY_FETCHES else ''
+        print(f"{page.path:40} {routes:18} {page.bundle_size / 1024:6.1f} KB, "
+              f"{len(page.load_calls)} fetches on load{flag}")
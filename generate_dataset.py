@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic ZMS database generator for load testing.
+
+Fills a SQLite file with the init.ts schema at any scale: cages, animals,
+visitors, ticket sales, medical checks and vaccinations, plus the small
+reference tables (zoo info, tickets, doctors, employees, events, inventory,
+users). Every foreign key points at a row that exists, and values follow
+the seed data's vocabulary with skewed rather than uniform distributions:
+species live in cages of a matching type, most animals are healthy, sales
+peak at weekends and in summer, and most orders are for one or two tickets.
+
+Rows are written with executemany() in large transactions, with WAL and
+synchronous=OFF while loading. With --jobs N the big tables are generated
+in N processes, each into its own shard file, and the shards are merged
+into the output with INSERT ... SELECT at the end.
+
+    python generate_dataset.py zoo-1m.db --rows 1000000 --jobs 4
+    python generate_dataset.py zoo-small.db --rows 1000 --sales 50000
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import accumulate
+import argparse
+import math
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from db_introspect import schema_from_init_script
+
+CHUNK_ROWS = 50000
+
+# species -> cage type, lifespan in years
+SPECIES = {
+    'Lion': ('Outdoor', 20), 'Tiger': ('Outdoor', 20), 'Elephant': ('Outdoor', 60),
+    'Zebra': ('Outdoor', 25), 'Giraffe': ('Mixed', 25), 'Bear': ('Mixed', 30),
+    'Flamingo': ('Aviary', 40), 'Parrot': ('Aviary', 50), 'Penguin': ('Indoor/Pool', 20),
+    'Sea Lion': ('Indoor/Pool', 25), 'Python': ('Indoor', 25), 'Tortoise': ('Indoor', 80),
+}
+SPECIES_NAMES = list(SPECIES)
+SPECIES_CUM_WEIGHTS = list(accumulate([6, 4, 2, 6, 4, 3, 8, 10, 9, 4, 5, 3]))
+CAGE_TYPES = sorted(set(cage_type for cage_type, _ in SPECIES.values()))
+CAGE_CAPACITY = {'Outdoor': (3, 12), 'Mixed': (4, 10), 'Aviary': (20, 60), 'Indoor/Pool': (10, 30), 'Indoor': (20, 50)}
+ZONES = ['North Zone', 'South Zone', 'East Zone', 'West Zone', 'Central Zone']
+
+ANIMAL_NAMES = ['Simba', 'Nala', 'Dumbo', 'Melman', 'Skipper', 'Leo', 'Ella', 'Kaa', 'Rico', 'Zara',
+                'Koda', 'Luna', 'Max', 'Ruby', 'Oscar', 'Kiki', 'Bruno', 'Maya', 'Tito', 'Nova']
+HEALTH = ['Healthy', 'Under Observation', 'Sick', 'Recovering']
+HEALTH_CUM_WEIGHTS = list(accumulate([85, 7, 3, 5]))
+NOTES = ['', '', '', 'Good appetite', 'Playful, interacts well with keepers', 'Needs extra hydration in summer',
+         'Mild limp on left front leg', 'Very active during feeding time']
+
+FIRST_NAMES = ['Ali', 'Sara', 'John', 'Ayesha', 'Omar', 'Fatima', 'David', 'Hina', 'Usman', 'Emma',
+               'Bilal', 'Zainab', 'James', 'Maryam', 'Hamza', 'Olivia']
+LAST_NAMES = ['Khan', 'Smith', 'Ahmed', 'Malik', 'Brown', 'Hussain', 'Wilson', 'Butt', 'Chen', 'Qureshi']
+
+# id, type, price, description
+TICKETS = [('T1', 'Adult', 25.0, 'Standard entry for ages 13-64'), ('T2', 'Child', 15.0, 'Entry for ages 3-12'),
+           ('T3', 'Senior', 20.0, 'Entry for ages 65+'), ('T4', 'Group', 18.0, 'Per person, min 10 people')]
+TICKET_CUM_WEIGHTS = list(accumulate([50, 30, 12, 8]))
+QUANTITIES = [1, 2, 3, 4, 5, 6]
+QUANTITY_CUM_WEIGHTS = list(accumulate([40, 30, 12, 10, 5, 3]))
+
+DIAGNOSES = [('Routine checkup', 'None required'), ('Dental check', 'Teeth cleaning'),
+             ('Minor wound', 'Antiseptic dressing'), ('Parasites', 'Deworming course'),
+             ('Respiratory infection', 'Antibiotics Type A'), ('Limp', 'Rest and anti-inflammatories'),
+             ('Weight loss', 'Diet adjustment')]
+DIAGNOSIS_CUM_WEIGHTS = list(accumulate([60, 10, 8, 8, 6, 4, 4]))
+VACCINES = [('Rabies', 365), ('Distemper', 365), ('Avian Influenza', 180), ('Tetanus', 730), ('Leptospirosis', 365)]
+
+DEFAULT_START = date(2024, 1, 1)
+DEFAULT_DAYS = 730
+
+
+def default_counts(rows):
+    """Row counts for a dataset with `rows` animals and ticket sales."""
+    return {
+        'cages': max(rows // 8, 1),
+        'animals': rows,
+        'visitors': max(rows // 4, 1),
+        'ticket_sales': rows,
+        'medical_checks': rows // 2,
+        'vaccinations': rows // 2,
+        'doctors': max(rows // 5000, 3),
+        'employees': max(rows // 1000, 5),
+    }
+
+
+def _open_for_load(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -65536")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def _insert(conn, table, columns, rows):
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(table, ', '.join(columns), ', '.join('?' * len(columns)))
+    while True:
+        # One transaction per chunk bounds the memory of the pending rows
+        chunk = [row for _, row in zip(range(CHUNK_ROWS), rows)]
+        if not chunk:
+            return
+        with conn:
+            conn.executemany(sql, chunk)
+
+
+def day_weights(start, days):
+    """Relative visitor numbers per day: weekends double, summer ~1.6x winter."""
+    weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        season = 1.3 - 0.3 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 15) / 365.25)
+        weights.append(season * (2.0 if day.weekday() >= 5 else 1.0))
+    return weights
+
+
+def _cages_by_type(cage_count):
+    # Cage i has type CAGE_TYPES[i % len(CAGE_TYPES)], so the cages of one type
+    # are an arithmetic progression and a random one is picked in O(1)
+    return {cage_type: (k, len(range(k, cage_count, len(CAGE_TYPES)))) for k, cage_type in enumerate(CAGE_TYPES)}
+
+
+def _person(i):
+    # Deterministic, so a ticket sale names the same person as its visitor row
+    return '{} {}'.format(FIRST_NAMES[i % len(FIRST_NAMES)], LAST_NAMES[i // len(FIRST_NAMES) % len(LAST_NAMES)])
+
+
+# Big tables: rows [lo, hi) of each are generated by one shard
+def _animals(rnd, lo, hi, counts, occupancy):
+    by_type = _cages_by_type(counts['cages'])
+    kinds = len(CAGE_TYPES)
+    for i in range(lo, hi):
+        species = rnd.choices(SPECIES_NAMES, cum_weights=SPECIES_CUM_WEIGHTS)[0]
+        cage_type, lifespan = SPECIES[species]
+        first, available = by_type[cage_type]
+        if available:
+            cage = first + kinds * rnd.randrange(available)
+        else:
+            cage = rnd.randrange(counts['cages'])
+        occupancy[cage] += 1
+        yield ('A{}'.format(i), '{} {}'.format(ANIMAL_NAMES[i % len(ANIMAL_NAMES)], i), species,
+               min(int(rnd.expovariate(3.0 / lifespan)) + 1, lifespan), 'Male' if rnd.random() < 0.5 else 'Female',
+               rnd.choices(HEALTH, cum_weights=HEALTH_CUM_WEIGHTS)[0], 'C{}'.format(cage), NOTES[rnd.randrange(len(NOTES))])
+
+
+def _visitors(rnd, lo, hi, start, days):
+    for i in range(lo, hi):
+        yield ('V{}'.format(i), _person(i), 'visitor{}@example.com'.format(i),
+               '03{:09d}'.format(i), (start + timedelta(days=rnd.randrange(days))).isoformat())
+
+
+def _ticket_sales(rnd, lo, hi, counts, start, days, cum_days):
+    day_names = [(start + timedelta(days=offset)).isoformat() for offset in range(days)]
+    for i in range(lo, hi):
+        ticket_id, _, price, _ = rnd.choices(TICKETS, cum_weights=TICKET_CUM_WEIGHTS)[0]
+        quantity = rnd.randint(10, 30) if ticket_id == 'T4' else rnd.choices(QUANTITIES, cum_weights=QUANTITY_CUM_WEIGHTS)[0]
+        visitor = rnd.randrange(counts['visitors'])
+        yield ('S{}'.format(i), ticket_id, quantity, price * quantity,
+               rnd.choices(day_names, cum_weights=cum_days)[0], _person(visitor),
+               'visitor{}@example.com'.format(visitor), '03{:09d}'.format(visitor))
+
+
+def _medical_checks(rnd, lo, hi, counts, start, days):
+    today = start + timedelta(days=days)
+    for i in range(lo, hi):
+        day = start + timedelta(days=rnd.randrange(days + 30))
+        diagnosis, treatment = rnd.choices(DIAGNOSES, cum_weights=DIAGNOSIS_CUM_WEIGHTS)[0]
+        yield ('M{}'.format(i), 'A{}'.format(rnd.randrange(counts['animals'])),
+               'D{}'.format(rnd.randrange(counts['doctors'])), day.isoformat(), diagnosis, treatment,
+               'Scheduled' if day >= today else 'Completed', '')
+
+
+def _vaccinations(rnd, lo, hi, counts, start, days):
+    for i in range(lo, hi):
+        vaccine, interval = VACCINES[rnd.randrange(len(VACCINES))]
+        given = start + timedelta(days=rnd.randrange(days))
+        yield ('VC{}'.format(i), 'A{}'.format(rnd.randrange(counts['animals'])), vaccine, given.isoformat(),
+               (given + timedelta(days=interval)).isoformat(), 'D{}'.format(rnd.randrange(counts['doctors'])), '')
+
+
+BIG_TABLES = {
+    'animals': ('id', 'name', 'species', 'age', 'gender', 'health_status', 'cage_id', 'notes'),
+    'visitors': ('id', 'name', 'email', 'phone', 'registration_date'),
+    'ticket_sales': ('id', 'ticket_id', 'quantity', 'total_amount', 'date', 'visitor_name', 'visitor_email', 'visitor_phone'),
+    'medical_checks': ('id', 'animal_id', 'doctor_id', 'date', 'diagnosis', 'treatment', 'status', 'notes'),
+    'vaccinations': ('id', 'animal_id', 'vaccine_name', 'date_administered', 'next_due_date', 'veterinarian', 'notes'),
+}
+
+
+def _shard_range(total, shard, shards):
+    return total * shard // shards, total * (shard + 1) // shards
+
+
+def generate_shard(path, shard, shards, counts, seed, start, days):
+    """Write this shard's slice of the big tables to `path` (a database with
+    the schema); returns the number of animals put in each cage."""
+    rnd = random.Random(seed * 7919 + shard)
+    occupancy = array('l', bytes(array('l').itemsize * counts['cages']))
+    cum_days = []
+    for weight in day_weights(start, days):
+        cum_days.append((cum_days[-1] if cum_days else 0) + weight)
+
+    conn = _open_for_load(path)
+    try:
+        for table, columns in BIG_TABLES.items():
+            lo, hi = _shard_range(counts.get(table, 0), shard, shards)
+            if table == 'animals':
+                rows = _animals(rnd, lo, hi, counts, occupancy)
+            elif table == 'visitors':
+                rows = _visitors(rnd, lo, hi, start, days)
+            elif table == 'ticket_sales':
+                rows = _ticket_sales(rnd, lo, hi, counts, start, days, cum_days)
+            elif table == 'medical_checks':
+                rows = _medical_checks(rnd, lo, hi, counts, start, days)
+            else:
+                rows = _vaccinations(rnd, lo, hi, counts, start, days)
+            _insert(conn, table, columns, rows)
+    finally:
+        conn.close()
+    return occupancy
+
+
+def _reference_tables(conn, rnd, counts, occupancy, start, days):
+    _insert(conn, 'zoo_info', ('name', 'location', 'description', 'capacity', 'start_time', 'end_time'), iter([
+        ('Central City Zoo', '123 Wild Way, Natureville', 'A world-class zoo dedicated to conservation.',
+         str(max(counts['visitors'] // 50, 5000)), '09:00', '18:00')]))
+    _insert(conn, 'tickets', ('id', 'type', 'price', 'description'), iter(TICKETS))
+
+    def cages():
+        for i in range(counts['cages']):
+            cage_type = CAGE_TYPES[i % len(CAGE_TYPES)]
+            low, high = CAGE_CAPACITY[cage_type]
+            yield ('C{}'.format(i), '{} {}'.format(cage_type.split('/')[0], i), cage_type, rnd.randint(low, high),
+                   occupancy[i], ZONES[i % len(ZONES)], 'Maintenance' if rnd.random() < 0.03 else 'Active')
+    _insert(conn, 'cages', ('id', 'name', 'type', 'capacity', 'occupancy', 'location', 'status'), cages())
+
+    specializations = ['Large Mammals', 'Avian & Reptiles', 'Marine Mammals', 'Primates', 'General Practice']
+    _insert(conn, 'doctors', ('id', 'name', 'specialization', 'email', 'phone', 'availability', 'experience'), (
+        ('D{}'.format(i), 'Dr. ' + _person(i), specializations[i % len(specializations)], 'doctor{}@zoo.com'.format(i),
+         '555-{:04d}'.format(i % 10000), rnd.choice(['Available', 'Available', 'On Call']), '{} years'.format(rnd.randint(1, 30)))
+        for i in range(counts['doctors'])))
+
+    roles = ['Zookeeper', 'Zookeeper', 'Zookeeper', 'Maintenance', 'Ticketing', 'Manager']
+    _insert(conn, 'employees', ('id', 'name', 'email', 'role', 'phone', 'salary', 'join_date', 'status'), (
+        ('E{}'.format(i), _person(i), 'employee{}@zoo.com'.format(i), roles[i % len(roles)], '555-{:04d}'.format(i % 10000),
+         float(rnd.randrange(35000, 80000, 500)), (start - timedelta(days=rnd.randrange(3650))).isoformat(),
+         'On Leave' if rnd.random() < 0.05 else 'Active')
+        for i in range(counts['employees'])))
+
+    titles = ['Lion Feeding', 'Elephant Bath', 'Night Safari', 'Penguin Parade', 'Reptile Talk', 'Bird Show']
+    events = max(days // 7, 1)
+    _insert(conn, 'events', ('id', 'title', 'description', 'date', 'time', 'location', 'capacity', 'registered_count', 'status'), (
+        ('EV{}'.format(i), titles[i % len(titles)], 'Weekly keeper talk', (start + timedelta(days=7 * i)).isoformat(),
+         '{}:00'.format(rnd.choice([11, 14, 16, 20])), ZONES[i % len(ZONES)], capacity, rnd.randint(0, capacity), 'Completed')
+        for i, capacity in ((i, rnd.choice([30, 50, 100])) for i in range(events))))
+
+    supplies = [('Premium Meat Mix', 'Food', 'kg'), ('Hay Bales', 'Food', 'bales'), ('Fish', 'Food', 'kg'),
+                ('Antibiotics Type A', 'Medicine', 'doses'), ('Dewormer', 'Medicine', 'doses'),
+                ('Cleaning Solution', 'Equipment', 'liters')]
+    _insert(conn, 'inventory', ('id', 'name', 'category', 'quantity', 'unit', 'min_threshold', 'expiry_date', 'supplier'), (
+        ('I{}'.format(i), name, category, float(rnd.randint(0, 500)), unit, 50.0,
+         (start + timedelta(days=days + rnd.randrange(-60, 365))).isoformat() if category != 'Equipment' else None, 'Meadow Farms')
+        for i, (name, category, unit) in enumerate(supplies)))
+
+    _insert(conn, 'users', ('id', 'name', 'email', 'password', 'role'), iter([
+        ('U0', 'Admin', 'admin@zoo.com', 'admin123', 'admin'),
+        ('U1', 'Staff', 'staff@zoo.com', 'staff123', 'staff'),
+    ]))
+
+
+def generate(path, counts, jobs=1, seed=42, start=DEFAULT_START, days=DEFAULT_DAYS):
+    """Create the database at `path` (replacing any existing file) with
+    `counts` rows per table (see default_counts())."""
+    if not counts['animals']:
+        counts = dict(counts, medical_checks=0, vaccinations=0)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    schema = schema_from_init_script()
+
+    conn = _open_for_load(path)
+    for statement in schema:
+        conn.execute(statement)
+    jobs = max(1, min(jobs, max(counts['animals'], counts['ticket_sales']) // CHUNK_ROWS or 1))
+    if jobs == 1:
+        conn.close()
+        occupancy = generate_shard(path, 0, 1, counts, seed, start, days)
+        conn = _open_for_load(path)
+    else:
+        work_dir = tempfile.mkdtemp(prefix='zms-shards-', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            shard_paths = [os.path.join(work_dir, 'shard-{}.db'.format(shard)) for shard in range(jobs)]
+            for shard_path in shard_paths:
+                shard_conn = sqlite3.connect(shard_path)
+                for statement in schema:
+                    shard_conn.execute(statement)
+                shard_conn.close()
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = [pool.submit(generate_shard, shard_path, shard, jobs, counts, seed, start, days)
+                           for shard, shard_path in enumerate(shard_paths)]
+                occupancy = array('l', bytes(array('l').itemsize * counts['cages']))
+                for future in futures:
+                    for cage, animals in enumerate(future.result()):
+                        occupancy[cage] += animals
+            for shard_path in shard_paths:
+                conn.execute("ATTACH DATABASE ? AS shard", (shard_path,))
+                with conn:
+                    for table in BIG_TABLES:
+                        conn.execute("INSERT INTO main.{0} SELECT * FROM shard.{0}".format(table))
+                conn.execute("DETACH DATABASE shard")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    _reference_tables(conn, random.Random(seed), counts, occupancy, start, days)
+    # Leave a single self-contained file behind
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic ZMS SQLite database for load testing.")
+    parser.add_argument('output', help="SQLite file to create (replaced if it exists)")
+    parser.add_argument('--rows', type=int, default=10000,
+                        help="animals and ticket sales; the other tables scale from it (default: %(default)s)")
+    for table in ('cages', 'animals', 'visitors', 'sales', 'checks', 'vaccinations'):
+        parser.add_argument('--' + table, type=int, metavar='N', help="override the {} count".format(table))
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="generate in N processes and merge the shards")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start', type=date.fromisoformat, default=DEFAULT_START, metavar='YYYY-MM-DD',
+                        help="first day of sales and visits (default: %(default)s)")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="days of history (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    counts = default_counts(args.rows)
+    overrides = {'cages': args.cages, 'animals': args.animals, 'visitors': args.visitors,
+                 'ticket_sales': args.sales, 'medical_checks': args.checks, 'vaccinations': args.vaccinations}
+    counts.update({table: count for table, count in overrides.items() if count is not None})
+    if min(counts['cages'], counts['visitors'], counts['animals'] or 1) < 1:
+        parser.error("--cages and --visitors must be at least 1")
+
+    started = time.perf_counter()
+    generate(args.output, counts, jobs=args.jobs, seed=args.seed, start=args.start, days=args.days)
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"✓ {args.output}: {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s), "
+          f"{os.path.getsize(args.output) / (1024 * 1024):.1f} MB")
+    for table, count in counts.items():
+        print(f"  {table}: {count:,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index advisor for the SQL in backend/src/index.ts.
+
+Every statement the server passes to pool.query() is translated to SQLite
+and run through EXPLAIN QUERY PLAN against a temporary copy of a populated
+database. Filtered statements that scan a whole table get a recommended
+index on their filter columns. Deletes from a table that other tables
+reference get one on each unindexed foreign key column, because every such
+delete makes the database scan the child table to check for references.
+Statements with a recommendation are timed before and after the indexes
+are created on the copy. The original database is never written to.
+
+    python index_advisor.py [zoo.db]    # exit status 1 if any index is recommended
+"""
+
+from collections import namedtuple
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from api_routes import DEFAULT_SERVER_PATH, load_routes
+from db_introspect import DEFAULT_DB_PATH, connect_readonly, quote_ident
+
+# kind is one of:
+#   indexed - the plan searches an index or the primary key
+#   scan    - a filtered statement reads the whole table; an index would help
+#   full    - the statement reads the whole table by design (lists, aggregates)
+#   fk      - a delete that scans a child table to check foreign key references
+#   write   - a plain insert; nothing to look up
+#   error   - SQLite can't run the statement
+Finding = namedtuple('Finding', 'method path sql kind table plan index before after')
+Advice = namedtuple('Advice', 'findings indexes rows')
+
+DEFAULT_REPEAT = 5
+
+_PLACEHOLDER = re.compile(r'\$(\d+)')
+_TABLE = re.compile(r'\b(?:FROM|UPDATE|INTO)\s+(\w+)', re.I)
+_WHERE = re.compile(r'\bWHERE\b(.*?)(?:\bORDER\s+BY\b|\bGROUP\s+BY\b|\bLIMIT\b|\bRETURNING\b|$)', re.I | re.S)
+_COMPARED = re.compile(r'\b(\w+)\s*(?:=|<>|!=|<=|>=|<|>|\bIN\b|\bLIKE\b|\bBETWEEN\b)', re.I)
+_BOUND = re.compile(r'\b(\w+)\s*=\s*\$(\d+)')
+
+
+def to_sqlite(sql):
+    """The PostgreSQL dialect used by index.ts, rewritten for SQLite."""
+    sql = _PLACEHOLDER.sub(r'?\1', sql)
+    sql = re.sub(r'\bNOW\(\)', 'CURRENT_TIMESTAMP', sql, flags=re.I)
+    sql = re.sub(r'\bILIKE\b', 'LIKE', sql, flags=re.I)
+    return re.sub(r'::\w+', '', sql)
+
+
+def statement_table(sql):
+    match = _TABLE.search(sql)
+    return match.group(1) if match else None
+
+
+def filter_columns(sql, columns):
+    """Columns of the statement's table compared in its WHERE clause, in order."""
+    match = _WHERE.search(sql)
+    if not match:
+        return []
+    found = []
+    for name in _COMPARED.findall(match.group(1)):
+        if name in columns and name not in found:
+            found.append(name)
+    return found
+
+
+def index_statement(table, columns):
+    return "CREATE INDEX IF NOT EXISTS idx_{}_{} ON {} ({})".format(
+        table, '_'.join(columns), table, ', '.join(columns))
+
+
+def _copy_database(db_path, directory):
+    # The backup API copies a consistent snapshot, WAL included
+    path = os.path.join(directory, 'advisor.db')
+    source = connect_readonly(db_path)
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    return path
+
+
+def _schema(conn):
+    """{table: (columns, first columns of its indexes, [(child, column)] referencing it)}"""
+    schema = {}
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    for table in tables:
+        columns = [row[0] for row in conn.execute("SELECT name FROM pragma_table_info(?)", (table,))]
+        leading = set(row[0] for row in conn.execute(
+            "SELECT ii.name FROM pragma_index_list(?) AS il JOIN pragma_index_info(il.name) AS ii "
+            "WHERE ii.seqno = 0", (table,)))
+        # A rowid alias (INTEGER PRIMARY KEY) is its own index
+        leading.update(row[0] for row in conn.execute(
+            "SELECT name FROM pragma_table_info(?) WHERE pk = 1 AND upper(type) = 'INTEGER'", (table,)))
+        schema[table] = (columns, leading, [])
+    for table in tables:
+        for column, parent in conn.execute('SELECT "from", "table" FROM pragma_foreign_key_list(?)', (table,)):
+            if parent in schema:
+                schema[parent][2].append((table, column))
+    return schema
+
+
+def _sample_params(conn, sql, table, columns):
+    """Bind `col = $n` placeholders to the values of a row from the middle of
+    the table, so lookups hit real data; other placeholders get NULL."""
+    count = max((int(n) for n in _PLACEHOLDER.findall(sql)), default=0)
+    params = [None] * count
+    if not count or table is None:
+        return params
+    row = conn.execute("SELECT * FROM {} LIMIT 1 OFFSET (SELECT COUNT(*) FROM {}) / 2".format(
+        quote_ident(table), quote_ident(table))).fetchone()
+    if row is None:
+        return params
+    values = dict(zip(columns, row))
+    for column, n in _BOUND.findall(sql):
+        if column in values:
+            params[int(n) - 1] = values[column]
+    return params
+
+
+def _time(conn, sql, params, repeat):
+    """Best of `repeat` runs in ms; every run is rolled back."""
+    best = None
+    for _ in range(repeat):
+        conn.execute("SAVEPOINT advisor")
+        started = time.perf_counter()
+        try:
+            conn.execute(sql, params).fetchall()
+        except sqlite3.DatabaseError:
+            # e.g. a delete refused by a foreign key: the check still ran
+            pass
+        elapsed = (time.perf_counter() - started) * 1000
+        conn.execute("ROLLBACK TO advisor")
+        conn.execute("RELEASE advisor")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def analyse(db_path=DEFAULT_DB_PATH, server_path=DEFAULT_SERVER_PATH, repeat=DEFAULT_REPEAT):
+    """Advise on every statement in `server_path` against a copy of `db_path`."""
+    work_dir = tempfile.mkdtemp(prefix='zms-advisor-')
+    try:
+        conn = sqlite3.connect(_copy_database(db_path, work_dir), isolation_level=None)
+        try:
+            return _analyse(conn, load_routes(server_path), repeat)
+        finally:
+            conn.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _analyse(conn, routes, repeat):
+    conn.execute("PRAGMA foreign_keys = ON")
+    schema = _schema(conn)
+    rows = {table: conn.execute("SELECT COUNT(*) FROM {}".format(quote_ident(table))).fetchone()[0]
+            for table in schema}
+
+    findings = []
+    timed = []
+    for route in routes:
+        for sql in route.sql:
+            lite = to_sqlite(sql)
+            table = statement_table(sql)
+            columns, leading, children = schema.get(table, ([], set(), []))
+            placeholders = [None] * max((int(n) for n in _PLACEHOLDER.findall(sql)), default=0)
+            try:
+                plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + lite, placeholders)]
+            except sqlite3.DatabaseError as e:
+                findings.append(Finding(route.method, route.path, sql, 'error', table, [str(e)], None, None, None))
+                continue
+
+            # Scans of other tables are foreign key checks, handled below
+            scans = [detail for detail in plan
+                     if re.match(r'SCAN {}\b'.format(table), detail) and 'COVERING INDEX' not in detail]
+            wanted = filter_columns(sql, columns)
+            index = None
+            if scans and wanted:
+                kind = 'scan'
+                index = index_statement(table, wanted)
+            elif scans:
+                kind = 'full'
+            elif any(detail.startswith('SEARCH ') or 'INDEX' in detail for detail in plan):
+                kind = 'indexed'
+            elif plan:
+                kind = 'full'
+            else:
+                kind = 'write'
+            finding = Finding(route.method, route.path, sql, kind, table, plan, index, None, None)
+            findings.append(finding)
+            if index:
+                timed.append((len(findings) - 1, lite, table, columns))
+
+            if sql.lstrip().upper().startswith('DELETE'):
+                for child, column in children:
+                    if column in schema[child][1]:
+                        continue
+                    findings.append(Finding(route.method, route.path, sql, 'fk', child,
+                                            ['SCAN {} (foreign key {}.{} -> {})'.format(child, child, column, table)],
+                                            index_statement(child, [column]), None, None))
+                    timed.append((len(findings) - 1, lite, table, columns))
+
+    params = {i: _sample_params(conn, findings[i].sql, table, columns) for i, _, table, columns in timed}
+    before = {i: _time(conn, lite, params[i], repeat) for i, lite, _, _ in timed}
+    indexes = []
+    for i, _, _, _ in timed:
+        if findings[i].index not in indexes:
+            indexes.append(findings[i].index)
+    for statement in indexes:
+        conn.execute(statement)
+    conn.execute("ANALYZE")
+    for i, lite, _, _ in timed:
+        findings[i] = findings[i]._replace(before=before[i], after=_time(conn, lite, params[i], repeat))
+    return Advice(findings, indexes, rows)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    db_path = argv[0] if argv else DEFAULT_DB_PATH
+    advice = analyse(db_path)
+    for finding in advice.findings:
+        if finding.kind in ('scan', 'fk'):
+            print(f"✗ {finding.method} {finding.path}: {finding.sql}")
+            print(f"    {'; '.join(finding.plan)}")
+            print(f"    {finding.index}  -- {finding.before:.3f} ms -> {finding.after:.3f} ms")
+        elif finding.kind == 'error':
+            print(f"? {finding.method} {finding.path}: {finding.plan[0]}")
+    counts = {}
+    for finding in advice.findings:
+        counts[finding.kind] = counts.get(finding.kind, 0) + 1
+    print("{} statements: {}".format(len(advice.findings), ", ".join(
+        "{} {}".format(count, kind) for kind, count in sorted(counts.items()))))
+    if advice.indexes:
+        print("Recommended indexes:")
+        for statement in advice.indexes:
+            print(f"  {statement};")
+        return 1
+    print("✓ No missing indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
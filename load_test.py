@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP load generator for the ZMS backend.
+
+Drives a running backend (backend/src/index.ts) with a weighted mix of
+requests from many concurrent asyncio workers sharing a pool of keep-alive
+connections, and records per-endpoint throughput and an HDR-style latency
+histogram (about 1% relative precision from microseconds to minutes in a
+few hundred buckets). The default mix is dominated by POST /api/ticket-sales,
+the server's heaviest write: an insert, a visitor lookup and a visitor
+update or insert on separate round trips. Emails are drawn from a fixed pool
+so both visitor branches run.
+
+Start the backend against a local PostgreSQL first, e.g.
+
+    cd backend && DATABASE_URL=postgresql://localhost/zms npm run dev
+
+then
+
+    python load_test.py [--url http://localhost:3001] [--concurrency 32] [--duration 30 | --requests N]
+                        [--rate REQ_PER_S] [--mix "POST /api/ticket-sales=8,GET /api/tickets=1"]
+                        [--output load_test.json]
+
+With --rate the load is open-loop: requests are started on a fixed schedule
+and latency is measured from when each should have started, so a stalled
+server can't hide its backlog (coordinated omission). The JSON results feed
+the Performance section of create_docs.py (--include performance).
+
+Only the standard library is used. Every sale it posts stays in the
+database, with ids starting "load-".
+"""
+
+from collections import namedtuple
+from datetime import date, datetime
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+DEFAULT_URL = 'http://localhost:3001'
+DEFAULT_RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_test.json')
+DEFAULT_MIX = 'POST /api/ticket-sales=8,GET /api/tickets=1,GET /api/dashboard/stats=1'
+DEFAULT_CONCURRENCY = 32
+DEFAULT_DURATION = 30.0
+DEFAULT_VISITORS = 1000
+DEFAULT_TIMEOUT = 30.0
+
+Endpoint = namedtuple('Endpoint', 'method path weight')
+Response = namedtuple('Response', 'status body')
+
+
+class HttpError(Exception):
+    pass
+
+
+# Latency histogram. Values (integer microseconds) below 2**SUB_BUCKET_BITS
+# get a bucket each; above that every power of two is split into
+# 2**(SUB_BUCKET_BITS - 1) equal buckets, so a bucket is never wider than
+# 1/64th of the values in it.
+SUB_BUCKET_BITS = 7
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_HALF = _SUB_BUCKETS >> 1
+
+
+def bucket_index(value):
+    if value < _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return _HALF * shift + (value >> shift)
+
+
+def bucket_range(index):
+    """(lowest, highest) value counted in bucket `index`."""
+    if index < _SUB_BUCKETS:
+        return index, index
+    shift = index // _HALF - 1
+    low = (index - _HALF * shift) << shift
+    return low, low + (1 << shift) - 1
+
+
+class LatencyHistogram(object):
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def record(self, micros):
+        micros = max(0, int(micros))
+        index = bucket_index(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum += micros
+        self.min = micros if self.min is None else min(self.min, micros)
+        self.max = micros if self.max is None else max(self.max, micros)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p):
+        """The value at or below which `p` percent of the recorded values
+        fall, as the midpoint of its bucket clamped to the observed range."""
+        if not self.total:
+            return None
+        rank = max(1, -(-self.total * p // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = bucket_range(index)
+                return min(max((low + high) / 2.0, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        """Latency figures in milliseconds."""
+        if not self.total:
+            return {}
+        figures = {'min': self.min / 1000.0, 'mean': self.sum / self.total / 1000.0}
+        for name, p in (('p50', 50), ('p90', 90), ('p95', 95), ('p99', 99), ('p999', 99.9)):
+            figures[name] = self.percentile(p) / 1000.0
+        figures['max'] = self.max / 1000.0
+        return figures
+
+    def buckets(self):
+        """[[low ms, high ms, count]] of the non-empty buckets."""
+        return [[low / 1000.0, (high + 1) / 1000.0, self.counts[index]]
+                for index in sorted(self.counts) for low, high in [bucket_range(index)]]
+
+
+def distribution(buckets, first=0.25):
+    """Regroup serialized buckets into doubling millisecond ranges starting at
+    `first`, for charts: [(label, count)] from the first to the last non-empty range."""
+    bins = {}
+    for low, high, count in buckets:
+        n = 0
+        while first * 2 ** n <= low:
+            n += 1
+        bins[n] = bins.get(n, 0) + count
+    if not bins:
+        return []
+
+    def label(n):
+        return '<{:g}'.format(first) if n == 0 else '{:g}-{:g}'.format(first * 2 ** (n - 1), first * 2 ** n)
+    return [(label(n), bins.get(n, 0)) for n in range(min(bins), max(bins) + 1)]
+
+
+# HTTP/1.1 client on asyncio streams
+class ConnectionPool(object):
+    """Up to `size` keep-alive connections to one host, reused last-in first-out."""
+
+    def __init__(self, host, port, size, timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def request(self, method, path, body=None):
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        head = ['{} {} HTTP/1.1'.format(method, path), 'Host: {}:{}'.format(self.host, self.port),
+                'Connection: keep-alive', 'Accept: application/json']
+        if body is not None:
+            head.append('Content-Type: application/json')
+        if body is not None or method in ('POST', 'PUT'):
+            head.append('Content-Length: {}'.format(len(payload)))
+        message = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload
+
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                if reused:
+                    reader, writer = self._idle.pop()
+                else:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port), self.timeout)
+                    self.opened += 1
+                try:
+                    writer.write(message)
+                    response, keep_alive = await asyncio.wait_for(_read_response(reader), self.timeout)
+                except (OSError, asyncio.IncompleteReadError) as e:
+                    writer.close()
+                    # The server may have timed out an idle connection: retry once on a fresh one
+                    if reused and isinstance(e, (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError)):
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                return response
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+async def _read_response(reader):
+    """(Response, keep-alive) for the response waiting on `reader`."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ', 2)
+    if len(parts) < 2 or not parts[0].startswith('HTTP/'):
+        raise HttpError("Malformed status line: {!r}".format(lines[0]))
+    status = int(parts[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    keep_alive = headers.get('connection', '').lower() != 'close' and parts[0] != 'HTTP/1.0'
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+            if size == 0:
+                # Trailers, if any, end with an empty line
+                while await reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    elif status in (204, 304) or 100 <= status < 200:
+        body = b''
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return Response(status, body), keep_alive
+
+
+# Load generation
+def parse_mix(text):
+    """'METHOD /path=weight,...' as a list of Endpoints."""
+    endpoints = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        request, _, weight = item.rpartition('=')
+        if not request:
+            request, weight = weight, '1'
+        method, _, path = request.strip().partition(' ')
+        if not path.startswith('/'):
+            raise ValueError("Expected 'METHOD /path=weight', got {!r}".format(item))
+        endpoints.append(Endpoint(method.upper(), path.strip(), float(weight)))
+    if not endpoints or sum(endpoint.weight for endpoint in endpoints) <= 0:
+        raise ValueError("The request mix is empty")
+    return endpoints
+
+
+class TicketSales(object):
+    """Request bodies for POST /api/ticket-sales, in the shape the frontend sends."""
+
+    def __init__(self, tickets, visitors=DEFAULT_VISITORS, seed=None):
+        self.tickets = tickets or [{'id': 'T1', 'price': 20.0}]
+        self.visitors = visitors
+        self.run = datetime.now().strftime('%Y%m%d%H%M%S')
+        self.random = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    def next(self):
+        ticket = self.random.choice(self.tickets)
+        quantity = self.random.randint(1, 4)
+        visitor = self.random.randrange(self.visitors)
+        return {
+            'id': 'load-{}-{}'.format(self.run, next(self._ids)),
+            'ticketId': ticket['id'],
+            'quantity': quantity,
+            'totalAmount': round(float(ticket.get('price') or 0) * quantity, 2),
+            'date': date.today().isoformat(),
+            'visitorName': 'Load Visitor {}'.format(visitor),
+            'visitorEmail': 'load-visitor-{}@example.com'.format(visitor),
+            'visitorPhone': '+1-555-{:04d}'.format(visitor % 10000),
+        }
+
+
+class EndpointStats(object):
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses = {}
+        self.errors = 0
+        self.failures = {}
+
+    def record(self, micros, status=None, error=None):
+        self.latency.record(micros)
+        if status is not None:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        if error is not None or status is None or status >= 400:
+            self.errors += 1
+        if error is not None:
+            self.failures[error] = self.failures.get(error, 0) + 1
+
+
+async def _run(url, endpoints, concurrency, connections, duration, requests, rate, visitors, seed):
+    parts = urlsplit(url)
+    if parts.scheme != 'http':
+        raise ValueError("Only http:// URLs are supported, got {}".format(url))
+    pool = ConnectionPool(parts.hostname, parts.port or 80, connections)
+    prefix = parts.path.rstrip('/')
+    try:
+        # The sales need ticket ids that exist
+        tickets = []
+        response = await pool.request('GET', prefix + '/api/tickets')
+        if response.status == 200:
+            tickets = [ticket for ticket in json.loads(response.body) if ticket.get('id')]
+        sales = TicketSales(tickets, visitors, seed)
+
+        chooser = random.Random(seed)
+        weights = list(itertools.accumulate(endpoint.weight for endpoint in endpoints))
+        stats = {endpoint: EndpointStats() for endpoint in endpoints}
+        issued = itertools.count()
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+
+        async def worker():
+            while True:
+                n = next(issued)
+                if requests is not None and n >= requests:
+                    return
+                now = time.perf_counter()
+                if rate:
+                    # Open loop: request n is due at a fixed time, however late the previous ones ran
+                    due = started + n / rate
+                    if deadline is not None and due >= deadline:
+                        return
+                    if due > now:
+                        await asyncio.sleep(due - now)
+                    begin = due
+                else:
+                    if deadline is not None and now >= deadline:
+                        return
+                    begin = now
+                endpoint = chooser.choices(endpoints, cum_weights=weights)[0]
+                body = sales.next() if endpoint.method == 'POST' and endpoint.path == '/api/ticket-sales' else None
+                try:
+                    response = await pool.request(endpoint.method, prefix + endpoint.path, body)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError, ValueError) as e:
+                    stats[endpoint].record((time.perf_counter() - begin) * 1e6, error=type(e).__name__)
+                else:
+                    stats[endpoint].record((time.perf_counter() - begin) * 1e6, response.status)
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.close()
+    return stats, elapsed, len(tickets), pool.opened
+
+
+def run_load_test(url=DEFAULT_URL, mix=DEFAULT_MIX, concurrency=DEFAULT_CONCURRENCY, connections=None,
+                  duration=DEFAULT_DURATION, requests=None, rate=None, visitors=DEFAULT_VISITORS, seed=None):
+    """Run one load test and return its results as a JSON-serializable dict.
+
+    Stops after `requests` requests if given, otherwise after `duration`
+    seconds. `connections` (default: `concurrency`) caps the pool."""
+    endpoints = parse_mix(mix) if isinstance(mix, str) else list(mix)
+    connections = connections or concurrency
+    stats, elapsed, tickets, opened = asyncio.run(_run(
+        url, endpoints, concurrency, connections, None if requests is not None else duration,
+        requests, rate, visitors, seed))
+
+    overall = LatencyHistogram()
+    results = []
+    for endpoint in endpoints:
+        entry = stats[endpoint]
+        overall.merge(entry.latency)
+        results.append({
+            'method': endpoint.method,
+            'path': endpoint.path,
+            'weight': endpoint.weight,
+            'requests': entry.latency.total,
+            'errors': entry.errors,
+            'statuses': {str(status): count for status, count in sorted(entry.statuses.items())},
+            'failures': entry.failures,
+            'throughput': entry.latency.total / elapsed if elapsed else 0.0,
+            'latency_ms': entry.latency.summary(),
+            'histogram': entry.latency.buckets(),
+        })
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'url': url,
+            'concurrency': concurrency,
+            'connections': connections,
+            'connections_opened': opened,
+            'duration': duration if requests is None else None,
+            'requests': requests,
+            'rate': rate,
+            'visitors': visitors,
+            'tickets': tickets,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'totals': {
+            'requests': overall.total,
+            'errors': sum(entry['errors'] for entry in results),
+            'elapsed': elapsed,
+            'throughput': overall.total / elapsed if elapsed else 0.0,
+            'latency_ms': overall.summary(),
+        },
+        'endpoints': results,
+    }
+
+
+def load_results(path=DEFAULT_RESULTS_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the ZMS backend over HTTP.")
+    parser.add_argument('--url', default=os.environ.get('ZMS_API_URL', DEFAULT_URL),
+                        help="backend base URL (default: $ZMS_API_URL or %(default)s)")
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help="weighted requests, 'METHOD /path=weight,...' (default: %(default)s)")
+    parser.add_argument('--concurrency', '-c', type=int, default=DEFAULT_CONCURRENCY,
+                        help="concurrent requests in flight (default: %(default)s)")
+    parser.add_argument('--connections', type=int, help="keep-alive connection pool size (default: --concurrency)")
+    parser.add_argument('--duration', '-d', type=float, default=DEFAULT_DURATION,
+                        help="seconds to run (default: %(default)s)")
+    parser.add_argument('--requests', '-n', type=int, help="stop after this many requests instead of --duration")
+    parser.add_argument('--rate', type=float, metavar='REQ_PER_S',
+                        help="open-loop arrival rate; latency includes time spent waiting to be sent")
+    parser.add_argument('--visitors', type=int, default=DEFAULT_VISITORS,
+                        help="distinct visitor emails in posted sales (default: %(default)s)")
+    parser.add_argument('--seed', type=int, help="random seed for the request mix and sale bodies")
+    parser.add_argument('--output', default=DEFAULT_RESULTS_PATH,
+                        help="JSON results file (default: load_test.json)")
+    args = parser.parse_args(argv)
+
+    try:
+        endpoints = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.concurrency < 1 or (args.connections is not None and args.connections < 1):
+        parser.error("--concurrency and --connections must be at least 1")
+
+    limit = "{:,} requests".format(args.requests) if args.requests else "{:g}s".format(args.duration)
+    print(f"🚀 Load testing {args.url}: {args.concurrency} concurrent, {limit}"
+          + (f", {args.rate:g} req/s" if args.rate else ""))
+    try:
+        results = run_load_test(args.url, endpoints, args.concurrency, args.connections, args.duration,
+                                args.requests, args.rate, args.visitors, args.seed)
+    except (OSError, ValueError, HttpError, asyncio.TimeoutError) as e:
+        print(f"❌ Could not reach {args.url}: {e}")
+        return 2
+
+    print(f"{'Endpoint':<32} {'Requests':>9} {'Errors':>7} {'Req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Max ms':>8}")
+    for entry in results['endpoints'] + [dict(results['totals'], method='All', path='')]:
+        latency = entry['latency_ms']
+        figures = ''.join('{:>9.2f}'.format(latency[name]) if name in latency else '{:>9}'.format('-')
+                          for name in ('p50', 'p95', 'p99', 'max'))
+        print(f"{entry['method'] + ' ' + entry['path']:<32} {entry['requests']:>9,} {entry['errors']:>7,} "
+              f"{entry['throughput']:>8.1f}{figures}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 1 if results['totals']['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
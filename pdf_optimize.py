@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Size optimization pass for generated PDFs.
+
+reportlab already compresses the page streams it writes, but documents
+stitched from cached fragments (see create_docs.py) carry one copy of every
+font, image and shared resource per fragment, and pages whose footer was
+merged in by pypdf. This pass Flate-compresses every page's content stream,
+then merges byte-identical objects (so an image such as public/logo.png or a
+font drawn in several fragments is stored once) and drops objects nothing
+refers to.
+
+    python pdf_optimize.py in.pdf [out.pdf]
+
+Needs pypdf: pip install pypdf
+"""
+
+from collections import namedtuple
+import io
+import sys
+
+# Sizes in bytes; images counts image XObjects used by the pages, before and
+# after identical copies were merged
+OptimizeReport = namedtuple('OptimizeReport', 'before after pages images_before images_after')
+
+
+def _images(writer):
+    """Object numbers of the image XObjects the pages use."""
+    refs = set()
+    for page in writer.pages:
+        resources = page.get('/Resources')
+        xobjects = resources.get_object().get('/XObject') if resources is not None else None
+        if xobjects is None:
+            continue
+        for ref in xobjects.get_object().values():
+            obj = ref.get_object()
+            if obj.get('/Subtype') != '/Image':
+                continue
+            refs.add(getattr(ref, 'idnum', id(obj)))
+    return refs
+
+
+def optimize_pdf(data):
+    """Return (optimized PDF bytes, OptimizeReport) for the PDF bytes `data`."""
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        raise RuntimeError("Optimizing PDFs needs pypdf: pip install pypdf")
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(data)))
+    images_before = _images(writer)
+    for page in writer.pages:
+        page.compress_content_streams()
+    writer.compress_identical_objects()
+    images_after = _images(writer)
+    buf = io.BytesIO()
+    writer.write(buf)
+    optimized = buf.getvalue()
+    if len(optimized) >= len(data):
+        # Already as small as this pass can make it
+        optimized = data
+    return optimized, OptimizeReport(len(data), len(optimized), len(writer.pages),
+                                      len(images_before), len(images_after))
+
+
+def describe(report):
+    saved = report.before - report.after
+    text = "{:.1f} KB -> {:.1f} KB ({:.0f}% smaller)".format(
+        report.before / 1024.0, report.after / 1024.0, 100.0 * saved / report.before if report.before else 0)
+    if report.images_before != report.images_after:
+        text += ", {} image copies merged into {}".format(report.images_before, report.images_after)
+    return text
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(2)
+    with open(sys.argv[1], 'rb') as f:
+        data, report = optimize_pdf(f.read())
+    with open(sys.argv[2] if len(sys.argv) > 2 else sys.argv[1], 'wb') as f:
+        f.write(data)
+    print(f"✓ {describe(report)}")
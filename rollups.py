@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental rollups of ticket sales and visitor registrations.
+
+The backend keeps no aggregates, so every report would otherwise rescan
+ticket_sales and visitors from the first row. This job keeps hourly and
+daily totals (revenue, tickets and sales per ticket_id; new visitors per
+day) in a sidecar SQLite file and, on each run, folds in only the rows
+added since the last one: rows are only ever appended to both tables as
+far as the rollups are concerned, so the rowid of the last row seen is a
+high-water mark. The mark also records that row's id and how many rows
+were at or below it; if the id at that rowid differs or the count has
+changed (the database was replaced or rows were deleted), the rollups are
+rebuilt from scratch. Edits to other columns, like the backend updating a
+returning visitor's name and phone, don't touch anything rolled up and
+keep the incremental path.
+
+Readers query the sidecar, whose size grows with the number of days and
+ticket types rather than with the number of sales:
+
+    store = RollupStore('backend/zoo.db')
+    store.refresh()
+    store.daily()       # [(day, revenue, tickets, sales), ...]
+
+    python rollups.py [zoo.db] [--store FILE] [--rebuild]
+
+The source database is only ever opened read-only.
+"""
+
+from collections import namedtuple
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from urllib.parse import quote
+
+from db_introspect import DEFAULT_DB_PATH
+from section_cache import DEFAULT_CACHE_DIR
+
+# Bumped whenever the rollup tables change shape; older stores are rebuilt
+SCHEMA_VERSION = 2
+# Sales whose date has no time of day are filed under this hour
+NO_HOUR = -1
+
+RefreshResult = namedtuple('RefreshResult', 'sales visitors rebuilt seconds')
+
+# Each source's primary key, which the backend never changes once a row exists
+KEY_COLUMN = 'id'
+
+_HIGH_WATER = """
+CREATE TABLE IF NOT EXISTS high_water (
+    source TEXT PRIMARY KEY,
+    row INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    key TEXT
+)"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+""" + _HIGH_WATER + """;
+CREATE TABLE IF NOT EXISTS sales_hourly (
+    day TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    ticket_id TEXT NOT NULL,
+    revenue REAL NOT NULL,
+    tickets INTEGER NOT NULL,
+    sales INTEGER NOT NULL,
+    PRIMARY KEY (day, hour, ticket_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sales_daily (
+    day TEXT NOT NULL,
+    ticket_id TEXT NOT NULL,
+    revenue REAL NOT NULL,
+    tickets INTEGER NOT NULL,
+    sales INTEGER NOT NULL,
+    PRIMARY KEY (day, ticket_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS visitors_daily (
+    day TEXT PRIMARY KEY,
+    visitors INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_TABLES = ('sales_hourly', 'sales_daily', 'visitors_daily')
+
+# Each statement folds the rows in (:low, :high] of the source into a rollup
+_FOLD_SALES_HOURLY = """
+INSERT INTO sales_hourly (day, hour, ticket_id, revenue, tickets, sales)
+SELECT substr(date, 1, 10), CASE WHEN length(date) >= 13 THEN CAST(substr(date, 12, 2) AS INTEGER) ELSE {no_hour} END,
+       COALESCE(ticket_id, ''), COALESCE(SUM(total_amount), 0), COALESCE(SUM(quantity), 0), COUNT(*)
+FROM src.ticket_sales WHERE rowid > :low AND rowid <= :high AND date IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT (day, hour, ticket_id) DO UPDATE SET
+    revenue = revenue + excluded.revenue, tickets = tickets + excluded.tickets, sales = sales + excluded.sales
+""".format(no_hour=NO_HOUR)
+
+_FOLD_SALES_DAILY = """
+INSERT INTO sales_daily (day, ticket_id, revenue, tickets, sales)
+SELECT substr(date, 1, 10), COALESCE(ticket_id, ''), COALESCE(SUM(total_amount), 0), COALESCE(SUM(quantity), 0), COUNT(*)
+FROM src.ticket_sales WHERE rowid > :low AND rowid <= :high AND date IS NOT NULL
+GROUP BY 1, 2
+ON CONFLICT (day, ticket_id) DO UPDATE SET
+    revenue = revenue + excluded.revenue, tickets = tickets + excluded.tickets, sales = sales + excluded.sales
+"""
+
+_FOLD_VISITORS = """
+INSERT INTO visitors_daily (day, visitors)
+SELECT substr(registration_date, 1, 10), COUNT(*)
+FROM src.visitors WHERE rowid > :low AND rowid <= :high AND registration_date IS NOT NULL
+GROUP BY 1
+ON CONFLICT (day) DO UPDATE SET visitors = visitors + excluded.visitors
+"""
+
+SOURCES = {
+    'ticket_sales': (_FOLD_SALES_HOURLY, _FOLD_SALES_DAILY),
+    'visitors': (_FOLD_VISITORS,),
+}
+
+
+def default_store_path(db_path):
+    """Sidecar file for `db_path` in the docs cache directory."""
+    name = hashlib.sha256(os.path.abspath(db_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DEFAULT_CACHE_DIR, 'rollups-{}.sqlite'.format(name))
+
+
+class RollupStore(object):
+    def __init__(self, db_path=DEFAULT_DB_PATH, path=None):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError("SQLite database not found at {}".format(db_path))
+        self.db_path = db_path
+        self.path = path or default_store_path(db_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # URI filenames, so the source can be attached read-only
+        self.conn = sqlite3.connect('file:' + quote(os.path.abspath(self.path)), timeout=30,
+                                    isolation_level=None, uri=True)
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute("ATTACH DATABASE ? AS src", ('file:{}?mode=ro'.format(quote(os.path.abspath(db_path))),))
+
+    def close(self):
+        self.conn.close()
+
+    def _mark(self, source, row):
+        """(rows at or below rowid `row`, key of the row at `row`) in `source`:
+        whether the rows up to the mark are still the ones folded in."""
+        count = self.conn.execute("SELECT COUNT(*) FROM src.{} WHERE rowid <= ?".format(source), (row,)).fetchone()[0]
+        key = self.conn.execute("SELECT {} FROM src.{} WHERE rowid = ?".format(KEY_COLUMN, source), (row,)).fetchone()
+        return count, None if key is None else str(key[0])
+
+    def _clear(self):
+        for table in _ROLLUP_TABLES:
+            self.conn.execute("DELETE FROM {}".format(table))
+        # Recreated rather than emptied, as its columns changed with the schema version
+        self.conn.execute("DROP TABLE IF EXISTS high_water")
+        self.conn.execute(_HIGH_WATER)
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+    def refresh(self, rebuild=False):
+        """Fold in the rows added since the last refresh; returns a RefreshResult."""
+        started = time.perf_counter()
+        folded = {}
+        # One write transaction: the store's readers see the old rollups or
+        # the new ones, and the source is read as one snapshot
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = self.conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            stale = rebuild or version is None or version[0] != str(SCHEMA_VERSION)
+            marks = {} if stale else dict((source, (row, (count, key))) for source, row, count, key in
+                                          self.conn.execute("SELECT source, row, count, key FROM high_water"))
+            stale = stale or any(row and self._mark(source, row) != mark for source, (row, mark) in marks.items())
+            if stale:
+                self._clear()
+                marks = {}
+            for source, statements in SOURCES.items():
+                low = marks.get(source, (0, None))[0]
+                high = self.conn.execute("SELECT MAX(rowid) FROM src.{}".format(source)).fetchone()[0] or 0
+                if high <= low:
+                    folded[source] = 0
+                    continue
+                for sql in statements:
+                    self.conn.execute(sql, {'low': low, 'high': high})
+                folded[source] = self.conn.execute(
+                    "SELECT COUNT(*) FROM src.{} WHERE rowid > ? AND rowid <= ?".format(source), (low, high)).fetchone()[0]
+                self.conn.execute("INSERT OR REPLACE INTO high_water VALUES (?, ?, ?, ?)",
+                                  (source, high) + self._mark(source, high))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return RefreshResult(folded['ticket_sales'], folded['visitors'], stale, time.perf_counter() - started)
+
+    def daily(self):
+        """(day, revenue, tickets, sales) per day, oldest first."""
+        return self.conn.execute(
+            "SELECT day, SUM(revenue), SUM(tickets), SUM(sales) FROM sales_daily GROUP BY day ORDER BY day").fetchall()
+
+    def weekly(self):
+        """(year-week, revenue, tickets) per %Y-W%W week, oldest first."""
+        return self.conn.execute(
+            "SELECT strftime('%Y-W%W', day) AS week, SUM(revenue), SUM(tickets) FROM sales_daily "
+            "GROUP BY week ORDER BY week").fetchall()
+
+    def hourly(self, day=None):
+        """(hour, revenue, tickets, sales) per hour of the day, over all days
+        or one; sales without a time of day are under NO_HOUR."""
+        where, params = ("WHERE day = ?", (day,)) if day else ("", ())
+        return self.conn.execute(
+            "SELECT hour, SUM(revenue), SUM(tickets), SUM(sales) FROM sales_hourly {} "
+            "GROUP BY hour ORDER BY hour".format(where), params).fetchall()
+
+    def ticket_types(self):
+        """(ticket type, sales, tickets, revenue), highest revenue first. The
+        type comes from the (small) tickets table of the source database."""
+        return self.conn.execute(
+            "SELECT COALESCE(t.type, NULLIF(s.ticket_id, ''), 'Unknown'), s.sales, s.tickets, s.revenue "
+            "FROM (SELECT ticket_id, SUM(sales) AS sales, SUM(tickets) AS tickets, SUM(revenue) AS revenue "
+            "      FROM sales_daily GROUP BY ticket_id) AS s "
+            "LEFT JOIN src.tickets AS t ON t.id = s.ticket_id ORDER BY s.revenue DESC").fetchall()
+
+    def new_visitors(self, by_week=False):
+        """(day, visitors registered) per day, or per %Y-W%W week, oldest first."""
+        if by_week:
+            return self.conn.execute(
+                "SELECT strftime('%Y-W%W', day) AS week, SUM(visitors) FROM visitors_daily "
+                "GROUP BY week ORDER BY week").fetchall()
+        return self.conn.execute("SELECT day, visitors FROM visitors_daily ORDER BY day").fetchall()
+
+    def totals(self):
+        revenue, tickets, sales = self.conn.execute(
+            "SELECT COALESCE(SUM(revenue), 0), COALESCE(SUM(tickets), 0), COALESCE(SUM(sales), 0) FROM sales_daily"
+        ).fetchone()
+        visitors = self.conn.execute("SELECT COALESCE(SUM(visitors), 0) FROM visitors_daily").fetchone()[0]
+        return {'revenue': revenue, 'tickets': tickets, 'sales': sales, 'visitors': visitors}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bring the sales and visitor rollups up to date.")
+    parser.add_argument('db', nargs='?', default=DEFAULT_DB_PATH, help="SQLite database (default: backend/zoo.db)")
+    parser.add_argument('--store', metavar='FILE', help="rollup file (default: in .docs_cache, named after the database)")
+    parser.add_argument('--rebuild', action='store_true', help="discard the rollups and aggregate every row again")
+    args = parser.parse_args(argv)
+
+    try:
+        store = RollupStore(args.db, args.store)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    try:
+        result = store.refresh(args.rebuild)
+        totals = store.totals()
+        days = len(store.daily())
+    finally:
+        store.close()
+    action = "Rebuilt" if result.rebuilt else "Updated"
+    print(f"✓ {action} {store.path} in {result.seconds * 1000:.0f} ms: "
+          f"{result.sales:,} new sales, {result.visitors:,} new visitors")
+    print(f"📊 {days:,} days, {totals['sales']:,} sales, revenue {totals['revenue']:,.2f}, "
+          f"{totals['visitors']:,} visitors")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Full-text search over the clinical and inventory text of a ZMS database.
+
+Medical check diagnoses and treatments, animal notes, vaccine names and
+inventory item names are indexed with SQLite FTS5 (porter stemming, so
+"infected" finds "infection") in a sidecar file. The indexed text is kept in
+an ordinary table next to the FTS index (an external-content index); a
+refresh compares it with the source in SQL and re-tokenizes only the rows
+that were added, changed or deleted since, so keeping the index current
+costs one read of those columns rather than a rebuild, and nothing at all
+while the database file is unchanged.
+
+Queries are ranked by BM25 and paged:
+
+    index = SearchIndex('backend/zoo.db')
+    index.refresh()
+    page = index.search('limp', page=1, per_page=20)
+
+    python search_index.py [QUERY] [--db zoo.db] [--source medical,...] [--page N] [--rebuild]
+
+The source database is only ever opened read-only.
+"""
+
+from collections import namedtuple
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from urllib.parse import quote
+
+from db_introspect import DEFAULT_DB_PATH, database_signature
+from section_cache import DEFAULT_CACHE_DIR
+
+SCHEMA_VERSION = 1
+DEFAULT_PER_PAGE = 20
+# Index entry ids are the source row's rowid plus the source's code shifted
+# this far, so every source's entries form one contiguous id range
+_SHIFT = 40
+
+# body is the indexed text and title describes the row in results, both SQL
+# expressions over the source table's columns (which must not be named like
+# the columns of entries)
+IndexSource = namedtuple('IndexSource', 'name code table body title')
+SearchHit = namedtuple('SearchHit', 'source ref title snippet score')
+SearchPage = namedtuple('SearchPage', 'query total page per_page hits')
+RefreshResult = namedtuple('RefreshResult', 'added removed entries rebuilt seconds')
+
+SOURCES = [
+    IndexSource('medical', 0, 'medical_checks',
+                "trim(COALESCE(diagnosis, '') || ' - ' || COALESCE(treatment, ''), ' -')",
+                "'Check on ' || COALESCE(date, '?') || ', animal ' || COALESCE(animal_id, '?')"),
+    IndexSource('animals', 1, 'animals',
+                "COALESCE(notes, '')",
+                "COALESCE(name, '?') || ' (' || COALESCE(species, '?') || ')'"),
+    IndexSource('vaccinations', 2, 'vaccinations',
+                "COALESCE(vaccine_name, '')",
+                "'Animal ' || COALESCE(animal_id, '?') || ', given ' || COALESCE(date_administered, '?')"),
+    IndexSource('inventory', 3, 'inventory',
+                "COALESCE(name, '')",
+                "COALESCE(category, 'Inventory') || ', ' || COALESCE(quantity, 0) || ' ' || COALESCE(unit, '')"),
+]
+SOURCE_NAMES = [source.name for source in SOURCES]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    body TEXT NOT NULL,
+    title TEXT,
+    source TEXT NOT NULL,
+    ref TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    body, title UNINDEXED, source UNINDEXED, ref UNINDEXED,
+    content='entries', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+);
+"""
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def default_index_path(db_path):
+    """Sidecar file for `db_path` in the docs cache directory."""
+    name = hashlib.sha256(os.path.abspath(db_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DEFAULT_CACHE_DIR, 'search-{}.sqlite'.format(name))
+
+
+def match_expression(text):
+    """An FTS5 query matching rows that contain every word of `text`, the last
+    one as a prefix (search-as-you-type), with FTS5 syntax taken literally."""
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return ' '.join('"{}"'.format(word) for word in words[:-1]) + (' ' if len(words) > 1 else '') + \
+        '"{}"*'.format(words[-1])
+
+
+class SearchIndex(object):
+    def __init__(self, db_path=DEFAULT_DB_PATH, path=None):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError("SQLite database not found at {}".format(db_path))
+        self.db_path = db_path
+        self.path = path or default_index_path(db_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # URI filenames, so the source can be attached read-only
+        self.conn = sqlite3.connect('file:' + quote(os.path.abspath(self.path)), timeout=30,
+                                    isolation_level=None, uri=True)
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute("ATTACH DATABASE ? AS src", ('file:{}?mode=ro'.format(quote(os.path.abspath(db_path))),))
+
+    def close(self):
+        self.conn.close()
+
+    def _tables(self):
+        return set(name for name, in self.conn.execute("SELECT name FROM src.sqlite_master WHERE type = 'table'"))
+
+    def refresh(self, rebuild=False):
+        """Bring the index in line with the source; returns a RefreshResult."""
+        started = time.perf_counter()
+        added = removed = 0
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = self.conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            rebuild = rebuild or version is None or version[0] != str(SCHEMA_VERSION)
+            if rebuild:
+                self.conn.execute("INSERT INTO search(search) VALUES ('delete-all')")
+                self.conn.execute("DELETE FROM entries")
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+            # Skip the comparison when the database file hasn't changed at all
+            signature = json.dumps(database_signature(self.db_path))
+            seen = self.conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+            if rebuild or seen is None or seen[0] != signature:
+                tables = self._tables()
+                for source in SOURCES:
+                    removed_rows, added_rows = self._refresh_source(source, source.table in tables)
+                    removed += removed_rows
+                    added += added_rows
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (signature,))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return RefreshResult(added, removed, entries, rebuild, time.perf_counter() - started)
+
+    def _refresh_source(self, source, present):
+        low, high = source.code << _SHIFT, ((source.code + 1) << _SHIFT) - 1
+        row = "e.id - {}".format(low)
+        self.conn.execute("DROP TABLE IF EXISTS temp.stale")
+        if present:
+            # Entries whose row is gone or whose text changed
+            self.conn.execute(
+                "CREATE TEMP TABLE stale AS SELECT e.id FROM entries AS e "
+                "LEFT JOIN src.{table} AS s ON s.rowid = {row} "
+                "WHERE e.id BETWEEN ? AND ? AND (s.rowid IS NULL OR e.body IS NOT {body} OR e.title IS NOT {title} "
+                "OR e.ref IS NOT s.id)".format(table=source.table, row=row, body=source.body, title=source.title), (low, high))
+        else:
+            self.conn.execute("CREATE TEMP TABLE stale AS SELECT id FROM entries WHERE id BETWEEN ? AND ?", (low, high))
+        self.conn.execute(
+            "INSERT INTO search(search, rowid, body, title, source, ref) "
+            "SELECT 'delete', id, body, title, source, ref FROM entries WHERE id IN (SELECT id FROM temp.stale)")
+        removed = self.conn.execute("DELETE FROM entries WHERE id IN (SELECT id FROM temp.stale)").rowcount
+        self.conn.execute("DROP TABLE temp.stale")
+        if not present:
+            return removed, 0
+
+        self.conn.execute("DROP TABLE IF EXISTS temp.fresh")
+        self.conn.execute(
+            "CREATE TEMP TABLE fresh AS SELECT s.rowid + ? AS id, {body} AS body, {title} AS title, ? AS source, "
+            "s.id AS ref FROM src.{table} AS s "
+            "WHERE NOT EXISTS (SELECT 1 FROM entries WHERE id = s.rowid + ?) AND {body} != ''".format(
+                table=source.table, body=source.body, title=source.title), (low, source.name, low))
+        self.conn.execute("INSERT INTO entries (id, body, title, source, ref) SELECT id, body, title, source, ref FROM temp.fresh")
+        added = self.conn.execute(
+            "INSERT INTO search(rowid, body, title, source, ref) SELECT id, body, title, source, ref FROM temp.fresh").rowcount
+        self.conn.execute("DROP TABLE temp.fresh")
+        return removed, added
+
+    def search(self, text, page=1, per_page=DEFAULT_PER_PAGE, sources=None, raw=False, markers=('[', ']')):
+        """A SearchPage of the entries matching `text`, best first. `text` is
+        taken as plain words (see match_expression) unless `raw`, when it is
+        an FTS5 query. `sources` limits the results to those of SOURCE_NAMES;
+        matched words in snippets are wrapped in `markers`."""
+        query = text if raw else match_expression(text)
+        if not query:
+            return SearchPage(text, 0, page, per_page, [])
+        where, params = "search MATCH ?", [query]
+        if sources:
+            unknown = set(sources).difference(SOURCE_NAMES)
+            if unknown:
+                raise ValueError("Unknown source(s): {}".format(", ".join(sorted(unknown))))
+            where += " AND source IN ({})".format(", ".join("?" * len(sources)))
+            params += list(sources)
+        try:
+            total = self.conn.execute("SELECT COUNT(*) FROM search WHERE " + where, params).fetchone()[0]
+            rows = self.conn.execute(
+                "SELECT source, ref, title, snippet(search, 0, ?, ?, '...', 12), bm25(search) FROM search "
+                "WHERE {} ORDER BY rank LIMIT ? OFFSET ?".format(where),
+                [markers[0], markers[1]] + params + [per_page, (max(page, 1) - 1) * per_page]).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError("Invalid search query {!r}: {}".format(text, e))
+        return SearchPage(text, total, page, per_page, [SearchHit(*row) for row in rows])
+
+    def counts(self, text, raw=False):
+        """{source name: matching entries} for `text`."""
+        query = text if raw else match_expression(text)
+        if not query:
+            return {}
+        try:
+            return dict(self.conn.execute(
+                "SELECT source, COUNT(*) FROM search WHERE search MATCH ? GROUP BY source", (query,)).fetchall())
+        except sqlite3.OperationalError as e:
+            raise ValueError("Invalid search query {!r}: {}".format(text, e))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search medical history, animal notes, vaccines and inventory.")
+    parser.add_argument('query', nargs='?', help="words to search for (omit to only bring the index up to date)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite database (default: backend/zoo.db)")
+    parser.add_argument('--index', metavar='FILE', help="index file (default: in .docs_cache, named after the database)")
+    parser.add_argument('--source', help="comma-separated sources to search ({})".format(", ".join(SOURCE_NAMES)))
+    parser.add_argument('--page', type=int, default=1)
+    parser.add_argument('--per-page', type=int, default=DEFAULT_PER_PAGE)
+    parser.add_argument('--raw', action='store_true', help="take the query as FTS5 syntax (AND, OR, NEAR, prefix*)")
+    parser.add_argument('--rebuild', action='store_true', help="discard the index and build it again")
+    args = parser.parse_args(argv)
+
+    try:
+        index = SearchIndex(args.db, args.index)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    try:
+        result = index.refresh(args.rebuild)
+        print(f"✓ {'Built' if result.rebuilt else 'Updated'} {index.path} in {result.seconds * 1000:.0f} ms: "
+              f"{result.added:,} added, {result.removed:,} removed, {result.entries:,} entries")
+        if not args.query:
+            return 0
+        started = time.perf_counter()
+        try:
+            page = index.search(args.query, args.page, args.per_page,
+                                args.source.split(',') if args.source else None, args.raw)
+        except ValueError as e:
+            print(f"✗ {e}")
+            return 2
+        elapsed = (time.perf_counter() - started) * 1000
+    finally:
+        index.close()
+    first = (page.page - 1) * page.per_page
+    print(f"🔎 {page.total:,} matches for {args.query!r} in {elapsed:.1f} ms"
+          + (f", showing {first + 1}-{first + len(page.hits)}" if page.hits else ""))
+    for hit in page.hits:
+        print(f"  {hit.score:7.2f}  {hit.source:<12} {hit.ref or '':<10} {hit.title}: {hit.snippet}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cold-start budget for create_docs.py.
+
+Each check runs in a fresh interpreter, as a per-request worker would, and
+records the CPU time (user plus system) and peak resident memory of that
+process; CPU time rather than wall time, so other load on the machine
+doesn't read as a regression:
+
+    import      import create_docs
+    pdf build   python create_docs.py out.pdf (the default sections)
+    markdown    python create_docs.py out.md
+
+After one warm-up run, the best of --runs runs is compared with the budget
+in startup_budget.json. A check whose time or peak memory exceeds its budget
+by more than --threshold fails the run, as does importing create_docs
+loading any of EAGER_MODULES (reportlab's platypus, charts and canvas are
+imported when a PDF is first laid out, not at import). Peak memory is
+stable from run to run; CPU time on a busy shared machine can still vary by
+a third, so there --time-advisory reports time overruns as warnings while
+memory and imports still fail. After a deliberate change, or on a new
+machine, --record writes the measurements as the new budget.
+
+    python startup_budget.py [--runs 5] [--threshold 1.2] [--time-advisory]
+    python startup_budget.py --record
+
+Needs os.wait4(), i.e. Linux or macOS.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import reportlab
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUDGET_PATH = os.path.join(_HERE, 'startup_budget.json')
+DEFAULT_RUNS = 5
+DEFAULT_THRESHOLD = 1.2
+
+# name, arguments to the interpreter; {dir} is a scratch directory
+CHECKS = [
+    ('import', ['-c', 'import create_docs']),
+    ('pdf build', ['create_docs.py', '{dir}/out.pdf']),
+    ('markdown', ['create_docs.py', '{dir}/out.md']),
+]
+# Modules importing create_docs must not load
+EAGER_MODULES = ['reportlab.platypus', 'reportlab.lib.styles', 'reportlab.graphics', 'reportlab.pdfgen',
+                 'PIL', 'asyncio', 'concurrent.futures.process', 'xml.sax']
+
+# seconds (CPU) and rss (peak resident memory, bytes) are the lowest over the runs
+Measurement = namedtuple('Measurement', 'name seconds rss')
+
+
+def run_child(args, cwd=_HERE):
+    """(CPU seconds, peak RSS in bytes) of one run of the interpreter with `args`."""
+    if not hasattr(os, 'wait4'):
+        raise RuntimeError("measuring a child's peak memory needs os.wait4() (Linux or macOS)")
+    # stderr goes to a file rather than a pipe: nothing reads a pipe while
+    # the child runs, so a child writing more than the pipe holds would block
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen([sys.executable] + args, cwd=cwd, stdout=subprocess.DEVNULL, stderr=stderr)
+        # wait4 rather than wait: it returns the resource usage of this child alone
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        stderr.seek(0)
+        errors = stderr.read().decode('utf-8', 'replace')
+    if proc.returncode:
+        raise RuntimeError("{} exited with {}:\n{}".format(' '.join(args), proc.returncode, errors[-2000:]))
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return usage.ru_utime + usage.ru_stime, rss
+
+
+def measure(runs=DEFAULT_RUNS):
+    """A Measurement per check, each the best of `runs` runs."""
+    work_dir = tempfile.mkdtemp(prefix='zms-startup-')
+    try:
+        results = []
+        for name, args in CHECKS:
+            args = [arg.format(dir=work_dir) for arg in args]
+            # One run not counted, so bytecode and the OS file cache are warm
+            run_child(args)
+            samples = [run_child(args) for _ in range(runs)]
+            results.append(Measurement(name, min(seconds for seconds, _ in samples), min(rss for _, rss in samples)))
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def eager_imports():
+    """The EAGER_MODULES that importing create_docs loads."""
+    output = subprocess.run([sys.executable, '-c', 'import sys, create_docs; print("\\n".join(sys.modules))'],
+                            cwd=_HERE, capture_output=True, text=True, check=True).stdout.split()
+    return sorted(name for name in EAGER_MODULES if any(module == name or module.startswith(name + '.')
+                                                        for module in output))
+
+
+def compare(budget, measurements, threshold):
+    """(time overruns, memory overruns): messages for measurements more than
+    `threshold` times their budget."""
+    limits = {check['name']: check for check in budget['checks']}
+    slow, large = [], []
+    for measurement in measurements:
+        limit = limits.get(measurement.name)
+        if limit is None:
+            continue
+        if measurement.seconds > limit['seconds'] * threshold:
+            slow.append("{}: {:.0f} ms CPU, budget {:.0f} ms ({:.2f}x)".format(
+                measurement.name, measurement.seconds * 1000, limit['seconds'] * 1000,
+                measurement.seconds / limit['seconds']))
+        if measurement.rss > limit['rss'] * threshold:
+            large.append("{}: peak RSS {:.1f} MB, budget {:.1f} MB ({:.2f}x)".format(
+                measurement.name, measurement.rss / 2**20, limit['rss'] / 2**20, measurement.rss / limit['rss']))
+    return slow, large
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check create_docs.py's cold-start time and peak memory.")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="runs per check; the best counts (default: %(default)s)")
+    parser.add_argument('--budget', default=DEFAULT_BUDGET_PATH, help="budget file (default: startup_budget.json)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="factor over budget counted as a regression (default: %(default)s)")
+    parser.add_argument('--time-advisory', action='store_true',
+                        help="only warn about CPU time over budget, for noisy machines (memory still fails)")
+    parser.add_argument('--record', action='store_true', help="write the measurements as the new budget")
+    args = parser.parse_args(argv)
+
+    try:
+        measurements = measure(args.runs)
+        eager = eager_imports()
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"✗ {e}")
+        return 1
+    for measurement in measurements:
+        print(f"{measurement.name:<10} {measurement.seconds * 1000:8.0f} ms CPU  peak RSS {measurement.rss / 2**20:6.1f} MB")
+
+    failures = []
+    if args.record:
+        budget = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'reportlab': reportlab.Version,
+                'platform': platform.platform(),
+                'runs': args.runs,
+            },
+            'checks': [{'name': m.name, 'seconds': round(m.seconds, 4), 'rss': m.rss} for m in measurements],
+        }
+        with open(args.budget, 'w', encoding='utf-8') as f:
+            json.dump(budget, f, indent=2)
+            f.write('\n')
+        print(f"Budget written to {args.budget}")
+    else:
+        with open(args.budget, encoding='utf-8') as f:
+            budget = json.load(f)
+        slow, failures = compare(budget, measurements, args.threshold)
+        if not args.time_advisory:
+            slow, failures = [], slow + failures
+        for warning in slow:
+            print(f"⚠️ {warning} (--time-advisory: not counted as a failure)")
+        for failure in failures:
+            print(f"✗ {failure}")
+        if not slow and not failures and not eager:
+            print(f"✓ Within {args.threshold}x of {os.path.basename(args.budget)}")
+
+    if eager:
+        print(f"✗ Importing create_docs loads {', '.join(eager)}")
+        return 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared table styles for the ZMS documentation.
+
+Each palette's colours are parsed once and its TableStyle is built once per
+process, then shared by every table that uses it. make_table() also sizes
+columns from their content when no widths are given, looking at a bounded
+sample of rows so large data tables cost the same as small ones.
+
+The palettes and page geometry are plain data, shared with the HTML and
+Markdown renderers; reportlab's table and colour modules are only imported
+once a PDF table is actually built.
+"""
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+
+# Usable width of a letter page with the documentation's 0.75in margins
+FRAME_WIDTH = letter[0] - 1.5*inch
+
+# header background, body background, grid
+PALETTES = {
+    'blue': ('#3B82F6', '#F9FAFB', '#E5E7EB'),
+    'green': ('#10B981', '#F0FDF4', '#D1FAE5'),
+    'purple': ('#7C3AED', '#FAF5FF', '#DDD6FE'),
+    'amber': ('#F59E0B', '#FFFBEB', '#FED7AA'),
+}
+
+# header font size, body font size, cell padding
+REGULAR = (10, 9, 8)
+COMPACT = (9, 8, 6)
+
+_table_styles = {}
+
+
+def get_table_style(palette='blue', compact=False):
+    key = (palette, compact)
+    style = _table_styles.get(key)
+    if style is not None:
+        return style
+
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    header, body, grid = (colors.HexColor(value) for value in PALETTES[palette])
+    header_size, body_size, padding = COMPACT if compact else REGULAR
+    style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), padding + 2),
+        ('BACKGROUND', (0, 1), (-1, -1), body),
+        ('GRID', (0, 0), (-1, -1), 1, grid),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, body]),
+        ('FONTSIZE', (0, 1), (-1, -1), body_size),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), padding),
+        ('RIGHTPADDING', (0, 0), (-1, -1), padding),
+        ('TOPPADDING', (0, 0), (-1, -1), padding),
+    ])
+    _table_styles[key] = style
+    return style
+
+
+def auto_col_widths(rows, compact=False, avail_width=FRAME_WIDTH, sample_rows=200):
+    """Column widths from the text in the header and the first `sample_rows`
+    rows. Columns holding flowables (e.g. Paragraphs) share whatever width the
+    text columns leave; if the text does not fit, the widest columns are
+    capped until it does."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    header_size, body_size, padding = COMPACT if compact else REGULAR
+    natural = []
+    flexible = set()
+    for r, row in enumerate(rows[:sample_rows + 1]):
+        font, size = ('Helvetica-Bold', header_size) if r == 0 else ('Helvetica', body_size)
+        for c, cell in enumerate(row):
+            if c >= len(natural):
+                natural.append(0)
+            if isinstance(cell, str):
+                width = max(stringWidth(line, font, size) for line in cell.split('\n'))
+                natural[c] = max(natural[c], width + 2*padding)
+            elif cell is not None:
+                flexible.add(c)
+
+    if flexible:
+        # Text columns keep their natural width up to a fair share of the page
+        share = avail_width / len(natural)
+        widths = [0 if c in flexible else min(width, share) for c, width in enumerate(natural)]
+        spare = max(avail_width - sum(widths), 0) / len(flexible)
+        for c in flexible:
+            widths[c] = spare
+        return widths
+
+    if sum(natural) <= avail_width:
+        return natural
+    # Water-fill: find the cap at which capped widths fill the page exactly
+    remaining = avail_width
+    ordered = sorted(natural)
+    for i, width in enumerate(ordered):
+        cap = remaining / (len(ordered) - i)
+        if width > cap:
+            return [min(w, cap) for w in natural]
+        remaining -= width
+    return natural
+
+
+def make_table(rows, palette='blue', col_widths=None, compact=False, repeat_rows=1):
+    from reportlab.platypus import Table
+    table = Table(rows, colWidths=col_widths or auto_col_widths(rows, compact), repeatRows=repeat_rows)
+    table.setStyle(get_table_style(palette, compact))
+    return table
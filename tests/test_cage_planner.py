@@ -0,0 +1,96 @@
+from collections import Counter
+import sqlite3
+
+import pytest
+
+from cage_planner import SPECIES_CAGE_TYPES, max_flow_assignment, parse_incoming, plan_placements, species_key
+
+
+def test_max_flow_reroutes_to_place_everyone():
+    # Taking the only Indoor place for the parrot would leave the lizard
+    # nowhere; the maximum flow sends the parrot to the Aviary instead
+    flow = max_flow_assignment({'parrot': 1, 'lizard': 1}, {'Indoor': 1, 'Aviary': 1},
+                               {'parrot': ['Indoor', 'Aviary'], 'lizard': ['Indoor']})
+    assert flow == {('parrot', 'Aviary'): 1, ('lizard', 'Indoor'): 1}
+
+
+def test_max_flow_respects_supply_and_compatibility():
+    flow = max_flow_assignment({'lion': 5, 'penguin': 2}, {'Outdoor': 2, 'Mixed': 1, 'Indoor/Pool': 1},
+                               {'lion': ['Outdoor', 'Mixed'], 'penguin': ['Indoor/Pool']})
+    assert sum(flow.values()) == 4
+    assert flow[('penguin', 'Indoor/Pool')] == 1
+    assert flow[('lion', 'Outdoor')] + flow[('lion', 'Mixed')] == 3
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'zoo.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE cages (id TEXT PRIMARY KEY, name TEXT NOT NULL, type TEXT, capacity INTEGER,
+                            occupancy INTEGER DEFAULT 0, location TEXT, status TEXT DEFAULT 'Active');
+        CREATE TABLE animals (id TEXT PRIMARY KEY, name TEXT NOT NULL, species TEXT NOT NULL, cage_id TEXT);
+        INSERT INTO cages (id, name, type, capacity, status) VALUES
+            ('C1', 'Savanna', 'Outdoor', 2, 'Active'),
+            ('C2', 'Paddock', 'Outdoor', 3, 'Maintenance'),
+            ('C3', 'Mixed Yard', 'Mixed', 2, 'Active'),
+            ('C4', 'Pool', 'Indoor/Pool', 1, 'Active'),
+            ('C5', 'Reptiles', 'Reptile House', 4, 'Active');
+        INSERT INTO animals VALUES
+            ('A1', 'Leo', 'Lion', 'C1'), ('A2', 'Nala', 'Lion', 'C1'), ('A3', 'Kiara', 'Lion', 'C1'),
+            ('A4', 'Marty', 'Zebra', 'C2'),
+            ('A5', 'Skipper', 'Penguin', NULL), ('A6', 'Kowalski', 'Penguin', NULL),
+            ('A7', 'Kaa', 'Python', 'C3');
+    """)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _occupancy(db_path, plan):
+    conn = sqlite3.connect(db_path)
+    where = dict(conn.execute("SELECT id, cage_id FROM animals"))
+    conn.close()
+    for move in plan.moves:
+        if move.to_cage and move.animal_id:
+            where[move.animal_id] = move.to_cage
+    occupancy = Counter(cage for cage in where.values() if cage)
+    occupancy.update(move.to_cage for move in plan.moves if move.to_cage and not move.animal_id)
+    return occupancy
+
+
+def test_plan_keeps_active_cages_within_capacity(db_path):
+    plan = plan_placements(db_path, incoming={'Lion': 1})
+    occupancy = _occupancy(db_path, plan)
+    for cage in plan.cages:
+        if cage.status == 'Active':
+            assert occupancy[cage.id] <= cage.capacity, cage
+    usage = {usage.type: usage for usage in plan.usage}
+    assert usage['Outdoor'].over_before == 1 and usage['Outdoor'].over_after == 0
+
+
+def test_plan_only_places_species_in_compatible_types(db_path):
+    plan = plan_placements(db_path, incoming={'Lion': 1})
+    types = {cage.id: cage.type for cage in plan.cages}
+    for move in plan.moves:
+        if move.to_cage:
+            assert types[move.to_cage] in SPECIES_CAGE_TYPES[species_key(move.species)], move
+    # The python in the Mixed yard moves to the reptile house
+    assert [(move.to_cage, move.reason) for move in plan.moves if move.animal_id == 'A7'] == [('C5', 'cage type')]
+
+
+def test_plan_reports_what_has_no_room(db_path):
+    plan = plan_placements(db_path, incoming={'Lion': 1})
+    reasons = Counter(move.reason for move in plan.moves)
+    assert reasons == {'over capacity': 1, 'maintenance': 1, 'no cage': 2, 'incoming': 1, 'cage type': 1}
+    # Lions and the zebra share the two Mixed places left once the python
+    # leaves (Outdoor is full); the pool takes one penguin
+    assert sum(plan.unplaced.values()) == 2
+    assert plan.unplaced['Penguin'] == 1
+    assert sum(plan.unplaced.values()) == sum(1 for move in plan.moves if move.to_cage is None)
+
+
+def test_parse_incoming():
+    assert parse_incoming("Lion:2, Sea Lion:1,Lion:1") == {'Lion': 3, 'Sea Lion': 1}
+    with pytest.raises(ValueError):
+        parse_incoming("Lion")
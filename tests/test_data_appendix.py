@@ -0,0 +1,40 @@
+import re
+
+import pytest
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Spacer
+from reportlab.platypus.doctemplate import LayoutError
+
+from data_appendix import streaming_table
+
+HEADER = ['Code', 'Name']
+
+
+def _batches(count, size):
+    rows = [['R{:04d}'.format(i), 'Row {}'.format(i)] for i in range(count)]
+    return iter([rows[start:start + size] for start in range(0, count, size)])
+
+
+def _build(path, story):
+    SimpleDocTemplate(path, pagesize=letter).build(story)
+    return [page.extract_text() for page in PdfReader(path).pages]
+
+
+@pytest.mark.parametrize('before, batch_size', [(0, 500), (0, 7), (560, 7), (630, 500)])
+def test_one_header_per_page(tmp_path, before, batch_size):
+    story = [Spacer(1, before)] if before else []
+    story.append(streaming_table(HEADER, _batches(300, batch_size)))
+    pages = _build(str(tmp_path / 'table.pdf'), story)
+
+    rows = [row for text in pages for row in re.findall(r'R\d{4}', text)]
+    assert rows == ['R{:04d}'.format(i) for i in range(300)]
+    for text in pages:
+        headers = len(re.findall(r'Code\s*Name', text))
+        assert headers == (1 if re.search(r'R\d{4}', text) else 0)
+
+
+def test_header_and_row_too_tall_for_a_page(tmp_path):
+    tall = iter([[['R0000', '\n'.join(['line'] * 200)]]])
+    with pytest.raises(LayoutError):
+        _build(str(tmp_path / 'tall.pdf'), [streaming_table(HEADER, tall)])
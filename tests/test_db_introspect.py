@@ -0,0 +1,24 @@
+import sqlite3
+
+import pytest
+
+from db_introspect import connect_readonly
+
+
+@pytest.mark.parametrize('name', ['zoo.db', 'zoo?mode=rw.db', 'zoo#1.db', 'zoo 100%.db'])
+def test_connect_readonly_opens_awkward_paths(tmp_path, name):
+    path = tmp_path / name
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE animals (id TEXT)")
+    conn.commit()
+    conn.close()
+
+    conn = connect_readonly(str(path))
+    try:
+        assert [row[0] for row in conn.execute("SELECT name FROM sqlite_master")] == ['animals']
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO animals VALUES ('A1')")
+    finally:
+        conn.close()
+    # No stray file was created from a truncated path
+    assert sorted(p.name for p in tmp_path.iterdir()) == [name]
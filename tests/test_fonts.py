@@ -0,0 +1,65 @@
+import re
+import unicodedata
+
+from pypdf import PdfReader
+from pypdf.generic import ContentStream
+
+import create_docs
+import fonts
+
+TITLE = "مکمل تکنیکی ڈاکومنٹیشن"
+
+
+def _names(text):
+    return [unicodedata.name(char) for char in text]
+
+
+def test_shape_joins_letters_and_reverses_them():
+    # Drawn left to right: the last letter of the word comes first
+    assert _names(fonts.shape("مکمل")) == [
+        'ARABIC LETTER LAM FINAL FORM', 'ARABIC LETTER MEEM MEDIAL FORM',
+        'ARABIC LETTER KEHEH MEDIAL FORM', 'ARABIC LETTER MEEM INITIAL FORM']
+    # Alef doesn't join the letter after it; digits keep their order
+    assert _names(fonts.shape("دا ۱۲")) == [
+        'EXTENDED ARABIC-INDIC DIGIT ONE', 'EXTENDED ARABIC-INDIC DIGIT TWO', 'SPACE',
+        'ARABIC LETTER ALEF ISOLATED FORM', 'ARABIC LETTER DAL ISOLATED FORM']
+
+
+def test_shape_lam_alef_and_marks():
+    assert _names(fonts.shape("سلا")) == ['ARABIC LIGATURE LAM WITH ALEF FINAL FORM', 'ARABIC LETTER SEEN INITIAL FORM']
+    # A vowel mark stays after its letter and doesn't break the join
+    assert _names(fonts.shape("بَب")) == [
+        'ARABIC LETTER BEH FINAL FORM', 'ARABIC LETTER BEH INITIAL FORM', 'ARABIC FATHA']
+
+
+def test_shape_falls_back_to_letters_the_font_covers():
+    shaped = fonts.shape("ہے", covers={ord(char) for char in "ہے"})
+    assert shaped == "ےہ"
+
+
+def _arabic_font_text(path):
+    """Text drawn in the embedded Arabic font on the first page, in drawing order."""
+    reader = PdfReader(path)
+    page = reader.pages[0]
+    resources = page['/Resources']['/Font']
+    name = next(key for key, font in resources.items() if 'DejaVuSans' in font.get_object()['/BaseFont'])
+    cmap = resources[name].get_object()['/ToUnicode'].get_object().get_data().decode('ascii')
+    codes = {int(code, 16): chr(int(text, 16))
+             for code, text in re.findall(r'<([0-9A-F]{2})> <([0-9A-F]{4})>', cmap)}
+    drawn, font = [], None
+    for operands, operator in ContentStream(page.get_contents(), reader).operations:
+        if operator == b'Tf':
+            font = operands[0]
+        elif operator == b'Tj' and font == name:
+            drawn.append(''.join(codes[byte] for byte in operands[0].get_original_bytes()))
+    return ''.join(drawn)
+
+
+def test_title_page_draws_shaped_glyphs_in_visual_order(tmp_path):
+    path = str(tmp_path / 'title.pdf')
+    create_docs.build_documentation(path, sections=['title'])
+    drawn = _arabic_font_text(path)
+    assert drawn == fonts.shape(TITLE, fonts._font['covers'])
+    # The title's last word, ڈاکومنٹیشن, ends in final noon and is drawn first
+    assert _names(drawn[:2]) == ['ARABIC LETTER NOON FINAL FORM', 'ARABIC LETTER SHEEN MEDIAL FORM']
+    assert _names(drawn[-1]) == ['ARABIC LETTER MEEM INITIAL FORM']
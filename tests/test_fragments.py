@@ -0,0 +1,83 @@
+import re
+import sqlite3
+
+import pytest
+from pypdf import PdfReader
+
+import create_docs
+from section_cache import SectionCache
+
+DATE = '01-06-2024'
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'zoo.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE animals (id TEXT PRIMARY KEY, name TEXT NOT NULL, species TEXT NOT NULL)")
+    conn.execute("INSERT INTO animals VALUES ('a1', 'Leo', 'Lion')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _key(sections, date=DATE, db_path=None):
+    ctx = create_docs._make_context(sections, date, db_path)
+    return [create_docs.fragment_key(ctx, group) for group in create_docs.page_groups(ctx.sections)]
+
+
+def test_key_is_stable():
+    assert _key(['title', 'overview']) == _key(['title', 'overview'])
+
+
+def test_key_changes_with_a_sections_inputs(db_path):
+    # The title page shows the date; the database section describes the file
+    assert _key(['title'])[0] != _key(['title'], date='02-06-2024')[0]
+    before = _key(['database'], db_path=db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE cages (id TEXT PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    assert _key(['database'], db_path=db_path) != before
+
+
+def test_key_changes_with_a_sections_code(monkeypatch):
+    before = _key(['overview'])
+    fresh = {}
+    monkeypatch.setattr(create_docs, '_code_fingerprints', fresh)
+
+    def build_overview(ctx):
+        return [create_docs.Para("Rewritten")]
+
+    sections = [section._replace(build=build_overview) if section.key == 'overview' else section
+                for section in create_docs.SECTIONS]
+    monkeypatch.setattr(create_docs, 'SECTIONS', sections)
+    assert _key(['overview']) != before
+
+
+def test_key_changes_with_a_constant_the_code_uses(monkeypatch, db_path):
+    before = _key(['vaccination_schedule'], db_path=db_path)
+    monkeypatch.setattr(create_docs, '_code_fingerprints', {})
+    monkeypatch.setattr(create_docs, 'SCHEDULE_DAYS', create_docs.SCHEDULE_DAYS + 1)
+    assert _key(['vaccination_schedule'], db_path=db_path) != before
+
+
+def _footers(path):
+    # Sorted: a stitched page's footer is drawn after its content, an uncached one's before
+    pages = [page.extract_text() for page in PdfReader(path).pages]
+    return [sorted(re.findall(r'Page \d+|Technical Documentation \([\d-]+\)', text)) for text in pages]
+
+
+def test_stitched_document_matches_an_uncached_build(tmp_path):
+    plain = str(tmp_path / 'plain.pdf')
+    pages = create_docs.build_documentation(plain, date=DATE)
+
+    cache = SectionCache(str(tmp_path / 'cache'))
+    for name in ('cold.pdf', 'warm.pdf'):
+        stitched = str(tmp_path / name)
+        assert create_docs.build_documentation(stitched, date=DATE, cache=cache) == pages
+        assert len(PdfReader(stitched).pages) == pages
+        assert _footers(stitched) == _footers(plain)
+    # The second build came entirely from the cache
+    assert cache.hits == len(create_docs.page_groups(create_docs.select_sections()))
+    assert _footers(plain)[-1] == ['Page {}'.format(pages), 'Technical Documentation (01-06-2024)']
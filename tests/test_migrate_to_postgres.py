@@ -0,0 +1,11 @@
+from migrate_to_postgres import encode_csv
+
+
+def test_csv_nulls_cannot_collide_with_text():
+    # PostgreSQL reads an unquoted empty CSV field as NULL and a quoted one as ''
+    assert encode_csv([(None, '', '\\N', 'NULL')]) == ',"","\\N","NULL"\n'
+
+
+def test_csv_values():
+    assert encode_csv([(1, 2.5, 'say "hi"', 'two\nlines', b'\x00\xff')]) == \
+        '1,2.5,"say ""hi""","two\nlines","\\x00ff"\n'
@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from rollups import RollupStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'zoo.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE tickets (id TEXT PRIMARY KEY, type TEXT);
+        CREATE TABLE ticket_sales (id TEXT PRIMARY KEY, ticket_id TEXT, quantity INTEGER, total_amount REAL,
+                                   date TEXT, visitor_name TEXT, visitor_email TEXT, visitor_phone TEXT);
+        CREATE TABLE visitors (id TEXT PRIMARY KEY, name TEXT NOT NULL, email TEXT UNIQUE, phone TEXT,
+                               registration_date TEXT);
+        INSERT INTO tickets VALUES ('T1', 'Adult'), ('T2', 'Child');
+    """)
+    _append(conn, 0, 40)
+    conn.close()
+    return path
+
+
+def _append(conn, start, end):
+    conn.executemany("INSERT INTO ticket_sales VALUES (?, ?, ?, ?, ?, NULL, NULL, NULL)", [
+        ('S{}'.format(i), 'T{}'.format(i % 2 + 1), i % 3 + 1, 12.5 * (i % 3 + 1),
+         '2024-05-{:02d}T{:02d}:15:00'.format(i % 28 + 1, i % 24) if i % 7 else '2024-05-{:02d}'.format(i % 28 + 1))
+        for i in range(start, end)])
+    conn.executemany("INSERT INTO visitors VALUES (?, ?, ?, NULL, ?)", [
+        ('V{}'.format(i), 'Visitor {}'.format(i), 'v{}@example.com'.format(i), '2024-05-{:02d}'.format(i % 28 + 1))
+        for i in range(start, end)])
+    conn.commit()
+
+
+def _snapshot(store):
+    return store.totals(), store.daily(), store.hourly(), store.ticket_types(), store.new_visitors()
+
+
+def _refresh(db_path, path, rebuild=False):
+    store = RollupStore(db_path, path)
+    try:
+        result = store.refresh(rebuild)
+        return result, _snapshot(store)
+    finally:
+        store.close()
+
+
+def test_incremental_refresh_matches_a_rebuild(db_path, tmp_path):
+    path = str(tmp_path / 'rollups.sqlite')
+    _refresh(db_path, path)
+    conn = sqlite3.connect(db_path)
+    _append(conn, 40, 100)
+    conn.close()
+
+    result, incremental = _refresh(db_path, path)
+    assert not result.rebuilt
+    assert (result.sales, result.visitors) == (60, 60)
+    _, rebuilt = _refresh(db_path, str(tmp_path / 'fresh.sqlite'), rebuild=True)
+    assert incremental == rebuilt
+
+
+def test_editing_the_newest_visitor_keeps_the_incremental_path(db_path, tmp_path):
+    path = str(tmp_path / 'rollups.sqlite')
+    _refresh(db_path, path)
+    conn = sqlite3.connect(db_path)
+    # What POST /api/ticket-sales does for a returning visitor
+    conn.execute("UPDATE visitors SET name = 'Returning', phone = '0300' WHERE id = 'V39'")
+    conn.commit()
+    conn.close()
+
+    result, _ = _refresh(db_path, path)
+    assert not result.rebuilt
+
+
+def test_deleted_rows_rebuild(db_path, tmp_path):
+    path = str(tmp_path / 'rollups.sqlite')
+    _refresh(db_path, path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM ticket_sales WHERE id = 'S3'")
+    conn.commit()
+    conn.close()
+
+    result, snapshot = _refresh(db_path, path)
+    assert result.rebuilt
+    assert snapshot[0]['sales'] == 39
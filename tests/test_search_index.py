@@ -0,0 +1,16 @@
+import sqlite3
+
+import search_index
+
+
+def test_cli_lists_hits_without_an_id(tmp_path, capsys):
+    db_path = str(tmp_path / 'zoo.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE vaccinations (id TEXT PRIMARY KEY, animal_id TEXT, vaccine_name TEXT, "
+                 "date_administered TEXT, next_due_date TEXT)")
+    conn.execute("INSERT INTO vaccinations VALUES (NULL, 'a1', 'Rabies booster', '2024-05-01', NULL)")
+    conn.commit()
+    conn.close()
+
+    assert search_index.main(['rabies', '--db', db_path, '--index', str(tmp_path / 'search.sqlite')]) == 0
+    assert 'Animal a1, given 2024-05-01' in capsys.readouterr().out
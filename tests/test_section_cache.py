@@ -0,0 +1,42 @@
+import os
+
+from section_cache import SectionCache
+
+
+def _size(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith('.pdf'))
+
+
+def _age(cache, key, seconds):
+    os.utime(cache._path(key), ns=(seconds * 10**9, seconds * 10**9))
+
+
+def test_eviction_keeps_the_cache_under_its_cap(tmp_path):
+    cache = SectionCache(str(tmp_path), max_bytes=1000)
+    for i in range(10):
+        cache.put('key{}'.format(i), b'x' * 300)
+        assert _size(str(tmp_path)) <= 1000
+    assert cache.evictions == 7
+    assert len([name for name in os.listdir(str(tmp_path)) if name.endswith('.pdf')]) == 3
+
+
+def test_eviction_drops_the_least_recently_used_entry(tmp_path):
+    cache = SectionCache(str(tmp_path), max_bytes=1000)
+    for second, key in enumerate(['a', 'b', 'c'], 1):
+        cache.put(key, b'x' * 300)
+        _age(cache, key, second)
+    # A hit makes 'a' the most recently used, so 'b' is now the oldest
+    assert cache.get('a') == b'x' * 300
+    cache.put('d', b'x' * 300)
+
+    assert 'b' not in cache
+    assert all(key in cache for key in ['a', 'c', 'd'])
+    assert cache.get('b') is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 1}
+
+
+def test_an_entry_bigger_than_the_cap_is_not_kept(tmp_path):
+    cache = SectionCache(str(tmp_path), max_bytes=100)
+    cache.put('big', b'x' * 101)
+    assert 'big' not in cache
+    assert _size(str(tmp_path)) == 0
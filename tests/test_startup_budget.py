@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import startup_budget
+from startup_budget import Measurement, compare, run_child
+
+BUDGET = {'checks': [{'name': 'import', 'seconds': 0.1, 'rss': 20 * 2**20}]}
+
+
+def test_child_writing_more_than_a_pipe_holds():
+    # A child blocked on a full stderr pipe would never exit
+    seconds, rss = run_child(['-c', 'import sys; sys.stderr.write("x" * 1000000)'])
+    assert seconds >= 0 and rss > 0
+
+
+def test_failing_child_reports_its_stderr():
+    with pytest.raises(RuntimeError, match='boom'):
+        run_child(['-c', 'raise SystemExit("boom")'])
+
+
+def test_time_and_memory_overruns_are_told_apart():
+    slow, large = compare(BUDGET, [Measurement('import', 0.13, 19 * 2**20)], 1.2)
+    assert len(slow) == 1 and large == []
+    slow, large = compare(BUDGET, [Measurement('import', 0.1, 25 * 2**20)], 1.2)
+    assert slow == [] and len(large) == 1
+
+
+@pytest.mark.parametrize('args, code', [([], 1), (['--time-advisory'], 0)])
+def test_time_overrun_fails_unless_advisory(tmp_path, monkeypatch, args, code):
+    budget = tmp_path / 'budget.json'
+    budget.write_text(json.dumps(BUDGET))
+    monkeypatch.setattr(startup_budget, 'measure', lambda runs: [Measurement('import', 0.13, 20 * 2**20)])
+    monkeypatch.setattr(startup_budget, 'eager_imports', lambda: [])
+    assert startup_budget.main(['--budget', str(budget)] + args) == code
+
+
+def test_memory_overrun_fails_even_if_time_is_advisory(tmp_path, monkeypatch):
+    budget = tmp_path / 'budget.json'
+    budget.write_text(json.dumps(BUDGET))
+    monkeypatch.setattr(startup_budget, 'measure', lambda runs: [Measurement('import', 0.1, 25 * 2**20)])
+    monkeypatch.setattr(startup_budget, 'eager_imports', lambda: [])
+    assert startup_budget.main(['--budget', str(budget), '--time-advisory']) == 1
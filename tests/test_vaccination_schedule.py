@@ -0,0 +1,148 @@
+from datetime import date
+import sqlite3
+
+import pytest
+
+import create_docs
+import vaccination_schedule
+from vaccination_schedule import VaccinationSchedule
+
+AS_OF = date(2024, 6, 1)
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(vaccination_schedule, 'DEFAULT_CACHE_DIR', str(tmp_path / 'cache'))
+    path = str(tmp_path / 'zoo.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE cages (id TEXT PRIMARY KEY, name TEXT NOT NULL);
+        CREATE TABLE animals (id TEXT PRIMARY KEY, name TEXT NOT NULL, species TEXT NOT NULL, cage_id TEXT);
+        CREATE TABLE vaccinations (id TEXT PRIMARY KEY, animal_id TEXT, vaccine_name TEXT,
+                                   date_administered TEXT, next_due_date TEXT);
+        INSERT INTO cages VALUES ('c1', 'Savanna');
+        INSERT INTO animals VALUES ('a1', 'Leo', 'Lion', 'c1'), ('a2', 'Zara', 'Zebra', 'c1');
+        INSERT INTO vaccinations VALUES
+            ('v1', 'a1', 'Rabies', '2023-05-01', '2024-05-01'),
+            ('v2', 'a2', NULL, '2023-06-01', '2024-06-10'),
+            ('v3', NULL, 'Rabies', '2023-06-01', '2024-05-15'),
+            ('v4', NULL, NULL, '2023-06-01', '2024-05-20');
+    """)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _add(db_path, *rows):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO vaccinations VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def _schedule(db_path):
+    schedule = VaccinationSchedule(db_path)
+    schedule.refresh()
+    return schedule
+
+
+def test_null_animal_skipped_and_null_vaccine_kept(db_path):
+    schedule = _schedule(db_path)
+    try:
+        assert len(schedule) == 2
+        assert [(due.animal_id, due.vaccine) for due in schedule.overdue(AS_OF)] == [('a1', 'Rabies')]
+        assert [(due.animal_id, due.vaccine, due.days) for due in schedule.due_within(AS_OF, 30)] == [('a2', '', 9)]
+    finally:
+        schedule.close()
+
+
+def test_refresh_folds_in_rows_after_the_mark(db_path):
+    schedule = _schedule(db_path)
+    try:
+        _add(db_path, ('v5', 'a1', 'Rabies', '2024-05-02', '2025-05-02'), ('v6', None, 'Rabies', '2024-05-02', None))
+        result = schedule.refresh()
+        assert not result.rebuilt
+        assert result.changed == 1
+        assert schedule.next_due('a1', 'Rabies') == date(2025, 5, 2)
+        assert schedule.count_overdue(AS_OF) == 0
+    finally:
+        schedule.close()
+
+
+def _execute(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    conn.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def test_deleted_rows_are_dropped(db_path):
+    schedule = _schedule(db_path)
+    try:
+        _execute(db_path, "DELETE FROM vaccinations WHERE id = 'v1'")
+        result = schedule.refresh()
+        assert not result.rebuilt
+        assert result.changed == 1
+        assert schedule.next_due('a1', 'Rabies') is None
+        assert len(schedule) == 1
+    finally:
+        schedule.close()
+
+
+def test_edited_rows_below_the_mark_are_picked_up(db_path):
+    schedule = _schedule(db_path)
+    try:
+        _add(db_path, ('v5', 'a2', 'Distemper', '2024-01-01', '2024-07-01'))
+        schedule.refresh()
+        # v1 is older than the mark, as an edit through PUT /api/vaccinations/:id would leave it
+        _execute(db_path, "UPDATE vaccinations SET next_due_date = '2099-01-01' WHERE id = 'v1'")
+        result = schedule.refresh()
+        assert not result.rebuilt
+        assert schedule.next_due('a1', 'Rabies') == date(2099, 1, 1)
+        assert schedule.count_overdue(AS_OF) == 0
+
+        # A row without an animal that is given one joins the schedule; given
+        # later than v1, it now decides a1's Rabies due date
+        _execute(db_path, "UPDATE vaccinations SET animal_id = 'a1' WHERE id = 'v3'")
+        schedule.refresh()
+        assert [(due.animal_id, due.vaccine, due.due) for due in schedule.overdue(AS_OF)] == [
+            ('a1', 'Rabies', date(2024, 5, 15))]
+
+        _execute(db_path, "UPDATE vaccinations SET vaccine_name = 'Rabies', animal_id = 'a2' WHERE id = 'v2'")
+        schedule.refresh()
+        assert schedule.next_due('a2', '') is None
+        assert schedule.next_due('a2', 'Rabies') == date(2024, 6, 10)
+    finally:
+        schedule.close()
+
+
+def test_incremental_refresh_matches_a_rebuild(db_path, tmp_path):
+    schedule = _schedule(db_path)
+    try:
+        _add(db_path, ('v5', 'a2', 'Distemper', '2024-01-01', '2024-07-01'))
+        _execute(db_path, "UPDATE vaccinations SET date_administered = '2024-02-01', next_due_date = '2024-04-01' "
+                          "WHERE id = 'v1'")
+        _execute(db_path, "DELETE FROM vaccinations WHERE id = 'v2'")
+        schedule.refresh()
+        fresh = VaccinationSchedule(db_path, path=str(tmp_path / 'fresh.sqlite'))
+        try:
+            fresh.refresh(rebuild=True)
+            assert schedule._entries == fresh._entries
+        finally:
+            fresh.close()
+    finally:
+        schedule.close()
+
+
+def test_cli_lists_rows_with_null_columns(db_path, capsys):
+    assert vaccination_schedule.main([db_path, '--as-of', AS_OF.isoformat()]) == 0
+    output = capsys.readouterr().out
+    assert '2 animal/vaccine pairs' in output
+    assert 'a2' in output
+
+
+def test_section_with_null_rows(db_path):
+    ctx = create_docs._make_context(['vaccination_schedule'], AS_OF.strftime(create_docs.DATE_FORMAT), db_path)
+    blocks = create_docs.build_vaccination_schedule(ctx)
+    listed = [row for block in blocks if isinstance(block, create_docs.Table) for row in block.rows]
+    assert ['', 'Zara (Zebra)', '', '2024-06-10', 'in 9 days'] in listed
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vaccination due dates: what is overdue and what falls due soon.
+
+For every (animal, vaccine) pair the due date is the next_due_date of its
+most recent vaccination. The pairs are kept in memory in one list sorted by
+due date, so "overdue on D" and "due within N days of D" are a bisect each:
+counting is O(log n), listing O(log n + k).
+
+The columns the schedule needs are mirrored in a sidecar SQLite file. The
+backend edits and deletes vaccinations as well as adding them, so a refresh
+does two things: rows after the high-water mark (the largest rowid seen)
+are copied as they are, and the rows at or below it are compared with the
+mirror in SQL, so edited and deleted ones are replaced or dropped. Only the
+pairs whose rows changed are re-derived, and while the database file is
+unchanged a refresh costs nothing. A long-running process therefore loads
+the schedule once and then applies each change in O(log n).
+
+Vaccinations without an animal are left out; a missing vaccine name is
+kept as ''.
+
+    schedule = VaccinationSchedule('backend/zoo.db')
+    schedule.refresh()
+    schedule.overdue(date.today())
+
+    python vaccination_schedule.py [zoo.db] [--days N] [--as-of YYYY-MM-DD] [--rebuild]
+
+The source database is only ever opened read-only.
+"""
+
+from bisect import bisect_left, insort
+from collections import namedtuple
+from datetime import date, timedelta
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from urllib.parse import quote
+
+from db_introspect import DEFAULT_DB_PATH, database_signature
+from section_cache import DEFAULT_CACHE_DIR
+
+# Bumped whenever the mirror changes shape; older mirrors are rebuilt
+SCHEMA_VERSION = 3
+DEFAULT_DAYS = 30
+
+# due is a date; days is how far it is from the date asked about, negative when overdue
+Due = namedtuple('Due', 'animal_id vaccine due days')
+RefreshResult = namedtuple('RefreshResult', 'changed pairs rebuilt seconds')
+
+_META = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+# Dropped and created again when SCHEMA_VERSION changes
+_MIRROR_TABLES = ('high_water', 'mirror')
+_MIRROR_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS high_water (row INTEGER NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS mirror (
+        row INTEGER PRIMARY KEY,
+        animal_id TEXT NOT NULL,
+        vaccine TEXT NOT NULL,
+        given TEXT,
+        due TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS mirror_pair ON mirror (animal_id, vaccine)",
+]
+
+# The latest vaccination of each pair decides its due date
+_LATEST = """
+SELECT animal_id, vaccine, due FROM (
+    SELECT animal_id, vaccine, due,
+           ROW_NUMBER() OVER (PARTITION BY animal_id, vaccine ORDER BY given DESC, row DESC) AS n
+    FROM mirror)
+WHERE n = 1
+"""
+
+# Mirror rows whose vaccination was deleted, lost its animal or changed
+_STALE = """
+SELECT m.row, m.animal_id, m.vaccine FROM mirror AS m LEFT JOIN src.vaccinations AS s ON s.rowid = m.row
+WHERE s.rowid IS NULL OR s.animal_id IS NULL OR CAST(s.animal_id AS TEXT) IS NOT m.animal_id
+   OR COALESCE(CAST(s.vaccine_name AS TEXT), '') IS NOT m.vaccine
+   OR s.date_administered IS NOT m.given OR s.next_due_date IS NOT m.due
+"""
+
+# Vaccinations up to :high missing from the mirror: those after the mark,
+# and those at or below it that are new to the mirror (edited, or given an
+# animal, since the last refresh)
+_FRESH = """
+SELECT rowid, CAST(animal_id AS TEXT), COALESCE(CAST(vaccine_name AS TEXT), ''), date_administered, next_due_date
+FROM src.vaccinations AS s
+WHERE rowid <= :high AND animal_id IS NOT NULL
+  AND (rowid > :low OR NOT EXISTS (SELECT 1 FROM mirror WHERE row = s.rowid))
+"""
+
+
+def default_schedule_path(db_path):
+    """Sidecar file for `db_path` in the docs cache directory."""
+    name = hashlib.sha256(os.path.abspath(db_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DEFAULT_CACHE_DIR, 'vaccinations-{}.sqlite'.format(name))
+
+
+def _ordinal(text):
+    """Day number of an ISO date or date-time string, or None if it isn't one."""
+    try:
+        return date.fromisoformat(text[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+class VaccinationSchedule(object):
+    def __init__(self, db_path=DEFAULT_DB_PATH, path=None):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError("SQLite database not found at {}".format(db_path))
+        self.db_path = db_path
+        self.path = path or default_schedule_path(db_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # URI filenames, so the source can be attached read-only
+        self.conn = sqlite3.connect('file:' + quote(os.path.abspath(self.path)), timeout=30,
+                                    isolation_level=None, uri=True)
+        self.conn.execute(_META)
+        for statement in _MIRROR_SCHEMA:
+            self.conn.execute(statement)
+        self.conn.execute("ATTACH DATABASE ? AS src", ('file:{}?mode=ro'.format(quote(os.path.abspath(db_path))),))
+        # (due ordinal, animal_id, vaccine), sorted; and pair -> due ordinal
+        self._entries = []
+        self._due = {}
+        self._loaded = False
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _reset(self):
+        for table in _MIRROR_TABLES:
+            self.conn.execute("DROP TABLE IF EXISTS {}".format(table))
+        for statement in _MIRROR_SCHEMA:
+            self.conn.execute(statement)
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+    def _mirror_changes(self, rebuild):
+        """Bring the mirror in line with the source; returns (pairs whose rows
+        were added, changed or deleted, rebuilt)."""
+        version = self.conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        rebuilt = rebuild or version is None or version[0] != str(SCHEMA_VERSION)
+        if rebuilt:
+            self._reset()
+        mark = self.conn.execute("SELECT row FROM high_water").fetchone()
+        low = mark[0] if mark else 0
+        high = self.conn.execute("SELECT MAX(rowid) FROM src.vaccinations").fetchone()[0] or 0
+
+        stale = self.conn.execute(_STALE).fetchall()
+        self.conn.executemany("DELETE FROM mirror WHERE row = ?", [(row,) for row, _, _ in stale])
+        fresh = self.conn.execute(_FRESH, {'low': low, 'high': high}).fetchall()
+        self.conn.executemany("INSERT INTO mirror VALUES (?, ?, ?, ?, ?)", fresh)
+        self.conn.execute("DELETE FROM high_water")
+        self.conn.execute("INSERT INTO high_water VALUES (?)", (max(low, high),))
+
+        pairs = set((animal_id, vaccine) for _, animal_id, vaccine in stale)
+        pairs.update((animal_id, vaccine) for _, animal_id, vaccine, _, _ in fresh)
+        return pairs, rebuilt
+
+    def _set(self, pair, ordinal):
+        old = self._due.pop(pair, None)
+        if old is not None:
+            del self._entries[bisect_left(self._entries, (old,) + pair)]
+        if ordinal is not None:
+            self._due[pair] = ordinal
+            insort(self._entries, (ordinal,) + pair)
+
+    def _load(self):
+        due = {}
+        for animal_id, vaccine, text in self.conn.execute(_LATEST):
+            ordinal = _ordinal(text)
+            if ordinal is not None:
+                due[(animal_id, vaccine)] = ordinal
+        self._due = due
+        self._entries = sorted((ordinal,) + pair for pair, ordinal in due.items())
+        self._loaded = True
+
+    def refresh(self, rebuild=False):
+        """Apply the vaccinations added, changed or deleted since the last
+        refresh; returns a RefreshResult."""
+        started = time.perf_counter()
+        signature = json.dumps(database_signature(self.db_path))
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            seen = self.conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+            if not rebuild and seen is not None and seen[0] == signature:
+                pairs, rebuilt = set(), False
+            else:
+                pairs, rebuilt = self._mirror_changes(rebuild)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (signature,))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        if rebuilt or not self._loaded:
+            self._load()
+        else:
+            for pair in pairs:
+                latest = self.conn.execute(
+                    "SELECT due FROM mirror WHERE animal_id = ? AND vaccine = ? ORDER BY given DESC, row DESC LIMIT 1",
+                    pair).fetchone()
+                self._set(pair, _ordinal(latest[0]) if latest else None)
+        return RefreshResult(len(pairs), len(self._entries), rebuilt, time.perf_counter() - started)
+
+    def _index(self, day):
+        return bisect_left(self._entries, (day.toordinal(),))
+
+    def _dues(self, start, end, as_of):
+        base = as_of.toordinal()
+        return [Due(animal_id, vaccine, date.fromordinal(ordinal), ordinal - base)
+                for ordinal, animal_id, vaccine in self._entries[start:end]]
+
+    def count_overdue(self, as_of):
+        """Pairs due before `as_of`."""
+        return self._index(as_of)
+
+    def count_due_within(self, as_of, days):
+        """Pairs due from `as_of` to `days` days after it, inclusive."""
+        return self._index(as_of + timedelta(days=days + 1)) - self._index(as_of)
+
+    def overdue(self, as_of):
+        """Dues before `as_of`, most overdue first."""
+        return self._dues(0, self._index(as_of), as_of)
+
+    def due_within(self, as_of, days):
+        """Dues from `as_of` to `days` days after it, soonest first."""
+        return self._dues(self._index(as_of), self._index(as_of + timedelta(days=days + 1)), as_of)
+
+    def next_due(self, animal_id, vaccine):
+        """The date `vaccine` is next due for `animal_id`, or None."""
+        ordinal = self._due.get((animal_id, vaccine))
+        return None if ordinal is None else date.fromordinal(ordinal)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List overdue and upcoming vaccinations.")
+    parser.add_argument('db', nargs='?', default=DEFAULT_DB_PATH, help="SQLite database (default: backend/zoo.db)")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="look this many days ahead (default: %(default)s)")
+    parser.add_argument('--as-of', type=date.fromisoformat, default=date.today(), metavar='YYYY-MM-DD')
+    parser.add_argument('--limit', type=int, default=20, help="rows to list per group (default: %(default)s)")
+    parser.add_argument('--rebuild', action='store_true', help="discard the mirror and copy every vaccination again")
+    args = parser.parse_args(argv)
+
+    try:
+        schedule = VaccinationSchedule(args.db)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    try:
+        result = schedule.refresh(args.rebuild)
+    finally:
+        schedule.close()
+    started = time.perf_counter()
+    overdue = schedule.count_overdue(args.as_of)
+    upcoming = schedule.count_due_within(args.as_of, args.days)
+    elapsed = (time.perf_counter() - started) * 1e6
+    action = "rebuilt" if result.rebuilt else "refreshed"
+    print(f"✓ {result.pairs:,} animal/vaccine pairs, {result.changed:,} changed, {action} in "
+          f"{result.seconds * 1000:.0f} ms; counted in {elapsed:.0f} µs")
+    print(f"⚠️ {overdue:,} overdue on {args.as_of}:")
+    for due in schedule.overdue(args.as_of)[:args.limit]:
+        print(f"  {due.animal_id:<12} {due.vaccine:<20} due {due.due} ({-due.days} days ago)")
+    print(f"📅 {upcoming:,} due in the next {args.days} days:")
+    for due in schedule.due_within(args.as_of, args.days)[:args.limit]:
+        print(f"  {due.animal_id:<12} {due.vaccine:<20} due {due.due} (in {due.days} days)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())